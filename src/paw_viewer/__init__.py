@@ -1,8 +1,29 @@
-from paw_viewer.viewer import show_video_array, show_video_arrays
-from paw_viewer import io
+import importlib
+
+# Exports are imported on first use, so headless tools (e.g. `paw extract`)
+# don't import pyglet's windowing and OpenGL modules
+_EXPORTS = {
+    "show_video_array": "paw_viewer.viewer",
+    "show_video_arrays": "paw_viewer.viewer",
+    "spawn": "paw_viewer.remote",
+    "ViewerHandle": "paw_viewer.remote",
+    "RingBufferSource": "paw_viewer.sources",
+}
+
+
+def __getattr__(name):
+    if name in _EXPORTS:
+        return getattr(importlib.import_module(_EXPORTS[name]), name)
+    if name == "io":
+        return importlib.import_module("paw_viewer.io")
+    raise AttributeError(f"module 'paw_viewer' has no attribute {name!r}")
+
 
 __all__ = [
+    "RingBufferSource",
+    "ViewerHandle",
+    "io",
     "show_video_array",
     "show_video_arrays",
-    "io",
+    "spawn",
 ]
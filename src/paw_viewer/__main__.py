@@ -1,48 +1,354 @@
 import argparse
+import ast
+import json
 import logging
+import sys
 
-from paw_viewer.io import auto_load_file
-from paw_viewer.viewer import show_video_arrays
+from paw_viewer.io import PRECISIONS, auto_load_file
+from paw_viewer.selections import LoadRegion
+from paw_viewer.yuv import parse_yuv_size
+
+
+def parse_crop(text: str) -> dict:
+    """Parse the crop printed with Ctrl+X, also accepting Python dict literals."""
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        return ast.literal_eval(text)
+
+
+def parse_frame_range(text: str) -> tuple[int, int | None]:
+    """Parse `start:end`, where both ends are optional."""
+    start, _, end = text.partition(":")
+    return int(start or 0), int(end) if end else None
+
+
+def load_region(args) -> LoadRegion | None:
+    if (
+        args.crop is None
+        and args.frames is None
+        and args.stride == 1
+        and args.scale == 1
+    ):
+        return None
+    region = LoadRegion.from_crop(parse_crop(args.crop)) if args.crop else LoadRegion()
+    if args.frames is not None:
+        region.start, region.end = parse_frame_range(args.frames)
+    region.stride = args.stride
+    region.scale = args.scale
+    return region
+
+
+def configure_logging(verbose: int):
+    if verbose >= 2:
+        level = logging.DEBUG
+    elif verbose == 1:
+        level = logging.INFO
+    else:
+        level = logging.WARNING
+    logging.basicConfig(level=level, format="%(asctime)s [%(levelname).1s] %(message)s")
+
+
+def add_verbose_argument(parser: argparse.ArgumentParser):
+    parser.add_argument(
+        "-v",
+        "--verbose",
+        action="count",
+        default=0,
+        help="Increase output verbosity (e.g., -v, -vv, -vvv)",
+    )
+
+
+def extract_main(argv: list[str]):
+    parser = argparse.ArgumentParser(
+        prog="paw extract",
+        description="Save crops printed with Ctrl+X as .npy files, like Ctrl+N, without a window",
+    )
+    parser.add_argument(
+        "crops",
+        type=str,
+        help="JSON lines file with one crop per line, each with a `file` key",
+    )
+    parser.add_argument(
+        "-o", "--output-dir", type=str, required=True, help="Output directory"
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=None,
+        help="Number of worker processes (one per CPU by default)",
+    )
+    parser.add_argument(
+        "--yuv-size",
+        type=str,
+        default=None,
+        help="Size of raw .yuv frames, e.g. 1920x1080 (parsed from the file names by default)",
+    )
+    add_verbose_argument(parser)
+    args = parser.parse_args(argv)
+    configure_logging(args.verbose)
+
+    from paw_viewer.extract import run_extract
+
+    ok = run_extract(
+        args.crops,
+        args.output_dir,
+        num_workers=args.jobs,
+        yuv_size=parse_yuv_size(args.yuv_size) if args.yuv_size else None,
+    )
+    sys.exit(0 if ok else 1)
+
+
+def render_main(argv: list[str]):
+    from paw_viewer.colormaps import COLORMAPS, COMPLEX_VIEWS, FLOW_VIEWS
+
+    parser = argparse.ArgumentParser(
+        prog="paw render",
+        description="Render frames like the viewer shows them to PNG files, without a window",
+    )
+    parser.add_argument("file", type=str, help="Path to the file")
+    parser.add_argument(
+        "-o", "--output-dir", type=str, required=True, help="Output directory"
+    )
+    parser.add_argument(
+        "--frames",
+        type=str,
+        default=None,
+        help="Render only frames START:END (either may be omitted)",
+    )
+    parser.add_argument(
+        "--stride", type=int, default=1, help="Render only every N-th frame"
+    )
+    parser.add_argument(
+        "--source",
+        type=str,
+        default=None,
+        help="Source to render (the first one by default)",
+    )
+    parser.add_argument(
+        "--size",
+        type=str,
+        default=None,
+        help="Size of the view, e.g. 1920x1080 (the frame size by default)",
+    )
+    parser.add_argument(
+        "--zoom", type=float, default=1.0, help="Scale of the image, e.g. 2 for 200%%"
+    )
+    parser.add_argument(
+        "--center",
+        type=str,
+        default=None,
+        help="Image pixel X,Y (rows from the top) shown at the center of the view",
+    )
+    parser.add_argument(
+        "--selection",
+        type=str,
+        default=None,
+        help="Crop printed with Ctrl+X to highlight - everything outside of it is dimmed",
+    )
+    parser.add_argument("--exposure", type=float, default=1.0, help="Exposure")
+    parser.add_argument(
+        "--gamma",
+        type=float,
+        default=None,
+        help="Gamma (2.2 for float sources by default)",
+    )
+    parser.add_argument("--colormap", choices=COLORMAPS, default="gray")
+    parser.add_argument("--flow-view", choices=FLOW_VIEWS, default="wheel")
+    parser.add_argument("--complex-view", choices=COMPLEX_VIEWS, default="magnitude")
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=None,
+        help="Number of worker processes (one per CPU by default)",
+    )
+    parser.add_argument(
+        "--yuv-size",
+        type=str,
+        default=None,
+        help="Size of raw .yuv frames, e.g. 1920x1080 (parsed from the file name by default)",
+    )
+    add_verbose_argument(parser)
+    args = parser.parse_args(argv)
+    configure_logging(args.verbose)
+
+    from paw_viewer.render import RenderSettings, run_render
+
+    start, end = parse_frame_range(args.frames) if args.frames else (0, None)
+    width, height = parse_yuv_size(args.size) if args.size else (0, 0)
+    settings = RenderSettings(
+        width,
+        height,
+        scale=args.zoom,
+        exposure=args.exposure,
+        gamma=args.gamma,
+        colormap=args.colormap,
+        flow_view=args.flow_view,
+        complex_view=args.complex_view,
+    )
+    run_render(
+        args.file,
+        args.output_dir,
+        start=start,
+        end=end,
+        stride=args.stride,
+        source_name=args.source,
+        settings=settings,
+        selection=parse_crop(args.selection) if args.selection else None,
+        center=tuple(float(v) for v in args.center.split(",")) if args.center else None,
+        num_workers=args.jobs,
+        yuv_size=parse_yuv_size(args.yuv_size) if args.yuv_size else None,
+    )
 
 
 def main():
+    # Subcommands run without a window
+    if sys.argv[1:2] == ["extract"]:
+        return extract_main(sys.argv[2:])
+    if sys.argv[1:2] == ["render"]:
+        return render_main(sys.argv[2:])
+
     parser = argparse.ArgumentParser(
-        description="Paw Viewer - A simple ndarray image/video viewer"
+        description="Paw Viewer - A simple ndarray image/video viewer",
+        epilog="Run `paw extract -h` or `paw render -h` for extracting crops or rendering"
+        " frames without a window.",
     )
     parser.add_argument("file", type=str, help="Path to the file")
     parser.add_argument(
         "--fps", type=float, default=None, help="Frames per second for video playback"
     )
     parser.add_argument(
-        "-o", "--outputs-root", type=str, default=None, help="Outputs root directory"
+        "--precision",
+        choices=PRECISIONS,
+        default="native",
+        help="Storage precision of float frames in RAM and VRAM",
     )
     parser.add_argument(
-        "-v",
-        "--verbose",
-        action="count",
-        default=0,
-        help="Increase output verbosity (e.g., -v, -vv, -vvv)",
+        "--compress",
+        choices=("zlib", "jpeg"),
+        default=None,
+        help="Keep frames of videos and image sequences compressed in RAM (zlib is lossless, jpeg is much smaller)",
+    )
+    parser.add_argument(
+        "--no-dedup",
+        action="store_true",
+        help="Don't share memory and textures between frames with identical content",
+    )
+    parser.add_argument(
+        "--yuv-size",
+        type=str,
+        default=None,
+        help="Size of raw .yuv frames, e.g. 1920x1080 (parsed from the file name by default)",
+    )
+    parser.add_argument(
+        "--yuv-format",
+        choices=("420p", "422p", "444p", "nv12"),
+        default="420p",
+        help="Plane layout of raw .yuv files",
+    )
+    parser.add_argument(
+        "--yuv-bits",
+        type=int,
+        choices=(8, 10),
+        default=8,
+        help="Bit depth of raw .yuv files (10-bit samples are stored as 16-bit words)",
     )
+    parser.add_argument(
+        "--crop",
+        type=str,
+        default=None,
+        help='Load only the frames and pixels of a crop printed with Ctrl+X, e.g. \'{"t": [0, 10], "x": [0, 64], "y": [0, 64]}\'',
+    )
+    parser.add_argument(
+        "--frames",
+        type=str,
+        default=None,
+        help="Load only frames START:END (either may be omitted)",
+    )
+    parser.add_argument(
+        "--stride", type=int, default=1, help="Load only every N-th frame"
+    )
+    parser.add_argument(
+        "--scale", type=float, default=1.0, help="Scale the loaded frames, e.g. 0.5"
+    )
+    parser.add_argument(
+        "--channels",
+        type=str,
+        default=None,
+        help="1 to 3 channels of arrays with more than 4 channels to show, e.g. 10,50,120",
+    )
+    parser.add_argument(
+        "--info",
+        action="store_true",
+        help="Print shapes, types and the estimated memory from the file headers and exit",
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="Watch the directory and load new or modified frames while running",
+    )
+    parser.add_argument(
+        "-o", "--outputs-root", type=str, default=None, help="Outputs root directory"
+    )
+    add_verbose_argument(parser)
     args = parser.parse_args()
 
-    if args.verbose >= 2:
-        level = logging.DEBUG
-    elif args.verbose == 1:
-        level = logging.INFO
+    configure_logging(args.verbose)
+
+    yuv_size = parse_yuv_size(args.yuv_size) if args.yuv_size else None
+    if args.info:
+        from paw_viewer.probe import format_info, probe
+
+        info = probe(
+            args.file,
+            yuv_size=yuv_size,
+            yuv_layout=args.yuv_format,
+            yuv_bit_depth=args.yuv_bits,
+        )
+        print(format_info(info))
+        return
+
+    watcher = None
+    if args.watch:
+        from paw_viewer.watch import watch_directory
+
+        watcher = watch_directory(args.file, precision=args.precision)
+        videos, fps = watcher.named_sources(), 30.0
     else:
-        level = logging.WARNING
-    logging.basicConfig(level=level, format="%(asctime)s [%(levelname).1s] %(message)s")
+        videos, fps = auto_load_file(
+            args.file,
+            precision=args.precision,
+            compress=args.compress,
+            dedup=not args.no_dedup,
+            yuv_size=yuv_size,
+            yuv_layout=args.yuv_format,
+            yuv_bit_depth=args.yuv_bits,
+            region=load_region(args),
+        )
+    if args.channels:
+        from paw_viewer.sources import ChannelView
 
-    videos, fps = auto_load_file(args.file)
+        channels = tuple(int(c) for c in args.channels.split(","))
+        for video in videos.values():
+            if isinstance(video, ChannelView):
+                video.select(channels)
     print(f"Loaded frames with {int(fps)}fps and shapes:")
     for name, video in videos.items():
         print(f"  {name or '<unnamed>'}: {video.shape}")
 
-    show_video_arrays(
-        videos,
-        fps=args.fps if args.fps is not None else fps,
-        outputs_root=args.outputs_root,
-    )
+    from paw_viewer.viewer import show_video_arrays
+
+    try:
+        show_video_arrays(
+            videos,
+            fps=args.fps if args.fps is not None else fps,
+            outputs_root=args.outputs_root,
+        )
+    finally:
+        if watcher is not None:
+            watcher.stop()
 
 
 if __name__ == "__main__":
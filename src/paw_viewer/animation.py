@@ -1,70 +1,373 @@
+import ctypes
 import logging
+import math
+import time
+from collections import OrderedDict
+from enum import IntEnum
+
 import numpy as np
 import pyglet
+from pyglet.event import EventDispatcher
 from pyglet.gl import GL_NEAREST
-import ctypes
-from paw_viewer.selections import TimeRange
-from paw_viewer.selections import clip
-
+from pyglet.math import Vec2
+
+from paw_viewer.colormaps import (
+    COLORMAPS,
+    COMPLEX_VIEWS,
+    FLOW_VIEWS,
+    apply_colormap,
+    complex_to_rgba,
+    flow_to_rgba,
+)
+from paw_viewer.io import tone_map_to_uint8
+from paw_viewer.selections import TimeRange, clip
+from paw_viewer.sources import (
+    ChannelView,
+    expand_channel_sources,
+    wrap_complex_sources,
+)
+from paw_viewer.yuv import YUV_MATRICES
+
+# Sized formats of R, RG, RGB and RGBA textures.
+# Integer formats are normalized, i.e. sampled as [0, 1] (or [-1, 1] for signed types)
+DTYPE_TO_GL_FORMATS = {
+    np.dtype(np.uint8): (
+        pyglet.gl.GL_R8,
+        pyglet.gl.GL_RG8,
+        pyglet.gl.GL_RGB8,
+        pyglet.gl.GL_RGBA8,
+    ),
+    np.dtype(np.int8): (
+        pyglet.gl.GL_R8_SNORM,
+        pyglet.gl.GL_RG8_SNORM,
+        pyglet.gl.GL_RGB8_SNORM,
+        pyglet.gl.GL_RGBA8_SNORM,
+    ),
+    np.dtype(np.uint16): (
+        pyglet.gl.GL_R16,
+        pyglet.gl.GL_RG16,
+        pyglet.gl.GL_RGB16,
+        pyglet.gl.GL_RGBA16,
+    ),
+    np.dtype(np.int16): (
+        pyglet.gl.GL_R16_SNORM,
+        pyglet.gl.GL_RG16_SNORM,
+        pyglet.gl.GL_RGB16_SNORM,
+        pyglet.gl.GL_RGBA16_SNORM,
+    ),
+    np.dtype(np.float16): (
+        pyglet.gl.GL_R16F,
+        pyglet.gl.GL_RG16F,
+        pyglet.gl.GL_RGB16F,
+        pyglet.gl.GL_RGBA16F,
+    ),
+    np.dtype(np.float32): (
+        pyglet.gl.GL_R32F,
+        pyglet.gl.GL_RG32F,
+        pyglet.gl.GL_RGB32F,
+        pyglet.gl.GL_RGBA32F,
+    ),
+}
 
-DTYPE_TO_GL_FORMAT = {
-    np.dtype(np.uint8): pyglet.gl.GL_RGBA8,
-    np.dtype(np.float16): pyglet.gl.GL_RGBA16F,
-    np.dtype(np.float32): pyglet.gl.GL_RGBA32F,
+CHANNELS_TO_GL_FORMAT = {
+    1: pyglet.gl.GL_RED,
+    2: pyglet.gl.GL_RG,
+    3: pyglet.gl.GL_RGB,
+    4: pyglet.gl.GL_RGBA,
 }
 
 DTYPE_TO_CTYPE = {
     np.dtype(np.uint8): ctypes.POINTER(ctypes.c_uint8),
+    np.dtype(np.int8): ctypes.POINTER(ctypes.c_int8),
+    np.dtype(np.uint16): ctypes.POINTER(ctypes.c_uint16),
+    np.dtype(np.int16): ctypes.POINTER(ctypes.c_int16),
     np.dtype(np.float16): ctypes.POINTER(ctypes.c_uint16),
     np.dtype(np.float32): ctypes.POINTER(ctypes.c_float),
 }
 
 DTYPE_TO_GL_TYPE = {
     np.dtype(np.uint8): pyglet.gl.GL_UNSIGNED_BYTE,
+    np.dtype(np.int8): pyglet.gl.GL_BYTE,
+    np.dtype(np.uint16): pyglet.gl.GL_UNSIGNED_SHORT,
+    np.dtype(np.int16): pyglet.gl.GL_SHORT,
     np.dtype(np.float16): pyglet.gl.GL_HALF_FLOAT,
     np.dtype(np.float32): pyglet.gl.GL_FLOAT,
 }
 
 
-class Animation:
+def value_scale(dtype: np.dtype) -> float:
+    """
+    Scale applied in the shader to the sampled values of a given dtype.
+
+    Types without a matching texture format are converted to float32 frame by frame,
+    so wide integers have to be normalized to [0, 1] like the natively supported ones.
+    """
+    dtype = np.dtype(dtype)
+    if dtype in DTYPE_TO_GL_FORMATS or not np.issubdtype(dtype, np.integer):
+        return 1.0
+    return 1.0 / np.iinfo(dtype).max
+
+
+def normalize_frame(frame: np.ndarray) -> np.ndarray:
+    """Convert integer frames to float32 in [0, 1] (or [-1, 1]), matching what the shader shows."""
+    if np.issubdtype(frame.dtype, np.integer):
+        return frame.astype(np.float32) / np.iinfo(frame.dtype).max
+    return frame
+
+
+def expand_to_rgba(frame: np.ndarray) -> np.ndarray:
+    """Convert 1 to 3 channel frames to RGBA, like sampling R, RG and RGB textures in the shader."""
+    C = frame.shape[-1]
+    if C == 4:
+        return frame
+    max_value = (
+        np.iinfo(frame.dtype).max if np.issubdtype(frame.dtype, np.integer) else 1
+    )
+    rgba = np.zeros((*frame.shape[:-1], 4), dtype=frame.dtype)
+    if C == 1:
+        rgba[..., :3] = frame
+    else:
+        rgba[..., :C] = frame
+    rgba[..., 3] = max_value
+    return rgba
+
+
+class TextureCache:
+    """
+    Least-recently-used cache of frame textures.
+
+    Textures are uploaded lazily on first access, so only frames that were actually displayed
+    are resident in VRAM. The oldest textures are deleted once the total size exceeds `max_bytes`.
+    """
+
+    def __init__(self, max_bytes: int | None = None):
+        self.max_bytes = max_bytes
+        self.num_bytes = 0
+        self.textures: OrderedDict[tuple, tuple[pyglet.image.Texture, int]] = (
+            OrderedDict()
+        )
+
+    def __contains__(self, key: tuple) -> bool:
+        return key in self.textures
+
+    def get(self, key: tuple, create_fn) -> pyglet.image.Texture:
+        entry = self.textures.get(key)
+        if entry is not None:
+            self.textures.move_to_end(key)
+            return entry[0]
+
+        texture, num_bytes = create_fn()
+        self.textures[key] = (texture, num_bytes)
+        self.num_bytes += num_bytes
+        self.evict(keep=key)
+        return texture
+
+    def evict(self, keep: tuple | None = None):
+        if self.max_bytes is None:
+            return
+        while self.num_bytes > self.max_bytes and len(self.textures) > 1:
+            key = next(iter(self.textures))
+            if key == keep:
+                break
+            self.remove(key)
+
+    def remove(self, key: tuple):
+        texture, num_bytes = self.textures.pop(key)
+        self.num_bytes -= num_bytes
+        texture.delete()
+
+    def rekey(self, rename):
+        """
+        Replace every key with `rename(key)`, keeping the recency order.
+        Textures whose new key is None are deleted.
+        """
+        textures = self.textures
+        self.textures = OrderedDict()
+        for key, (texture, num_bytes) in textures.items():
+            new_key = rename(key)
+            if new_key is None:
+                self.num_bytes -= num_bytes
+                texture.delete()
+            else:
+                self.textures[new_key] = (texture, num_bytes)
+
+    def clear(self):
+        for key in list(self.textures):
+            self.remove(key)
+
+
+class CompareMode(IntEnum):
+    """
+    Ways of comparing the active source against the reference source.
+
+    Values are passed directly to the fragment shader as `compare_mode`.
+    """
+
+    OFF = 0
+    ABS_DIFFERENCE = 1
+    SIGNED_DIFFERENCE = 2
+    WIPE = 3
+    FLICKER = 4
+
+    def label(self) -> str:
+        return COMPARE_MODE_LABELS[self]
+
+
+COMPARE_MODE_LABELS = {
+    CompareMode.OFF: "Off",
+    CompareMode.ABS_DIFFERENCE: "|A-B|",
+    CompareMode.SIGNED_DIFFERENCE: "A-B",
+    CompareMode.WIPE: "Wipe",
+    CompareMode.FLICKER: "Flicker",
+}
+
+
+class Animation(EventDispatcher):
     """
     Represents a sequence of frames split into multiple sources.
 
     Each source represent a different way of capturing the same scene,
     e.g. final image color with different graphic settings, texture albedos, depth.
 
-    Each source capture consists of the same number of same-sized frames.
+    Each source capture consists of same-sized frames.
+
+    The timeline is indexed in frames at `fps`. Sources with a different number of frames
+    are mapped by time (see `source_frame`), e.g. single images are shown for the whole
+    timeline without duplicating them. `source_fps` maps source names to their frame rate,
+    if it differs from `fps`.
+
+    `on_frame_change` is dispatched for every frame advanced by playback,
+    so a window only has to redraw while playing.
     """
 
-    def __init__(self, sources: dict[str, np.ndarray], fps: float = 30):
+    def __init__(
+        self,
+        sources: dict[str, np.ndarray],
+        fps: float = 30,
+        max_texture_bytes: int | None = 4 * 1024**3,
+        proxy_factor: int = 4,
+        proxy_min_bytes: int = 16 * 1024**2,
+        proxy_throughput_threshold: float = 512 * 1024**2,
+        source_fps: dict[str, float] | None = None,
+    ):
         if len(sources) == 0:
             raise ValueError("sources must not be empty")
+        # Arrays with leading dimensions or many channels are shown through channel views
+        sources = wrap_complex_sources(expand_channel_sources(sources))
         logging.info(f"Initializing Animation with sources: {list(sources.keys())}")
         self.sources = list(sources.values())
         self.names = list(sources.keys())
         self.fps = fps
+        # None means that the source follows the timeline fps
+        source_fps = source_fps or {}
+        self.source_fps = [source_fps.get(name) for name in self.names]
         self.active_source = 0
         self.gamma = 1.0
         self.exposure = 1.0
-
-        T, H, W, _ = self.sources[self.active_source].shape
-
-        if self.sources[self.active_source].dtype != np.uint8:
+        # Single-channel sources are shown through a colormap (see `COLORMAPS`)
+        self.colormap = "gray"
+        # Two-channel sources are shown as flow fields (see `FLOW_VIEWS`)
+        self.flow_view = "wheel"
+        # Complex sources are shown as real and imaginary channels (see `COMPLEX_VIEWS`)
+        self.complex_view = "magnitude"
+        self.value_ranges: dict[int, tuple[float, float]] = {}
+        self.range_sample_frames = 16
+
+        # Comparison of the active source against the reference source is done in the shader
+        self.compare_mode = CompareMode.OFF
+        self.reference_source = 0
+        self.compare_gain = 1.0
+        self.flicker_period = 0.5  # in seconds
+
+        if np.issubdtype(self.sources[self.active_source].dtype, np.floating):
             self.gamma = 2.2
 
-        active_frames = self.sources[self.active_source]
-        self.num_frames = active_frames.shape[0]
+        self.num_frames = self.timeline_length()
         self.frame_index = 0
         self.time_range = TimeRange(0, self.num_frames)
         self.running = False
         self.back_and_forth = False
         self.backward = False
 
-        logging.info("Creating textures for animation frames")
-        self.per_source_textures = [
-            [self._create_texture(source[t]) for t in range(T)]
-            for source in self.sources
-        ]
+        # Textures are created on demand, e.g. tiled views only upload the visible tiles
+        self.texture_cache = TextureCache(max_texture_bytes)
+
+        # Downscaled proxy frames are shown instead of large frames while scrubbing
+        # or when playback would need to upload more than `proxy_throughput_threshold` bytes/s
+        self.proxy_factor = proxy_factor
+        self.proxy_min_bytes = proxy_min_bytes
+        self.proxy_throughput_threshold = proxy_throughput_threshold
+        self.proxy_texture_cache = TextureCache(max_texture_bytes)
+        self.settle_delay = 0.15  # in seconds
+        self.last_scrub_time = -np.inf
+
+        # Growing sources (e.g. `RingBufferSource`) are polled for new frames before every draw
+        self.follow_latest = False
+        self.source_versions = [getattr(s, "version", None) for s in self.sources]
+        self.source_offsets = [getattr(s, "offset", 0) for s in self.sources]
+
+        # CPU copy of the last frame read by `pixel_value`, keyed by (source index, frame)
+        self.pixel_frame: tuple[tuple[int, int] | None, np.ndarray | None] = (
+            None,
+            None,
+        )
+
+        self.register_event_type("on_frame_change")
+
+    @property
+    def is_live(self) -> bool:
+        return any(version is not None for version in self.source_versions)
+
+    def sources_changed(self) -> bool:
+        """Whether a growing source has new frames, which `refresh_sources` picks up."""
+        return any(
+            getattr(source, "version", None) != version
+            for source, version in zip(self.sources, self.source_versions)
+        )
+
+    def refresh_sources(self) -> bool:
+        """Pick up frames appended to growing sources. Returns True if `num_frames` changed."""
+        owner = self.timeline_owner()
+        for i, source in enumerate(self.sources):
+            version = getattr(source, "version", None)
+            if version == self.source_versions[i]:
+                continue
+
+            # Inserting or replacing frames makes the textures from the first changed index stale
+            changed_from = getattr(source, "changed_from", None)
+            if changed_from is not None:
+                first_changed = changed_from(self.source_versions[i])
+                if first_changed is not None:
+                    self.invalidate_from(i, first_changed)
+            self.source_versions[i] = version
+
+            # Indices are relative to the oldest retained frame, so evictions shift all of them
+            shift = source.offset - self.source_offsets[i]
+            if shift == 0:
+                continue
+            self.source_offsets[i] = source.offset
+            self.shift_textures(i, shift)
+            if i == owner:
+                # The timeline follows the frames of its longest source
+                fps = self.source_fps[i]
+                if fps is not None and fps != self.fps:
+                    shift = round(shift * self.fps / fps)
+                self.frame_index = max(0, self.frame_index - shift)
+                self.time_range = TimeRange(
+                    max(0, self.time_range.start - shift),
+                    max(0, self.time_range.end - shift),
+                )
+
+        num_frames = self.timeline_length()
+        changed = num_frames != self.num_frames
+        if changed:
+            is_full_range = self.time_range == TimeRange(0, self.num_frames)
+            self.num_frames = num_frames
+            if is_full_range or self.time_range.is_empty():
+                self.time_range = TimeRange(0, num_frames)
+        if self.follow_latest:
+            self.frame_index = self.time_range.end - 1
+        return changed
 
     def set_time_range(self, time_range: TimeRange | None = None):
         if time_range is not None and not time_range.is_empty():
@@ -82,50 +385,404 @@ class Animation:
             f"Creating texture for image of shape {image.shape} and dtype {image.dtype}"
         )
         H, W, C = image.shape
-        assert C == 4, "Only RGBA images are supported"
+        assert C in CHANNELS_TO_GL_FORMAT, (
+            "Only images with 1 to 4 channels are supported"
+        )
+        if image.dtype not in DTYPE_TO_GL_FORMATS:
+            # e.g. float64 or int32 - converted per frame, without a float32 copy of the source
+            image = np.ascontiguousarray(image, dtype=np.float32)
+        image = np.ascontiguousarray(image)
+        internalformat = DTYPE_TO_GL_FORMATS[image.dtype][C - 1]
 
         texture = pyglet.image.Texture.create(
             width=W,
             height=H,
             min_filter=GL_NEAREST,
             mag_filter=GL_NEAREST,
-            internalformat=DTYPE_TO_GL_FORMAT[image.dtype],
+            internalformat=internalformat,
         )
         from pyglet import gl
 
         gl.glBindTexture(texture.target, texture.id)
+        # Rows of images with less than 4 channels are not necessarily 4-byte aligned
+        gl.glPixelStorei(gl.GL_UNPACK_ALIGNMENT, 1)
         gl.glTexImage2D(
             texture.target,  # target
             0,  # level
-            DTYPE_TO_GL_FORMAT[image.dtype],  # internalformat
+            internalformat,  # internalformat
             texture.width,  # width
             texture.height,  # height
             0,  # border
-            gl.GL_RGBA,  # format
+            CHANNELS_TO_GL_FORMAT[C],  # format
             DTYPE_TO_GL_TYPE[image.dtype],  # type
             image.ctypes.data_as(DTYPE_TO_CTYPE[image.dtype]),  # pixels
         )
+        gl.glPixelStorei(gl.GL_UNPACK_ALIGNMENT, 4)
         return texture
 
+    def timeline_lengths(self) -> list[int]:
+        """Number of timeline frames needed to show every frame of each source."""
+        lengths = []
+        for source, fps in zip(self.sources, self.source_fps):
+            T = source.shape[0]
+            if fps is not None and fps != self.fps:
+                T = math.ceil(T * self.fps / fps)
+            lengths.append(T)
+        return lengths
+
+    def timeline_length(self) -> int:
+        """Number of timeline frames needed to show every frame of the longest source."""
+        return max(self.timeline_lengths())
+
+    def timeline_owner(self) -> int:
+        """Index of the longest source, which determines the timeline (the first one on ties)."""
+        lengths = self.timeline_lengths()
+        return lengths.index(max(lengths))
+
+    def source_frame(self, source_index: int, t: int | None = None) -> int:
+        """
+        Map a timeline frame to a frame of the given source by time.
+        Single-frame sources are broadcast, and shorter sources hold their last frame.
+        """
+        if t is None:
+            t = self.frame_index
+        T = self.sources[source_index].shape[0]
+        if T == 1:
+            return 0
+        fps = self.source_fps[source_index]
+        if fps is not None and fps != self.fps:
+            t = math.floor(t * fps / self.fps + 1e-6)
+        return min(t, T - 1)
+
+    def source_frame_range(self, source_index: int, start: int, end: int) -> slice:
+        """
+        Get the source frames shown during the timeline range [start, end), without repeats.
+        Faster sources show several frames during a timeline frame, so all of them are included.
+        """
+        first = self.source_frame(source_index, start)
+        T = self.sources[source_index].shape[0]
+        fps = self.source_fps[source_index]
+        if fps is not None and fps != self.fps:
+            end = math.ceil(end * fps / self.fps - 1e-6)
+        return slice(first, max(first + 1, min(end, T)))
+
+    def frame(self, source_index: int, t: int | None = None) -> np.ndarray:
+        """Get the frame of a source shown at timeline frame `t`."""
+        return self.sources[source_index][self.source_frame(source_index, t)]
+
+    def frame_key(self, source_index: int, t: int) -> tuple:
+        """
+        Get the texture cache key of a source frame.
+        Deduplicated sources return the same key for frames with equal content,
+        so such frames share a single texture.
+        """
+        frame_key = getattr(self.sources[source_index], "frame_key", None)
+        if frame_key is not None:
+            return frame_key(t)
+        return (source_index, t)
+
+    def texture(self, source_index: int, t: int | None = None) -> pyglet.image.Texture:
+        """Get the texture of a source at timeline frame `t`, uploading it if it's not resident."""
+        f = self.source_frame(source_index, t)
+        return self.texture_cache.get(
+            self.frame_key(source_index, f), lambda: self._upload_frame(source_index, f)
+        )
+
+    def _upload_frame(self, source_index: int, t: int):
+        source = self.sources[source_index]
+        # e.g. YUV planes, which are converted to RGB in the shader
+        texture_frame = getattr(source, "texture_frame", None)
+        image = texture_frame(t) if texture_frame is not None else source[t]
+        return self._create_texture(image), image.nbytes
+
+    def invalidate(self, source_index: int, t: int | None = None):
+        """Drop cached textures of a source frame (or all its frames) after its data changed."""
+        if t is None:
+            self.value_ranges.pop(source_index, None)
+            self.drop_textures(source_index)
+        else:
+            self.drop_textures(source_index, t, t + 1)
+
+    def invalidate_from(self, source_index: int, t: int):
+        """Drop cached textures of all frames starting at `t`, e.g. after inserting a frame."""
+        self.drop_textures(source_index, t)
+
+    def drop_textures(self, source_index: int, start: int = 0, stop: int | None = None):
+        """
+        Drop cached textures of frames `[start, stop)` of a source.
+
+        Textures of deduplicated sources are shared between frames and sources,
+        so their keys are looked up with `frame_key` instead of matching the source index.
+        """
+        self.pixel_frame = (None, None)
+        source = self.sources[source_index]
+        if hasattr(source, "frame_key"):
+            stop = len(source) if stop is None else min(stop, len(source))
+            keys = {self.frame_key(source_index, f) for f in range(start, stop)}
+
+            def is_stale(key: tuple) -> bool:
+                return key in keys
+
+        else:
+
+            def is_stale(key: tuple) -> bool:
+                return (
+                    key[0] == source_index
+                    and key[1] >= start
+                    and (stop is None or key[1] < stop)
+                )
+
+        for cache in (self.texture_cache, self.proxy_texture_cache):
+            for key in list(cache.textures):
+                if is_stale(key):
+                    cache.remove(key)
+
+    def shift_textures(self, source_index: int, shift: int):
+        """
+        Re-key cached textures of a source after its oldest `shift` frames were evicted,
+        so the retained frames keep their textures and only the evicted ones are dropped.
+        """
+        if hasattr(self.sources[source_index], "frame_key"):
+            return
+        self.pixel_frame = (None, None)
+
+        def rename(key: tuple) -> tuple | None:
+            if key[0] != source_index:
+                return key
+            if key[1] < shift:
+                return None
+            return (key[0], key[1] - shift, *key[2:])
+
+        for cache in (self.texture_cache, self.proxy_texture_cache):
+            cache.rekey(rename)
+
+    def proxy_frame(self, source_index: int, t: int) -> np.ndarray:
+        """
+        Get a frame downscaled by `proxy_factor` in both dimensions.
+
+        Sources may provide a cheaper way of decoding reduced frames with a
+        `read_proxy(t, factor)` method. Otherwise, we do a strided read,
+        which only touches a fraction of the rows of memory-mapped arrays.
+        """
+        return self._read_proxy(source_index, self.source_frame(source_index, t))
+
+    def _read_proxy(self, source_index: int, f: int) -> np.ndarray:
+        source = self.sources[source_index]
+        read_proxy = getattr(source, "read_proxy", None)
+        if read_proxy is not None:
+            return read_proxy(f, self.proxy_factor)
+        step = self.proxy_factor
+        return np.ascontiguousarray(source[f, ::step, ::step])
+
+    def proxy_texture(
+        self, source_index: int, t: int | None = None
+    ) -> pyglet.image.Texture:
+        f = self.source_frame(source_index, t)
+
+        def upload():
+            image = self._read_proxy(source_index, f)
+            return self._create_texture(image), image.nbytes
+
+        return self.proxy_texture_cache.get(self.frame_key(source_index, f), upload)
+
+    def value_scale(self, source_index: int) -> float:
+        source = self.sources[source_index]
+        return getattr(source, "value_scale", None) or value_scale(source.dtype)
+
+    def channel_count(self, source_index: int) -> int:
+        return self.sources[source_index].shape[-1]
+
+    def is_complex(self, source_index: int) -> bool:
+        return getattr(self.sources[source_index], "is_complex", False)
+
+    def yuv_layout(self, source_index: int) -> int:
+        """Index of the plane layout of YUV sources in `YUV_LAYOUTS`, 0 for other sources."""
+        return getattr(self.sources[source_index], "yuv_layout", 0)
+
+    def yuv_coefficients(self, source_index: int) -> Vec2:
+        matrix = getattr(self.sources[source_index], "matrix", "bt709")
+        return Vec2(*YUV_MATRICES[matrix])
+
+    def next_yuv_matrix(self):
+        """Switch the active YUV source between the BT.601 and BT.709 matrices."""
+        source = self.sources[self.active_source]
+        if self.yuv_layout(self.active_source):
+            matrices = list(YUV_MATRICES)
+            source.matrix = matrices[
+                (matrices.index(source.matrix) + 1) % len(matrices)
+            ]
+
+    def value_range(self, source_index: int) -> tuple[float, float]:
+        """
+        Get the range of (normalized) values of a source, which colormaps are stretched to.
+        For two-channel (flow and complex) sources, this is the range of the magnitude.
+
+        The range is reduced once from up to `range_sample_frames` evenly spaced frames
+        (proxies of large frames) and cached, so it doesn't change (and flicker) during playback.
+        """
+        value_range = self.value_ranges.get(source_index)
+        if value_range is not None:
+            return value_range
+
+        T = len(self.sources[source_index])
+        frames = np.linspace(0, T - 1, min(T, self.range_sample_frames)).round()
+        low, high = np.inf, -np.inf
+        use_proxy = self.frame_nbytes(source_index) >= self.proxy_min_bytes
+        for f in np.unique(frames).astype(int):
+            if use_proxy:
+                values = self._read_proxy(source_index, f)
+            else:
+                values = np.asarray(self.sources[source_index][f])
+            values = normalize_frame(values)
+            if values.shape[-1] == 2:
+                values = np.hypot(values[..., 0], values[..., 1])
+            values = values[np.isfinite(values)]
+            if values.size > 0:
+                low = min(low, float(values.min()))
+                high = max(high, float(values.max()))
+        if not low < high:
+            # Constant (or empty) sources are shown in the middle of the colormap
+            low, high = (0.0, 1.0) if not np.isfinite(low) else (low - 0.5, low + 0.5)
+        value_range = self.value_ranges[source_index] = (low, high)
+        logging.debug(f"Value range of source {source_index}: {value_range}")
+        return value_range
+
+    def frame_nbytes(self, source_index: int) -> int:
+        source = self.sources[source_index]
+        return int(np.prod(source.shape[1:])) * source.dtype.itemsize
+
+    def scrub(self):
+        """Mark that the frame is being changed interactively, e.g. by dragging the slider."""
+        self.last_scrub_time = time.monotonic()
+
+    @property
+    def is_scrubbing(self) -> bool:
+        return time.monotonic() - self.last_scrub_time < self.settle_delay
+
+    def use_proxy(self, source_index: int) -> bool:
+        if self.yuv_layout(source_index):
+            # Planes are already compact, and the shader can't show converted proxies
+            return False
+        if self.frame_nbytes(source_index) < self.proxy_min_bytes:
+            return False
+        if self.is_scrubbing:
+            return True
+        throughput = self.frame_nbytes(source_index) * self.fps
+        return self.running and throughput > self.proxy_throughput_threshold
+
+    def display_texture(
+        self, source_index: int, t: int | None = None
+    ) -> pyglet.image.Texture:
+        """
+        Get the texture to display for a given source frame.
+
+        Resident full-resolution textures are always preferred.
+        Otherwise, a proxy is shown until the view settles.
+        """
+        f = self.source_frame(source_index, t)
+        if self.frame_key(source_index, f) not in self.texture_cache and self.use_proxy(
+            source_index
+        ):
+            return self.proxy_texture(source_index, t)
+        return self.texture(source_index, t)
+
+    def source_size(self, source_index: int) -> Vec2:
+        _, H, W, _ = self.sources[source_index].shape
+        return Vec2(W, H)
+
     @property
     def frames(self):
         return self.sources[self.active_source]
 
     @property
-    def active_textures(self):
-        return self.per_source_textures[self.active_source]
+    def main_size(self) -> Vec2:
+        """Size of the first source, which defines the model coordinates of the view."""
+        return self.source_size(0)
 
     @property
-    def main_texture(self) -> pyglet.image.Texture:
-        return self.per_source_textures[0][self.frame_index]
+    def active_size(self) -> Vec2:
+        return self.source_size(self.active_source)
 
     @property
     def active_texture(self) -> pyglet.image.Texture:
-        return self.active_textures[self.frame_index]
+        return self.display_texture(self.active_source)
+
+    @property
+    def reference_texture(self) -> pyglet.image.Texture:
+        return self.display_texture(self.reference_source)
 
     def active_source_name(self):
         return self.names[self.active_source]
 
+    def reference_source_name(self):
+        return self.names[self.reference_source]
+
+    def next_compare_mode(self):
+        self.compare_mode = CompareMode((self.compare_mode + 1) % len(CompareMode))
+
+    def pin_reference_source(self):
+        """Use the active source as the reference for comparison modes."""
+        self.reference_source = self.active_source
+
+    def next_colormap(self):
+        self.colormap = COLORMAPS[(COLORMAPS.index(self.colormap) + 1) % len(COLORMAPS)]
+
+    def next_flow_view(self):
+        self.flow_view = FLOW_VIEWS[
+            (FLOW_VIEWS.index(self.flow_view) + 1) % len(FLOW_VIEWS)
+        ]
+
+    def next_complex_view(self):
+        index = COMPLEX_VIEWS.index(self.complex_view)
+        self.complex_view = COMPLEX_VIEWS[(index + 1) % len(COMPLEX_VIEWS)]
+
+    def next_view_mode(self):
+        """
+        Cycle complex views for complex sources, flow views for two-channel sources
+        and colormaps for all other sources.
+        """
+        if self.is_complex(self.active_source):
+            self.next_complex_view()
+        elif self.channel_count(self.active_source) == 2:
+            self.next_flow_view()
+        else:
+            self.next_colormap()
+
+    def uses_colormap(self, source_index: int) -> bool:
+        return self.colormap != "gray" and self.channel_count(source_index) == 1
+
+    def uses_value_range(self, source_index: int) -> bool:
+        return self.uses_colormap(source_index) or self.channel_count(source_index) == 2
+
+    def channel_view(self) -> ChannelView | None:
+        source = self.sources[self.active_source]
+        return source if isinstance(source, ChannelView) else None
+
+    def shift_channels(self, step: int):
+        """Show the next (or previous) channels of the active channel view."""
+        view = self.channel_view()
+        if view is None:
+            return
+        view.select(view.channels[0] + step * len(view.channels))
+        self.invalidate(self.active_source)
+
+    def next_channel_count(self):
+        """Cycle between showing 1, 2 and 3 channels of the active channel view."""
+        view = self.channel_view()
+        if view is None:
+            return
+        view.select(
+            view.channels[0], len(view.channels) % min(3, view.num_channels) + 1
+        )
+        self.invalidate(self.active_source)
+
+    def toggle_channel_mosaic(self):
+        view = self.channel_view()
+        if view is None:
+            return
+        view.mosaic = not view.mosaic
+        self.invalidate(self.active_source)
+
     def animation_step(self, dt):
         if not self.running:
             # just in case - this should not be called when not running
@@ -146,18 +803,60 @@ class Animation:
                     self.frame_index = self.time_range.end - 2
                 else:
                     self.frame_index = self.time_range.start
+        self.dispatch_event("on_frame_change", self.frame_index)
 
     def frame_as_uint8(self, t: int | None = None) -> np.ndarray:
-        if t is None:
-            t = self.frame_index
-        frame = self.frames[t]
-        if frame.dtype != np.uint8:
-            frame = (
-                (255 * np.pow(np.abs(frame * self.exposure), 1 / self.gamma))
-                .clip(0, 255)
-                .astype(np.uint8)
+        return self.tone_map_to_uint8(
+            self.frame(self.active_source, t), self.active_source
+        )
+
+    def tone_map_to_uint8(
+        self, frame: np.ndarray, source_index: int | None = None
+    ) -> np.ndarray:
+        """
+        Apply exposure and gamma to float images, like the fragment shader does.
+        Frames of single-channel sources are colormapped, and flow fields and complex frames
+        are converted to colors if `source_index` is given.
+        """
+        if source_index is not None and self.is_complex(source_index):
+            return complex_to_rgba(
+                frame,
+                self.complex_view,
+                self.value_range(source_index)[1],
+                self.exposure,
+                self.colormap,
             )
-        return frame
+        if source_index is not None and self.channel_count(source_index) == 2:
+            return flow_to_rgba(
+                normalize_frame(frame),
+                self.flow_view,
+                self.value_range(source_index)[1],
+                self.exposure,
+                self.colormap,
+            )
+        if source_index is not None and self.uses_colormap(source_index):
+            return apply_colormap(
+                normalize_frame(frame),
+                self.colormap,
+                self.value_range(source_index),
+                self.exposure,
+            )
+        if frame.dtype != np.uint8:
+            frame = tone_map_to_uint8(normalize_frame(frame), self.exposure, self.gamma)
+        return expand_to_rgba(frame)
+
+    def pixel_value(self, y: int, x: int, t: int | None = None) -> np.ndarray:
+        """Get exact values of a pixel of the active source, even if it's stored at reduced precision."""
+        t = self.source_frame(self.active_source, t)
+        source = self.sources[self.active_source]
+        native_pixel = getattr(source, "native_pixel", None)
+        if native_pixel is not None:
+            return native_pixel(t, y, x)
+        # Hovering reads many pixels of a frame, which may be compressed or decoded lazily
+        key = (self.active_source, t)
+        if self.pixel_frame[0] != key:
+            self.pixel_frame = (key, np.asarray(source[t]))
+        return self.pixel_frame[1][y, x]
 
     def start(self):
         pyglet.clock.schedule_interval(self.animation_step, 1 / self.fps)
@@ -0,0 +1,169 @@
+"""
+Colormaps for single-channel sources, e.g. depth, disparity or error maps,
+and views of two-channel flow fields.
+
+All colormaps are stored as rows of a single lookup texture, which is sampled in the shader,
+so switching between them doesn't touch the frame textures.
+The CPU functions mirror the shaders, e.g. for thumbnails and clipboard copies.
+"""
+
+import functools
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+if TYPE_CHECKING:
+    import pyglet
+
+# "gray" shows the values like any other source (with exposure and gamma),
+# the remaining colormaps show the value range of the source (see `Animation.value_range`)
+COLORMAPS = ("gray", "viridis", "turbo", "diverging")
+LUT_SIZE = 256
+
+# Flow fields are shown as a color wheel (hue is the direction, saturation the magnitude),
+# as the magnitude only (through the active colormap) or as the direction only
+FLOW_VIEWS = ("wheel", "magnitude", "angle")
+
+# Complex sources are shown as one of these scalars (through the active colormap),
+# except for the phase, which is shown on a color wheel
+COMPLEX_VIEWS = ("magnitude", "log-magnitude", "phase", "real", "imaginary")
+
+
+def diverging_lut(size: int = LUT_SIZE) -> np.ndarray:
+    """Blue-white-red map, matching `diverging_colormap` in fragment.glsl."""
+    negative = np.array([0.23, 0.30, 0.75])
+    neutral = np.array([0.87, 0.87, 0.87])
+    positive = np.array([0.71, 0.02, 0.15])
+    v = np.linspace(-1.0, 1.0, size)[:, np.newaxis]
+    rgb = np.where(
+        v < 0,
+        neutral + (negative - neutral) * -v,
+        neutral + (positive - neutral) * v,
+    )
+    return (255 * rgb).round().astype(np.uint8)
+
+
+@functools.cache
+def colormap_lut(name: str) -> np.ndarray:
+    """Get a `[LUT_SIZE, 4]` uint8 RGBA lookup table."""
+    if name == "gray":
+        rgb = np.arange(LUT_SIZE, dtype=np.uint8)[:, np.newaxis].repeat(3, axis=1)
+    elif name == "diverging":
+        rgb = diverging_lut()
+    else:
+        import cv2
+
+        cv2_colormap = {"viridis": cv2.COLORMAP_VIRIDIS, "turbo": cv2.COLORMAP_TURBO}[
+            name
+        ]
+        indices = np.arange(LUT_SIZE, dtype=np.uint8)[:, np.newaxis]
+        rgb = cv2.cvtColor(cv2.applyColorMap(indices, cv2_colormap), cv2.COLOR_BGR2RGB)[
+            :, 0
+        ]
+    return np.concatenate([rgb, np.full((LUT_SIZE, 1), 255, np.uint8)], axis=1)
+
+
+def normalize_values(
+    values: np.ndarray,
+    name: str,
+    value_range: tuple[float, float],
+    exposure: float = 1.0,
+) -> np.ndarray:
+    """Map values to [0, 1] lookup coordinates, like `apply_colormap` in fragment.glsl."""
+    low, high = value_range
+    if name == "diverging":
+        # Zero stays in the middle, so the signs of the values are always visible
+        limit = max(abs(low), abs(high))
+        normalized = 0.5 + 0.5 * values * exposure / limit
+    else:
+        normalized = (values - low) * exposure / (high - low)
+    return np.clip(np.nan_to_num(normalized), 0.0, 1.0)
+
+
+def apply_colormap(
+    values: np.ndarray,
+    name: str,
+    value_range: tuple[float, float],
+    exposure: float = 1.0,
+) -> np.ndarray:
+    """Convert a `[..., 1]` array of values to uint8 RGBA colors on the CPU."""
+    normalized = normalize_values(values[..., 0], name, value_range, exposure)
+    indices = (normalized * (LUT_SIZE - 1)).round().astype(np.intp)
+    return colormap_lut(name)[indices]
+
+
+def hue_to_rgb(hue: np.ndarray) -> np.ndarray:
+    """Fully saturated colors for hues in [0, 1], like `hue_to_rgb` in fragment.glsl."""
+    offsets = np.array([0.0, 4.0, 2.0])
+    return np.clip(np.abs(np.mod(hue[..., np.newaxis] * 6 + offsets, 6) - 3) - 1, 0, 1)
+
+
+def flow_to_rgba(
+    flow: np.ndarray,
+    view: str,
+    max_magnitude: float,
+    exposure: float = 1.0,
+    colormap: str = "gray",
+) -> np.ndarray:
+    """Convert a `[..., 2]` flow field to uint8 RGBA colors on the CPU."""
+    magnitude = np.hypot(flow[..., 0], flow[..., 1])
+    if view == "magnitude":
+        return apply_colormap(
+            magnitude[..., np.newaxis], colormap, (0.0, max_magnitude), exposure
+        )
+
+    hue = np.arctan2(flow[..., 1], flow[..., 0]) / (2 * np.pi) + 0.5
+    rgb = hue_to_rgb(hue)
+    if view == "wheel":
+        saturation = np.clip(magnitude * exposure / max_magnitude, 0, 1)[
+            ..., np.newaxis
+        ]
+        rgb = 1 - saturation * (1 - rgb)
+    rgba = np.full((*flow.shape[:-1], 4), 255, np.uint8)
+    rgba[..., :3] = (255 * np.nan_to_num(rgb)).round()
+    return rgba
+
+
+def complex_to_rgba(
+    values: np.ndarray,
+    view: str,
+    max_magnitude: float,
+    exposure: float = 1.0,
+    colormap: str = "gray",
+) -> np.ndarray:
+    """Convert a `[..., 2]` array of real and imaginary parts to uint8 RGBA colors on the CPU."""
+    real, imaginary = values[..., 0], values[..., 1]
+    if view == "phase":
+        rgba = np.full((*values.shape[:-1], 4), 255, np.uint8)
+        hue = np.arctan2(imaginary, real) / (2 * np.pi) + 0.5
+        rgba[..., :3] = (255 * hue_to_rgb(hue)).round()
+        return rgba
+    if view == "log-magnitude":
+        scalar = np.log1p(np.hypot(real, imaginary))
+        value_range = (0.0, np.log1p(max_magnitude))
+    elif view == "real":
+        scalar, value_range = real, (-max_magnitude, max_magnitude)
+    elif view == "imaginary":
+        scalar, value_range = imaginary, (-max_magnitude, max_magnitude)
+    else:
+        scalar, value_range = np.hypot(real, imaginary), (0.0, max_magnitude)
+    return apply_colormap(scalar[..., np.newaxis], colormap, value_range, exposure)
+
+
+def create_colormap_texture() -> "pyglet.image.Texture":
+    """Create a texture with one row per colormap, in the order of `COLORMAPS`."""
+    # Imported here, so the CPU functions can be used without a display (see render.py)
+    import pyglet
+    from pyglet.gl import GL_LINEAR, GL_RGBA8
+
+    luts = np.stack([colormap_lut(name) for name in COLORMAPS])
+    texture = pyglet.image.Texture.create(
+        width=LUT_SIZE,
+        height=len(COLORMAPS),
+        min_filter=GL_LINEAR,
+        mag_filter=GL_LINEAR,
+        internalformat=GL_RGBA8,
+    )
+    image = pyglet.image.ImageData(LUT_SIZE, len(COLORMAPS), "RGBA", luts.tobytes())
+    texture.blit_into(image, 0, 0, 0)
+    return texture
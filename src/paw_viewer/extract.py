@@ -0,0 +1,216 @@
+"""
+Extracting many crops without opening a window, e.g. crops collected by QA automation.
+
+Crops are JSON lines in the format printed with Ctrl+X, with an additional `file` key:
+
+    {"file": "clip.mp4", "source": "", "t": [1200, 1260], "x": [640, 1280], "y": [0, 360]}
+
+Crops of the same file are extracted by a single worker of a process pool, which reads only
+the frames and pixels covering them (see `LoadRegion`). Crops with overlapping or adjacent
+frame ranges share a single read, so a video is decoded at most once per group of crops.
+Every crop is saved like with Ctrl+N, into a subdirectory named after its file
+(see `output_subdirs`).
+"""
+
+import json
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+from paw_viewer.io import auto_load_file, crop_filename, find_source
+from paw_viewer.selections import LoadRegion
+
+# Errors of unreadable files, missing sources and crops outside of the frames,
+# which are reported without stopping the remaining crops
+LOAD_ERRORS = (OSError, ValueError, KeyError, IndexError)
+
+
+@dataclass
+class Crop:
+    file: str
+    source: str
+    t: tuple[int, int]
+    x: tuple[int, int]
+    y: tuple[int, int]
+
+    @classmethod
+    def from_dict(cls, crop: dict) -> "Crop":
+        return cls(
+            file=crop["file"],
+            source=crop.get("source", ""),
+            t=tuple(int(t) for t in crop["t"]),
+            x=tuple(int(x) for x in crop["x"]),
+            y=tuple(int(y) for y in crop["y"]),
+        )
+
+    def filename(self) -> str:
+        return crop_filename(self.source, self.t, self.x, self.y)
+
+
+def read_crops(path: str | Path) -> list[Crop]:
+    """Read crops from a JSON lines file, skipping empty lines."""
+    crops = []
+    with open(path) as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                crops.append(Crop.from_dict(json.loads(line)))
+            except (ValueError, KeyError, TypeError) as e:
+                raise ValueError(
+                    f"Invalid crop on line {line_number} of {path}: {e}"
+                ) from e
+    return crops
+
+
+def group_crops(crops: list[Crop]) -> list[list[Crop]]:
+    """Split the crops of a file into groups with overlapping or adjacent frame ranges."""
+    groups = []
+    end = None
+    for crop in sorted(crops, key=lambda crop: crop.t):
+        if end is None or crop.t[0] > end:
+            groups.append([])
+            end = crop.t[1]
+        groups[-1].append(crop)
+        end = max(end, crop.t[1])
+    return groups
+
+
+def covering_region(crops: list[Crop]) -> LoadRegion:
+    """The smallest region containing the frames and pixels of all crops."""
+    sources = {crop.source for crop in crops}
+    return LoadRegion(
+        start=min(crop.t[0] for crop in crops),
+        end=max(crop.t[1] for crop in crops),
+        x=(min(crop.x[0] for crop in crops), max(crop.x[1] for crop in crops)),
+        y=(min(crop.y[0] for crop in crops), max(crop.y[1] for crop in crops)),
+        source=sources.pop() if len(sources) == 1 else None,
+    )
+
+
+def extract_file(
+    path: str | Path, crops: list[Crop], output_dir: str | Path, **load_options
+) -> tuple[list[Path], list[str]]:
+    """
+    Extract all crops of a single file. Returns the saved paths and error messages,
+    so a broken file or crop doesn't stop the remaining ones.
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    saved, errors = [], []
+    for group in group_crops(crops):
+        region = covering_region(group)
+        try:
+            sources, _ = auto_load_file(
+                path, dedup=False, region=region, **load_options
+            )
+        except LOAD_ERRORS as e:
+            errors.extend(f"{path}: {crop.filename()}: {e}" for crop in group)
+            continue
+        frames = {}
+        for crop in group:
+            try:
+                if crop.source not in frames:
+                    # Lazy sources are decoded once for all crops of the group
+                    _, source = find_source(sources, crop.source)
+                    frames[crop.source] = np.asarray(source[0 : len(source)])
+                data = frames[crop.source][
+                    crop.t[0] - region.start : crop.t[1] - region.start,
+                    crop.y[0] - region.y[0] : crop.y[1] - region.y[0],
+                    crop.x[0] - region.x[0] : crop.x[1] - region.x[0],
+                ]
+                if data.size == 0:
+                    raise ValueError("empty crop")
+                output_path = output_dir / crop.filename()
+                np.save(output_path, data)
+                saved.append(output_path)
+            except LOAD_ERRORS as e:
+                errors.append(f"{path}: {crop.filename()}: {e}")
+    return saved, errors
+
+
+def output_subdirs(paths: list[str]) -> dict[str, Path]:
+    """
+    Output subdirectory of each file: its stem, or where files share a stem
+    (e.g. `a/clip.mp4` and `b/clip.mp4`), its path below their common directory,
+    with the extension kept in the name (`a/clip_mp4`), so crops are never overwritten.
+    """
+    by_stem: dict[str, list[str]] = {}
+    for path in paths:
+        by_stem.setdefault(Path(path).stem, []).append(path)
+    subdirs = {}
+    for stem, group in by_stem.items():
+        if len(group) == 1:
+            subdirs[group[0]] = Path(stem)
+            continue
+        resolved = [Path(path).resolve() for path in group]
+        common = Path(os.path.commonpath([path.parent for path in resolved]))
+        for path, full_path in zip(group, resolved):
+            relative = full_path.relative_to(common)
+            subdirs[path] = relative.parent / relative.name.replace(".", "_")
+    return subdirs
+
+
+def init_worker():
+    import cv2
+
+    # Files are decoded in parallel by the pool already
+    cv2.setNumThreads(1)
+
+
+def extract_crops(
+    crops: list[Crop],
+    output_dir: str | Path,
+    num_workers: int | None = None,
+    **load_options,
+) -> tuple[list[Path], list[str]]:
+    """
+    Extract crops into `output_dir/<file stem>/` (see `output_subdirs`), one file per pool task.
+    `load_options` are passed to `auto_load_file`, e.g. `yuv_size`.
+    """
+    by_file: dict[str, list[Crop]] = {}
+    for crop in crops:
+        by_file.setdefault(crop.file, []).append(crop)
+    subdirs = output_subdirs(list(by_file))
+    num_workers = min(num_workers or os.cpu_count() or 1, len(by_file)) or 1
+
+    saved, errors = [], []
+    with ProcessPoolExecutor(
+        max_workers=num_workers, initializer=init_worker
+    ) as executor:
+        futures = {
+            executor.submit(
+                extract_file,
+                path,
+                file_crops,
+                Path(output_dir) / subdirs[path],
+                **load_options,
+            ): path
+            for path, file_crops in by_file.items()
+        }
+        for future in as_completed(futures):
+            file_saved, file_errors = future.result()
+            logging.info(f"Extracted {len(file_saved)} crop(s) from {futures[future]}")
+            saved.extend(file_saved)
+            errors.extend(file_errors)
+    return saved, errors
+
+
+def run_extract(crops_path: str | Path, output_dir: str | Path, **kwargs) -> bool:
+    """Extract the crops of a JSON lines file and print a summary. Returns False on errors."""
+    start_time = time.perf_counter()
+    crops = read_crops(crops_path)
+    saved, errors = extract_crops(crops, output_dir, **kwargs)
+    for error in errors:
+        logging.error(f"Failed to extract {error}")
+    elapsed = time.perf_counter() - start_time
+    print(
+        f"Saved {len(saved)} of {len(crops)} crops to {Path(output_dir).absolute()}"
+        f" in {elapsed:.1f}s"
+    )
+    return not errors
@@ -1,10 +1,16 @@
+import math
+import time
+
 import pyglet
 from pyglet.event import EventDispatcher
 from pyglet.gl import (
     GL_BLEND,
+    GL_LINES,
     GL_ONE_MINUS_SRC_ALPHA,
     GL_SRC_ALPHA,
     GL_TEXTURE0,
+    GL_TEXTURE1,
+    GL_TEXTURE2,
     GL_TRIANGLES,
     glActiveTexture,
     glBindTexture,
@@ -17,10 +23,32 @@ from pyglet.graphics.shader import Shader, ShaderProgram
 from pyglet.math import Mat4, Vec2, Vec3, Vec4
 
 from paw_viewer import shaders
-from paw_viewer.animation import Animation
-from paw_viewer.selections import CropCorners, change_coords_resolution
+from paw_viewer.animation import Animation, CompareMode
+from paw_viewer.colormaps import (
+    COLORMAPS,
+    COMPLEX_VIEWS,
+    FLOW_VIEWS,
+    create_colormap_texture,
+)
+from paw_viewer.selections import CropCorners, change_coords_resolution, clip
 from paw_viewer.zoom_level import ZoomLevel
 
+# Must match `MAX_TILES` in tiled_fragment.glsl
+MAX_TILES = 15
+# Texture unit of the colormaps in the tiled view, after all tile textures.
+# Together they use the 16 texture units every OpenGL 4 implementation provides
+TILED_COLORMAP_UNIT = MAX_TILES
+
+# Flow arrows are laid out on a grid with this spacing in window pixels
+ARROW_SPACING = 24
+MAX_ARROWS = 4096
+# Shaft and two head lines of an arrow pointing along X, centered around the origin
+ARROW_LINES = (
+    (-0.5, 0.0, 0.5, 0.0),
+    (0.5, 0.0, 0.25, 0.12),
+    (0.5, 0.0, 0.25, -0.12),
+)
+
 
 KEY_TO_NUMBER = {
     pyglet.window.key._0: 0,
@@ -65,6 +93,7 @@ class RenderGroup(Group):
         self.vert_shader = Shader(shaders.load_shader("vertex.glsl"), "vertex")
         self.frag_shader = Shader(shaders.load_shader("fragment.glsl"), "fragment")
         self.program = ShaderProgram(self.vert_shader, self.frag_shader)
+        self.colormap_texture: pyglet.image.Texture | None = None
 
     def create_vertex_list(self, batch):
         return self.program.vertex_list_indexed(
@@ -75,11 +104,188 @@ class RenderGroup(Group):
             self,
             position=(
                 "f",
-                shaders.create_quad_from_texture(self.animation.main_texture),
+                shaders.create_quad_from_size(self.animation.main_size),
             ),
-            tex_coords=("f", self.animation.main_texture.tex_coords),
+            tex_coords=("f", shaders.QUAD_TEX_COORDS),
         )
 
+    def set_state(self):
+        # Fetch all textures before binding, as uploading a new texture changes the bindings
+        texture = self.animation.active_texture
+        if self.animation.compare_mode != CompareMode.OFF:
+            reference_texture = self.animation.reference_texture
+            glActiveTexture(GL_TEXTURE1)
+            glBindTexture(reference_texture.target, reference_texture.id)
+        if self.colormap_texture is not None:
+            glActiveTexture(GL_TEXTURE2)
+            glBindTexture(self.colormap_texture.target, self.colormap_texture.id)
+        glActiveTexture(GL_TEXTURE0)
+        glBindTexture(texture.target, texture.id)
+        glEnable(GL_BLEND)
+        glBlendFunc(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
+        self.program.use()
+
+    def unset_state(self):
+        glDisable(GL_BLEND)
+
+    def __hash__(self):
+        return hash(
+            (
+                id(self.animation),
+                self.order,
+                self.parent,
+                self.program,
+            )
+        )
+
+    def __eq__(self, other):
+        return (
+            self.__class__ is other.__class__
+            and id(self.animation) == id(other.animation)
+            and self.order == other.order
+            and self.program == other.program
+            and self.parent == other.parent
+        )
+
+
+class TileGrid:
+    """
+    Grid of same-sized tiles in model coordinates, centered around the origin.
+
+    Tiles are laid out row by row, starting from the top-left corner.
+    """
+
+    def __init__(self, num_tiles: int, tile_size: Vec2, gap: float = 0.05):
+        self.num_tiles = num_tiles
+        self.columns = math.ceil(math.sqrt(num_tiles))
+        self.rows = math.ceil(num_tiles / self.columns)
+        self.tile_size = tile_size
+        self.pitch = tile_size * (1.0 + gap)
+
+    def center(self, slot: int) -> Vec2:
+        column = slot % self.columns
+        row = slot // self.columns
+        return Vec2(
+            (column - (self.columns - 1) / 2) * self.pitch.x,
+            ((self.rows - 1) / 2 - row) * self.pitch.y,
+        )
+
+    def nearest_slot(self, v: Vec2) -> int:
+        column = round(v.x / self.pitch.x + (self.columns - 1) / 2)
+        row = round((self.rows - 1) / 2 - v.y / self.pitch.y)
+        column = clip(column, 0, self.columns - 1)
+        row = clip(row, 0, self.rows - 1)
+        return min(row * self.columns + column, self.num_tiles - 1)
+
+
+class TiledRenderGroup(Group):
+    """
+    Renders multiple sources in a grid with a single instanced draw call.
+
+    Every tile uses the same model transform, so panning and zooming is shared.
+    Only textures of the tiles listed in `visible_slots` are bound (and uploaded).
+    """
+
+    def __init__(self, animation: Animation, order=0, parent=None):
+        super().__init__(order, parent)
+        self.animation = animation
+        self.program = ShaderProgram(
+            Shader(shaders.load_shader("tiled_vertex.glsl"), "vertex"),
+            Shader(shaders.load_shader("tiled_fragment.glsl"), "fragment"),
+        )
+        self.tile_sources: list[int] = []
+        self.visible_slots: list[int] = []
+        self.colormap_texture: pyglet.image.Texture | None = None
+
+    def create_vertex_list(self, batch, grid: TileGrid):
+        # Non-indexed, because pyglet doesn't commit index buffers of instanced domains
+        vertex_list = self.program.vertex_list_instanced(
+            6,
+            GL_TRIANGLES,
+            ["tile_center", "tile_slot"],
+            batch,
+            self,
+            position=("f", shaders.QUAD_TRIANGLES_CORNER_COORDS),
+            tile_center=("f", tuple(grid.center(0)) * 6),
+            tile_slot=("f", (0.0,) * 6),
+        )
+        for slot in range(1, grid.num_tiles):
+            vertex_list.add_instance(
+                tile_center=tuple(grid.center(slot)), tile_slot=(float(slot),)
+            )
+        return vertex_list
+
+    def set_state(self):
+        # Fetch all textures before binding, as uploading a new texture changes the bindings
+        textures = {
+            slot: self.animation.display_texture(self.tile_sources[slot])
+            for slot in self.visible_slots
+        }
+        for slot, texture in textures.items():
+            glActiveTexture(GL_TEXTURE0 + slot)
+            glBindTexture(texture.target, texture.id)
+        if self.colormap_texture is not None:
+            glActiveTexture(GL_TEXTURE0 + TILED_COLORMAP_UNIT)
+            glBindTexture(self.colormap_texture.target, self.colormap_texture.id)
+        glActiveTexture(GL_TEXTURE0)
+        glEnable(GL_BLEND)
+        glBlendFunc(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
+        self.program.use()
+
+    def unset_state(self):
+        glDisable(GL_BLEND)
+
+    def __hash__(self):
+        return hash(
+            (
+                id(self.animation),
+                self.order,
+                self.parent,
+                self.program,
+            )
+        )
+
+    def __eq__(self, other):
+        return (
+            self.__class__ is other.__class__
+            and id(self.animation) == id(other.animation)
+            and self.order == other.order
+            and self.program == other.program
+            and self.parent == other.parent
+        )
+
+
+class FlowArrowsGroup(Group):
+    """
+    Draws an arrow for every cell of a grid over the visible part of a flow source.
+
+    Arrows are instances of a single line template. The vertex shader reads the flow vectors
+    directly from the displayed texture, so nothing is computed on the CPU.
+    """
+
+    def __init__(self, animation: Animation, order=0, parent=None):
+        super().__init__(order, parent)
+        self.animation = animation
+        self.program = ShaderProgram(
+            Shader(shaders.load_shader("arrow_vertex.glsl"), "vertex"),
+            Shader(shaders.load_shader("arrow_fragment.glsl"), "fragment"),
+        )
+
+    def create_vertex_list(self, batch):
+        # Instances are only added once - unused ones are discarded in the vertex shader
+        vertex_list = self.program.vertex_list_instanced(
+            2 * len(ARROW_LINES),
+            GL_LINES,
+            ["arrow_index"],
+            batch,
+            self,
+            position=("f", sum(ARROW_LINES, ())),
+            arrow_index=("f", (0.0,) * 2 * len(ARROW_LINES)),
+        )
+        for index in range(1, MAX_ARROWS):
+            vertex_list.add_instance(arrow_index=(float(index),))
+        return vertex_list
+
     def set_state(self):
         texture = self.animation.active_texture
         glActiveTexture(GL_TEXTURE0)
@@ -173,8 +379,35 @@ class FrameView(EventDispatcher):
         self.group = RenderGroup(self.animation, order=4)
         self.vertex_list = self.group.create_vertex_list(self.batch)
 
+        # Tiled view shows up to MAX_TILES sources side by side
+        self.tiled = False
+        self.tile_grid = TileGrid(
+            min(len(self.animation.sources), MAX_TILES), self.animation.main_size
+        )
+        self.tile_group = TiledRenderGroup(self.animation, order=4)
+        self.tile_group.visible = False
+        self.tile_vertex_list = None
+        self.tile_labels: list[pyglet.text.Label] = []
+
+        # Arrows are only drawn over two-channel sources
+        self.arrows = False
+        self.arrow_group = FlowArrowsGroup(self.animation, order=5)
+        self.arrow_group.visible = False
+        self.arrow_vertex_list = None
+
+        # All colormaps are rows of a single lookup texture, shared by both render groups
+        self.colormap_texture = create_colormap_texture()
+        self.group.colormap_texture = self.colormap_texture
+        self.tile_group.colormap_texture = self.colormap_texture
+
+        # Uniforms are only written when their values change
+        self.uniforms = shaders.UniformCache(self.group.program)
+        self.tile_uniforms = shaders.UniformCache(self.tile_group.program)
+        self.arrow_uniforms = shaders.UniformCache(self.arrow_group.program)
+
         # Viewport state
         self.model = pyglet.math.Mat4()
+        self.model_state = None
         self.window_center = Vec3(width / 2, height / 2, 0)
         self.cursor_translation = Vec3(width / 2, height / 2, 0)
         self.translation = Vec3(width / 2, height / 2, 0)
@@ -185,20 +418,32 @@ class FrameView(EventDispatcher):
         # and may be inconsistend with other textures if they have different sizes.
 
         self.hovered_pixel = Vec2(0, 0)
+        # Mouse motion only marks the hovered pixel as stale, it's updated once per frame
+        self.hover_pending = False
+        self.start_time = time.monotonic()
+        # Held navigation keys pan or zoom on every frame, see `needs_continuous_redraw`
+        self.navigating = False
 
         self.register_event_type("on_source_change")
         self.register_event_type("on_pixel_hover")
+        self.register_event_type("on_channels_change")
+        self.register_event_type("on_view_mode_change")
+
+    def update_quad(self):
+        """Resize the quad after the size of the main source changed, e.g. in channel mosaics."""
+        self.vertex_list.position[:] = shaders.create_quad_from_size(
+            self.animation.main_size
+        )
 
     def crop_image_coordinates(self, invert_y=True):
         if self.crop_corners is None:
             return None
 
-        main_texture = self.animation.main_texture
-        texture = self.animation.active_texture
+        active_size = self.animation.active_size
 
         active_crop_corners = self.crop_corners.change_resolution(
-            from_size=Vec2(main_texture.width, main_texture.height),
-            to_size=Vec2(texture.width, texture.height),
+            from_size=self.animation.main_size,
+            to_size=active_size,
             round_pixels=True,
         )
         c1 = active_crop_corners.c1
@@ -211,7 +456,7 @@ class FrameView(EventDispatcher):
 
         if invert_y:
             # Both subtract from height and swap places to ensure that y2 is larger
-            y1, y2 = texture.height - y2, texture.height - y1
+            y1, y2 = active_size.y - y2, active_size.y - y1
 
         return CropCorners(Vec2(x1, y1), Vec2(x2, y2))
 
@@ -228,30 +473,23 @@ class FrameView(EventDispatcher):
             self.translation += Vec3(dx, dy, 0)
 
         if buttons & pyglet.window.mouse.RIGHT:
-            texture = self.animation.main_texture
-            offset = Vec2(texture.width / 2, texture.height / 2)
-            size = Vec2(texture.width, texture.height)
+            size = self.animation.main_size
 
             if self.crop_corners is None:
-                offset_c1 = ~self.model @ Vec4(x, y, 0.0, 1.0)
-                c1 = Vec2(offset_c1.x, offset_c1.y) + offset
+                c1 = self.window_to_image(x, y)
 
                 self.crop_corners = CropCorners()
                 self.crop_corners.c1 = Vec2(round(c1.x), round(c1.y)).clamp(
                     Vec2(0, 0), size
                 )
 
-            offset_c2 = ~self.model @ Vec4(x + dx, y + dy, 0.0, 1.0)
-            c2 = Vec2(offset_c2.x, offset_c2.y) + offset
+            c2 = self.window_to_image(x + dx, y + dy)
             self.crop_corners.c2 = Vec2(round(c2.x), round(c2.y)).clamp(
                 Vec2(0, 0), size
             )
 
             # Snap crop corners to active texture resolution
-            active_size = Vec2(
-                self.animation.active_texture.width,
-                self.animation.active_texture.height,
-            )
+            active_size = self.animation.active_size
             self.crop_corners = self.crop_corners.change_resolution(
                 from_size=size, to_size=active_size, round_pixels=True
             ).change_resolution(from_size=active_size, to_size=size, round_pixels=False)
@@ -262,25 +500,39 @@ class FrameView(EventDispatcher):
 
     def on_mouse_motion(self, x, y, dx, dy):
         self.cursor_translation = Vec3(x, y, 0)
+        self.request_hover_update()
+
+    def request_hover_update(self):
+        self.hover_pending = True
+
+    def update_hover(self):
+        """Update the hovered pixel if the cursor or the view changed since the last frame."""
+        if self.hover_pending:
+            self.hover_pending = False
+            self.update_hovered_pixel(
+                self.cursor_translation.x, self.cursor_translation.y
+            )
 
-        self.update_hovered_pixel(x, y)
+    def window_to_image(self, x, y) -> Vec2:
+        """
+        Convert window coordinates to image coordinates of the main source.
+        The origin is at the bottom-left corner of the image (of the nearest tile in tiled view).
+        """
+        v = ~self.model @ Vec4(x, y, 0.0, 1.0)
+        v = Vec2(v.x, v.y)
+        if self.tiled:
+            v -= self.tile_grid.center(self.tile_grid.nearest_slot(v))
+        return v + self.animation.main_size / 2
 
     def update_hovered_pixel(self, x, y):
         """
         Update hovered pixel based on mouse coordinates.
         This is used for displaying pixel values in the UI and for copying pixel data to clipboard.
         """
-        # TODO: this duplicates crop selection logic - to refactor
-        texture = self.animation.main_texture
-        size = Vec2(texture.width, texture.height)
-        offset = Vec2(texture.width / 2, texture.height / 2)
-        v = ~self.model @ Vec4(x, y, 0.0, 1.0)
-        v = Vec2(v.x, v.y) + offset
+        size = self.animation.main_size
+        v = self.window_to_image(x, y)
         if 0 <= v.x < size.x and 0 <= v.y < size.y:
-            active_size = Vec2(
-                self.animation.active_texture.width,
-                self.animation.active_texture.height,
-            )
+            active_size = self.animation.active_size
             v = change_coords_resolution(
                 coords=v,
                 from_size=size,
@@ -316,6 +568,8 @@ class FrameView(EventDispatcher):
                 self.animation.go_previous()
             if symbol == pyglet.window.key.E:
                 self.animation.go_end()
+            if symbol == pyglet.window.key.G:
+                self.toggle_arrows()
         if (
             pyglet.window.key.MOD_SHIFT & modifiers
             or pyglet.window.key.MOD_ALT & modifiers
@@ -327,16 +581,42 @@ class FrameView(EventDispatcher):
                 self.animation.next_source()
                 self.dispatch_event("on_source_change", self.animation.active_source)
 
-                self.update_hovered_pixel(
-                    self.cursor_translation.x, self.cursor_translation.y
-                )
+                self.request_hover_update()
             if symbol == pyglet.window.key.Z:
                 self.animation.previous_source()
                 self.dispatch_event("on_source_change", self.animation.active_source)
 
-                self.update_hovered_pixel(
-                    self.cursor_translation.x, self.cursor_translation.y
-                )
+                self.request_hover_update()
+            if symbol == pyglet.window.key.M:
+                self.animation.next_compare_mode()
+                self.dispatch_event("on_source_change", self.animation.active_source)
+            if symbol == pyglet.window.key.V:
+                self.animation.pin_reference_source()
+                self.dispatch_event("on_source_change", self.animation.active_source)
+            if symbol == pyglet.window.key.T:
+                self.toggle_tiled()
+            if (
+                symbol == pyglet.window.key.G
+                and not pyglet.window.key.MOD_CTRL & modifiers
+            ):
+                self.animation.next_view_mode()
+                self.dispatch_event("on_view_mode_change")
+            if symbol == pyglet.window.key.Y:
+                self.animation.next_yuv_matrix()
+                self.dispatch_event("on_channels_change", self.animation.active_source)
+            if symbol == pyglet.window.key.COMMA:
+                self.animation.shift_channels(-1)
+                self.dispatch_event("on_channels_change", self.animation.active_source)
+            if symbol == pyglet.window.key.PERIOD:
+                self.animation.shift_channels(1)
+                self.dispatch_event("on_channels_change", self.animation.active_source)
+            if symbol == pyglet.window.key.APOSTROPHE:
+                self.animation.next_channel_count()
+                self.dispatch_event("on_channels_change", self.animation.active_source)
+            if symbol == pyglet.window.key.SEMICOLON:
+                self.animation.toggle_channel_mosaic()
+                self.update_quad()
+                self.dispatch_event("on_channels_change", self.animation.active_source)
 
         number = KEY_TO_NUMBER.get(symbol, None)
         if number is not None:
@@ -352,14 +632,30 @@ class FrameView(EventDispatcher):
             index = number - 1  # convert to zero-based index
             self.animation.active_source = index
             self.dispatch_event("on_source_change", self.animation.active_source)
-            self.update_hovered_pixel(
-                self.cursor_translation.x, self.cursor_translation.y
-            )
+            self.request_hover_update()
 
         if symbol == pyglet.window.key.SPACE:
             self.animation.toggle()
 
+    @property
+    def needs_continuous_redraw(self) -> bool:
+        """Whether the view changes without any input, e.g. while panning with held keys."""
+        return self.navigating or (
+            not self.tiled and self.animation.compare_mode == CompareMode.FLICKER
+        )
+
     def handle_keys(self, keys: pyglet.window.key.KeyStateHandler):
+        navigation_keys = (
+            pyglet.window.key.W,
+            pyglet.window.key.S,
+            pyglet.window.key.A,
+            pyglet.window.key.D,
+            pyglet.window.key.R,
+            pyglet.window.key.F,
+        )
+        self.navigating = not keys.data.get(pyglet.window.key.LCTRL) and any(
+            keys.data.get(key) for key in navigation_keys
+        )
         if not keys.data.get(pyglet.window.key.LCTRL):
             if keys.data.get(pyglet.window.key.W):
                 self.translation += Vec3(0, -self.scroll_speed, 0)
@@ -380,27 +676,259 @@ class FrameView(EventDispatcher):
                     self.translation - self.cursor_translation
                 ) * scale_factor + self.cursor_translation
 
-        if keys.data.get(pyglet.window.key.LCTRL):
-            if keys.data.get(pyglet.window.key.R):
-                self.zoom_level.reset()
-                self.translation = Vec3(self.width / 2, self.height / 2, 0)
+        if keys.data.get(pyglet.window.key.LCTRL) and keys.data.get(
+            pyglet.window.key.R
+        ):
+            self.zoom_level.reset()
+            self.translation = Vec3(self.width / 2, self.height / 2, 0)
 
         scale = self.zoom_level.scale()
-        self.model = Mat4().translate(self.translation).scale(Vec3(scale, scale, 1.0))
-        self.group.program["model"] = self.model
+        if (self.translation, scale) != self.model_state:
+            self.model = (
+                Mat4().translate(self.translation).scale(Vec3(scale, scale, 1.0))
+            )
+            self.model_state = (self.translation, scale)
+            # A different pixel may be under the cursor now
+            self.request_hover_update()
+
+        self.arrow_group.visible = (
+            self.arrows
+            and not self.tiled
+            and self.animation.channel_count(self.animation.active_source) == 2
+            and not self.animation.is_complex(self.animation.active_source)
+        )
+        if self.arrow_group.visible:
+            self.update_arrows()
 
-        crop = self.crop_corners or CropCorners()
-        texture = self.animation.main_texture
-        offset = Vec2(
-            texture.width / 2,
-            texture.height / 2,
+        if self.tiled:
+            self.update_tiles()
+            self.set_common_uniforms(self.tile_uniforms)
+            return
+
+        self.set_common_uniforms(self.uniforms)
+        self.uniforms["value_scale"] = self.animation.value_scale(
+            self.animation.active_source
+        )
+        self.uniforms["reference_value_scale"] = self.animation.value_scale(
+            self.animation.reference_source
+        )
+        self.uniforms["channel_count"] = self.animation.channel_count(
+            self.animation.active_source
+        )
+        self.uniforms["reference_channel_count"] = self.animation.channel_count(
+            self.animation.reference_source
+        )
+        self.uniforms["is_complex"] = self.animation.is_complex(
+            self.animation.active_source
+        )
+        self.uniforms["reference_is_complex"] = self.animation.is_complex(
+            self.animation.reference_source
+        )
+        self.uniforms["yuv_layout"] = self.animation.yuv_layout(
+            self.animation.active_source
+        )
+        self.uniforms["reference_yuv_layout"] = self.animation.yuv_layout(
+            self.animation.reference_source
+        )
+        self.uniforms["yuv_coefficients"] = self.animation.yuv_coefficients(
+            self.animation.active_source
+        )
+        self.uniforms["reference_yuv_coefficients"] = self.animation.yuv_coefficients(
+            self.animation.reference_source
+        )
+        self.uniforms["value_range"] = self.value_range(self.animation.active_source)
+        self.uniforms["reference_value_range"] = self.value_range(
+            self.animation.reference_source
         )
+        self.uniforms["compare_mode"] = int(self.animation.compare_mode)
+        self.uniforms["compare_gain"] = self.animation.compare_gain
+        self.uniforms["flicker_period"] = self.animation.flicker_period
+        if self.animation.compare_mode == CompareMode.FLICKER:
+            self.uniforms["time"] = time.monotonic() - self.start_time
+        # Wipe splits the image at the cursor position
+        wipe = ~self.model @ Vec4(
+            self.cursor_translation.x, self.cursor_translation.y, 0.0, 1.0
+        )
+        self.uniforms["wipe_x"] = wipe.x
+
+    def set_common_uniforms(self, program: shaders.UniformCache):
+        program["model"] = self.model
+
+        crop = self.crop_corners or CropCorners()
+        offset = self.animation.main_size / 2
         c1 = crop.c1 - offset
         c2 = crop.c2 - offset
         x1 = c1.x
         y1 = c1.y
         x2 = c2.x
         y2 = c2.y
-        self.group.program["crop_corners"] = Vec4(x1, y1, x2, y2)
-        self.group.program["exposure"] = self.animation.exposure
-        self.group.program["gamma"] = self.animation.gamma
+        program["crop_corners"] = Vec4(x1, y1, x2, y2)
+        program["exposure"] = self.animation.exposure
+        program["gamma"] = self.animation.gamma
+        program["colormap"] = COLORMAPS.index(self.animation.colormap)
+        program["colormap_count"] = len(COLORMAPS)
+        program["colormap_diverging"] = self.animation.colormap == "diverging"
+        program["flow_view"] = FLOW_VIEWS.index(self.animation.flow_view)
+        program["complex_view"] = COMPLEX_VIEWS.index(self.animation.complex_view)
+
+    def value_range(self, source_index: int) -> Vec2:
+        # Ranges are only reduced for sources that are actually colormapped
+        if not self.animation.uses_value_range(source_index):
+            return Vec2(0.0, 1.0)
+        return Vec2(*self.animation.value_range(source_index))
+
+    def toggle_arrows(self):
+        self.arrows = not self.arrows
+        if self.arrows and self.arrow_vertex_list is None:
+            self.arrow_vertex_list = self.arrow_group.create_vertex_list(self.batch)
+
+    def update_arrows(self):
+        """Lay out the arrows on a grid covering only the visible part of the main source."""
+        size = self.animation.main_size
+        # Window corners in model coordinates, clipped to the image
+        corner1 = ~self.model @ Vec4(0.0, 0.0, 0.0, 1.0)
+        corner2 = ~self.model @ Vec4(self.width, self.height, 0.0, 1.0)
+        x0 = max(min(corner1.x, corner2.x), -size.x / 2)
+        x1 = min(max(corner1.x, corner2.x), size.x / 2)
+        y0 = max(min(corner1.y, corner2.y), -size.y / 2)
+        y1 = min(max(corner1.y, corner2.y), size.y / 2)
+
+        # At most one arrow per pixel. The grid is anchored at the image corner,
+        # so arrows stay at the same pixels while panning.
+        step = max(ARROW_SPACING / self.zoom_level.scale(), 1.0)
+        while True:
+            first_x = -size.x / 2 + step * (math.floor((x0 + size.x / 2) / step) + 0.5)
+            first_y = -size.y / 2 + step * (math.floor((y0 + size.y / 2) / step) + 0.5)
+            columns = max(0, math.ceil((x1 - first_x) / step))
+            rows = max(0, math.ceil((y1 - first_y) / step))
+            if columns * rows <= MAX_ARROWS:
+                break
+            step *= 1.25
+
+        max_magnitude = self.animation.value_range(self.animation.active_source)[1]
+        program = self.arrow_uniforms
+        program["model"] = self.model
+        program["image_size"] = size
+        program["grid_origin"] = Vec2(first_x, first_y)
+        program["grid_step"] = Vec2(step, step)
+        program["grid_columns"] = max(columns, 1)
+        program["grid_count"] = columns * rows
+        # The longest arrows span a whole grid cell (at exposure 1)
+        program["arrow_scale"] = step * self.animation.exposure / max_magnitude
+        program["value_scale"] = self.animation.value_scale(
+            self.animation.active_source
+        )
+        program["arrow_color"] = Vec4(0.05, 0.05, 0.05, 0.85)
+
+    def toggle_tiled(self):
+        self.tiled = not self.tiled
+        if self.tiled and self.tile_vertex_list is None:
+            self.tile_vertex_list = self.tile_group.create_vertex_list(
+                self.batch, self.tile_grid
+            )
+            label_group = pyglet.graphics.Group(order=5)
+            self.tile_labels = [
+                pyglet.text.Label(
+                    "",
+                    font_size=12,
+                    font_name="Lucida Console",
+                    batch=self.batch,
+                    group=label_group,
+                )
+                for _ in range(self.tile_grid.num_tiles)
+            ]
+
+        self.group.visible = not self.tiled
+        self.tile_group.visible = self.tiled
+        for label in self.tile_labels:
+            label.visible = self.tiled
+
+        if self.tiled:
+            self.fit_tiles()
+        self.request_hover_update()
+
+    def fit_tiles(self):
+        """Zoom out, so that the whole tile grid fits the window."""
+        grid = self.tile_grid
+        grid_width = grid.columns * grid.pitch.x
+        grid_height = grid.rows * grid.pitch.y
+        scale = min(self.width / grid_width, self.height / grid_height)
+        self.zoom_level.reset()
+        self.zoom_level.zoom_out(-math.log2(scale))
+        self.translation = Vec3(self.width / 2, self.height / 2, 0)
+
+    def update_tiles(self):
+        """Assign sources to tiles and find the tiles that intersect the window."""
+        grid = self.tile_grid
+        first_source = (self.animation.active_source // MAX_TILES) * MAX_TILES
+        num_sources = len(self.animation.sources)
+        tile_sources = list(
+            range(first_source, min(first_source + MAX_TILES, num_sources))
+        )
+
+        half_size = grid.tile_size / 2
+        visible_slots = []
+        for slot, label in enumerate(self.tile_labels):
+            center = grid.center(slot)
+            bottom_left = self.model @ Vec4(
+                center.x - half_size.x, center.y - half_size.y, 0.0, 1.0
+            )
+            top_right = self.model @ Vec4(
+                center.x + half_size.x, center.y + half_size.y, 0.0, 1.0
+            )
+            is_visible = (
+                slot < len(tile_sources)
+                and bottom_left.x < self.width
+                and bottom_left.y < self.height
+                and top_right.x > 0
+                and top_right.y > 0
+            )
+            if label.visible != is_visible:
+                label.visible = is_visible
+            if not is_visible:
+                continue
+            visible_slots.append(slot)
+
+            source_index = tile_sources[slot]
+            text = f"{source_index + 1}. {self.animation.names[source_index]}"
+            if label.text != text:
+                label.text = text
+            color = (
+                (20, 200, 50, 255)
+                if source_index == self.animation.active_source
+                else (200, 200, 200, 200)
+            )
+            if label.color != color:
+                label.color = color
+            position = (bottom_left.x, top_right.y + 4, 0)
+            if label.position != position:
+                label.position = position
+
+        self.tile_group.tile_sources = tile_sources
+        self.tile_group.visible_slots = visible_slots
+        self.tile_uniforms["tile_count"] = len(tile_sources)
+        value_scales = [self.animation.value_scale(i) for i in tile_sources]
+        self.tile_uniforms["tile_value_scales"] = value_scales + [1.0] * (
+            MAX_TILES - len(value_scales)
+        )
+        channel_counts = [self.animation.channel_count(i) for i in tile_sources]
+        self.tile_uniforms["tile_channel_counts"] = channel_counts + [4] * (
+            MAX_TILES - len(channel_counts)
+        )
+        is_complex = [int(self.animation.is_complex(i)) for i in tile_sources]
+        self.tile_uniforms["tile_is_complex"] = is_complex + [0] * (
+            MAX_TILES - len(is_complex)
+        )
+        yuv_layouts = [self.animation.yuv_layout(i) for i in tile_sources]
+        self.tile_uniforms["tile_yuv_layouts"] = yuv_layouts + [0] * (
+            MAX_TILES - len(yuv_layouts)
+        )
+        yuv_coefficients = [self.animation.yuv_coefficients(i) for i in tile_sources]
+        self.tile_uniforms["tile_yuv_coefficients"] = yuv_coefficients + [
+            Vec2(0.0, 0.0)
+        ] * (MAX_TILES - len(yuv_coefficients))
+        value_ranges = [self.value_range(i) for i in tile_sources]
+        self.tile_uniforms["tile_value_ranges"] = value_ranges + [Vec2(0.0, 1.0)] * (
+            MAX_TILES - len(value_ranges)
+        )
+        self.tile_uniforms["tile_size"] = grid.tile_size
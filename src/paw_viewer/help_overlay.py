@@ -48,8 +48,11 @@ HELP_HTML = (
             ("CTRL+A / CTRL+D", "Go to prev/next frame"),
             ("CTRL+S / CTRL+E", "Go to start/end frame"),
             ("Left-click+drag on slider", "Select frame"),
+            ("Hover over slider", "Preview frame thumbnail"),
+            ("CTRL+F", "Toggle thumbnail filmstrip above the slider"),
             ("B", "Toggle forward/backward playback"),
             ("Shift+B", "Toggle back-and-forth playback"),
+            ("L", "Toggle following the latest frame of live sources"),
         ],
     )
     + format_section(
@@ -65,6 +68,31 @@ HELP_HTML = (
             ("1, 2..", "Go to n-th source (0 picks 10th)"),
             ("SHIFT + 1, 2..", "Go to (n+10)-th source"),
             ("CTRL+SHIFT + 1, 2..", "Go to (n+20)-th source"),
+            ("T", "Toggle tiled view of up to 15 sources"),
+            (", / .", "Prev/next channels of arrays with more than 4 channels"),
+            ("'", "Show 1, 2 or 3 channels of arrays with more than 4 channels"),
+            (";", "Toggle mosaic of all channels"),
+            (
+                "G",
+                "Cycle colormap of single-channel sources (gray, viridis, turbo, diverging)",
+            ),
+            (
+                "G (on 2-channel sources)",
+                "Cycle flow view (color wheel, magnitude, angle)",
+            ),
+            (
+                "G (on complex sources)",
+                "Cycle magnitude, log-magnitude, phase, real, imaginary",
+            ),
+            ("CTRL+G", "Toggle flow arrows over 2-channel sources"),
+            ("Y", "Switch YUV sources between BT.601 and BT.709"),
+        ],
+    )
+    + format_section(
+        "Compare",
+        [
+            ("M", "Cycle comparison mode (|A-B|, A-B, wipe, flicker)"),
+            ("V", "Use active source as comparison reference"),
         ],
     )
     + format_section(
@@ -1,34 +1,164 @@
 import json
-from pathlib import Path
 import logging
+import os
+import re
+import struct
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
 
 import numpy as np
 
 
-def load_video(video_path):
+def read_video_frames(cap, region=None):
+    """
+    Decode the frames of a video, or only those of a `LoadRegion`, seeking to its start.
+    Skipped frames are grabbed without being converted.
+    """
     import cv2
 
-    cap = cv2.VideoCapture(video_path)
-    frames = []
-
-    while True:
+    t = 0
+    if region is not None and region.start > 0:
+        cap.set(cv2.CAP_PROP_POS_FRAMES, region.start)
+        t = region.start
+    while region is None or region.end is None or t < region.end:
+        if region is not None and (t - region.start) % region.stride != 0:
+            if not cap.grab():
+                break
+            t += 1
+            continue
         ret, frame = cap.read()
         if not ret:
             break
         frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        frames.append(frame)
+        yield crop_frame(frame, region) if region is not None else frame
+        t += 1
+
+
+# Worker threads compressing frames while loading, which later decode them during playback
+COMPRESS_WORKERS = 4
+
+
+def load_video(video_path, compress: str | None = None, region=None):
+    """
+    Load all frames of a video (or only a `LoadRegion` of it).
+    With `compress` ("zlib" or "jpeg"), frames are compressed on worker threads as they are
+    decoded into a `CompressedFrameStore`, so the decoded video never has to fit in RAM.
+    """
+    import cv2
+
+    cap = cv2.VideoCapture(str(video_path))
+    if compress is not None:
+        from paw_viewer.sources import CompressedFrameStore
+
+        frames = CompressedFrameStore.from_frames(
+            read_video_frames(cap, region),
+            codec=compress,
+            keyframe_interval=8,
+            num_workers=COMPRESS_WORKERS,
+        )
+        logging.info(
+            f"Compressed {len(frames)} frames to {frames.num_bytes / 1024**2:.1f}MiB"
+        )
+    else:
+        frames = np.array(list(read_video_frames(cap, region)))
 
     fps = cap.get(cv2.CAP_PROP_FPS)
     cap.release()
-    return np.array(frames), fps
+    return frames, fps
 
 
 def load_image(image_path):
+    """Load an image without changing its bit depth, e.g. 16-bit PNG/TIFF files stay uint16."""
     import cv2
 
-    image = cv2.imread(str(image_path))
-    image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-    return image
+    image = cv2.imread(str(image_path), cv2.IMREAD_UNCHANGED)
+    if image is None:
+        raise ValueError(f"Failed to load image {image_path}")
+    if image.ndim == 2:
+        return image
+    if image.shape[-1] == 4:
+        return cv2.cvtColor(image, cv2.COLOR_BGRA2RGBA)
+    return cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+
+
+def load_reduced_image(
+    image_path, factor: int, grayscale: bool = False
+) -> np.ndarray | None:
+    """
+    Decode an image at 1/factor of its resolution, which is much faster for JPEG files.
+    Returns None if OpenCV can't do that for the given file and factor.
+    """
+    import cv2
+
+    if grayscale:
+        flags = {
+            2: cv2.IMREAD_REDUCED_GRAYSCALE_2,
+            4: cv2.IMREAD_REDUCED_GRAYSCALE_4,
+            8: cv2.IMREAD_REDUCED_GRAYSCALE_8,
+        }.get(factor)
+    else:
+        flags = {
+            2: cv2.IMREAD_REDUCED_COLOR_2,
+            4: cv2.IMREAD_REDUCED_COLOR_4,
+            8: cv2.IMREAD_REDUCED_COLOR_8,
+        }.get(factor)
+    if flags is None or Path(image_path).suffix.lower() == ".exr":
+        return None
+    image = cv2.imread(str(image_path), flags)
+    if image is None:
+        return None
+    if grayscale:
+        return image
+    return cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+
+
+def resize_frame(frame: np.ndarray, scale: float) -> np.ndarray:
+    """Scale a `[H, W, ...]` frame, averaging pixels when downscaling."""
+    import cv2
+
+    if np.iscomplexobj(frame):
+        return resize_frame(frame.real, scale) + 1j * resize_frame(frame.imag, scale)
+    if frame.dtype not in (np.uint8, np.uint16, np.int16, np.float32, np.float64):
+        # e.g. float16, which OpenCV can't resize
+        return resize_frame(frame.astype(np.float32), scale).astype(frame.dtype)
+    interpolation = cv2.INTER_AREA if scale < 1 else cv2.INTER_NEAREST
+    resized = cv2.resize(frame, None, fx=scale, fy=scale, interpolation=interpolation)
+    # OpenCV drops single-channel axes
+    return resized.reshape(*resized.shape[:2], *frame.shape[2:])
+
+
+def crop_frame(frame: np.ndarray, region) -> np.ndarray:
+    """Cut the pixels of a `LoadRegion` out of a `[H, W, ...]` frame and scale them."""
+    frame = frame[region.spatial_slices()]
+    if region.scale != 1:
+        frame = resize_frame(frame, region.scale)
+    return np.ascontiguousarray(frame)
+
+
+def load_image_region(image_path, region) -> np.ndarray:
+    """
+    Load the pixels of a `LoadRegion` of an image.
+    JPEG files are decoded directly at 1/2, 1/4 or 1/8 of their resolution if the scale allows it.
+    """
+    from dataclasses import replace
+
+    factor = round(1 / region.scale)
+    if (
+        Path(image_path).suffix.lower() in (".jpg", ".jpeg")
+        and factor in (2, 4, 8)
+        and factor * region.scale == 1
+    ):
+        image = load_reduced_image(image_path, factor)
+        if image is not None:
+            reduced = replace(
+                region,
+                x=tuple(x // factor for x in region.x) if region.x else None,
+                y=tuple(y // factor for y in region.y) if region.y else None,
+                scale=1.0,
+            )
+            return crop_frame(image, reduced)
+    return crop_frame(load_image(image_path), region)
 
 
 def same_exr_windows(exr_header) -> bool:
@@ -77,68 +207,371 @@ def load_exr(path: str | Path) -> dict:
     return images
 
 
+TIFF_SUFFIXES = (".tif", ".tiff")
+
+# Tags needed to read uncompressed pages directly
+TIFF_IMAGE_WIDTH = 256
+TIFF_IMAGE_LENGTH = 257
+TIFF_BITS_PER_SAMPLE = 258
+TIFF_COMPRESSION = 259
+TIFF_PHOTOMETRIC = 262
+TIFF_STRIP_OFFSETS = 273
+TIFF_SAMPLES_PER_PIXEL = 277
+TIFF_STRIP_BYTE_COUNTS = 279
+TIFF_PLANAR_CONFIGURATION = 284
+TIFF_TILE_WIDTH = 322
+TIFF_SAMPLE_FORMAT = 339
+
+# Integer field types (SHORT, LONG, LONG8) and their struct formats
+TIFF_INTEGER_TYPES = {3: "H", 4: "I", 16: "Q"}
+TIFF_SAMPLE_KINDS = {1: "u", 2: "i", 3: "f"}
+
+
+def tiff_page_offsets(
+    buffer, max_pages: int | None = None
+) -> tuple[str, bool, list[int]]:
+    """
+    Walk the chain of image file directories of a (Big)TIFF file in `buffer`, e.g. a memory map,
+    returning its byte order, whether it's a BigTIFF, and the offset of every page's directory.
+    Only the directory headers are read, so this is fast even for stacks with thousands of pages.
+    """
+    byte_order = {b"II": "<", b"MM": ">"}.get(bytes(buffer[:2]))
+    if byte_order is None:
+        raise ValueError("Not a TIFF file")
+    (magic,) = struct.unpack_from(byte_order + "H", buffer, 2)
+    if magic not in (42, 43):
+        raise ValueError("Not a TIFF file")
+    bigtiff = magic == 43
+    count_format, entry_size, offset_format = (
+        ("Q", 20, "Q") if bigtiff else ("H", 12, "I")
+    )
+    (offset,) = struct.unpack_from(
+        byte_order + offset_format, buffer, 8 if bigtiff else 4
+    )
+
+    offsets = []
+    seen = set()
+    while offset and offset not in seen and offset < len(buffer):
+        if max_pages is not None and len(offsets) == max_pages:
+            break
+        seen.add(offset)
+        offsets.append(offset)
+        (count,) = struct.unpack_from(byte_order + count_format, buffer, offset)
+        next_offset = offset + struct.calcsize(count_format) + count * entry_size
+        (offset,) = struct.unpack_from(byte_order + offset_format, buffer, next_offset)
+    return byte_order, bigtiff, offsets
+
+
+def read_tiff_tags(
+    buffer, byte_order: str, bigtiff: bool, offset: int
+) -> dict[int, list[int]]:
+    """Read the integer tags of the image file directory at `offset`."""
+    count_format, entry_format, inline_size = (
+        ("Q", "HHQ", 8) if bigtiff else ("H", "HHI", 4)
+    )
+    (count,) = struct.unpack_from(byte_order + count_format, buffer, offset)
+    entry_offset = offset + struct.calcsize(count_format)
+    entry_size = struct.calcsize(byte_order + entry_format) + inline_size
+    tags = {}
+    for i in range(count):
+        entry = entry_offset + i * entry_size
+        tag, field_type, value_count = struct.unpack_from(
+            byte_order + entry_format, buffer, entry
+        )
+        value_format = TIFF_INTEGER_TYPES.get(field_type)
+        if value_format is None:
+            continue
+        value_format = f"{byte_order}{value_count}{value_format}"
+        value_offset = entry + entry_size - inline_size
+        if struct.calcsize(value_format) > inline_size:
+            (value_offset,) = struct.unpack_from(
+                byte_order + ("Q" if bigtiff else "I"), buffer, value_offset
+            )
+        tags[tag] = list(struct.unpack_from(value_format, buffer, value_offset))
+    return tags
+
+
+def read_uncompressed_tiff_page(
+    buffer, byte_order: str, tags: dict[int, list[int]], step: int = 1
+) -> np.ndarray | None:
+    """
+    Get every `step`-th row and column of a page stored as a single run of uncompressed
+    samples as a view of `buffer` (a copy for big-endian files).
+    Returns None for pages which have to be decoded.
+    """
+    samples_per_pixel = tags.get(TIFF_SAMPLES_PER_PIXEL, [1])[0]
+    bits = set(tags.get(TIFF_BITS_PER_SAMPLE, [1]))
+    kind = TIFF_SAMPLE_KINDS.get(tags.get(TIFF_SAMPLE_FORMAT, [1])[0])
+    if (
+        tags.get(TIFF_COMPRESSION, [1])[0] != 1
+        or tags.get(TIFF_PHOTOMETRIC, [1])[0] not in (1, 2)
+        or (samples_per_pixel > 1 and tags.get(TIFF_PLANAR_CONFIGURATION, [1])[0] != 1)
+        or TIFF_TILE_WIDTH in tags
+        or len(bits) != 1
+        or next(iter(bits)) not in (8, 16, 32, 64)
+        or kind is None
+    ):
+        return None
+
+    dtype = np.dtype(f"{byte_order}{kind}{next(iter(bits)) // 8}")
+    height = tags[TIFF_IMAGE_LENGTH][0]
+    width = tags[TIFF_IMAGE_WIDTH][0]
+    strip_offsets = tags[TIFF_STRIP_OFFSETS]
+    strip_byte_counts = tags[TIFF_STRIP_BYTE_COUNTS]
+    contiguous = all(
+        offset + count == next_offset
+        for offset, count, next_offset in zip(
+            strip_offsets, strip_byte_counts, strip_offsets[1:]
+        )
+    )
+    num_bytes = height * width * samples_per_pixel * dtype.itemsize
+    if not contiguous or sum(strip_byte_counts) < num_bytes:
+        return None
+
+    start = strip_offsets[0]
+    page = np.frombuffer(buffer, dtype, height * width * samples_per_pixel, start)
+    page = page.reshape(height, width, samples_per_pixel)[::step, ::step]
+    return page.astype(dtype.newbyteorder("=")) if not dtype.isnative else page
+
+
+def is_multipage_tiff(path: str | Path) -> bool:
+    """Check if a TIFF file has more than one page, reading only its first directory."""
+    try:
+        data = np.memmap(path, dtype=np.uint8, mode="r")
+        return len(tiff_page_offsets(data, max_pages=2)[2]) > 1
+    except (ValueError, struct.error):
+        return False
+
+
+def load_tiff_page(path: str | Path, page: int) -> np.ndarray:
+    """Decode a single page of a multi-page TIFF file, without changing its bit depth."""
+    import cv2
+
+    ok, images = cv2.imreadmulti(
+        str(path), start=page, count=1, flags=cv2.IMREAD_UNCHANGED
+    )
+    if not ok or len(images) == 0:
+        raise ValueError(f"Failed to load page {page} of {path}")
+    image = images[0]
+    if image.ndim == 2:
+        return image
+    if image.shape[-1] == 4:
+        return cv2.cvtColor(image, cv2.COLOR_BGRA2RGBA)
+    return cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+
+
+IMAGE_SUFFIXES = (".png", ".jpg", ".jpeg", ".bmp", ".tif", ".tiff", ".exr")
+
+
+def load_frame_file(path: str | Path) -> np.ndarray:
+    """Load a single frame of an image sequence (the first view of EXR files)."""
+    path = Path(path)
+    if path.suffix.lower() == ".exr":
+        return next(iter(load_exr(path).values()))
+    return load_image(path)
+
+
+def decode_frame_files(paths: list[str | Path], num_workers: int = COMPRESS_WORKERS):
+    """
+    Decode the frames of an image sequence in order on worker threads, without alpha,
+    at most `2 * num_workers` frames ahead of the consumer.
+    """
+
+    def decode(path):
+        return np.ascontiguousarray(
+            auto_adjust_array(load_frame_file(path), add_alpha=False)[0]
+        )
+
+    with ThreadPoolExecutor(
+        max_workers=num_workers, thread_name_prefix="paw-load"
+    ) as executor:
+        pending = deque()
+        for path in paths:
+            pending.append(executor.submit(decode, path))
+            if len(pending) >= 2 * num_workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+FRAME_NUMBER_PATTERN = re.compile(r"\d+")
+
+
+def find_frame_number(text: str, end: int | None = None) -> re.Match | None:
+    """Find the longest sequence of digits (the last one of equally long ones)."""
+    matches = list(
+        FRAME_NUMBER_PATTERN.finditer(text, 0, len(text) if end is None else end)
+    )
+    if not matches:
+        return None
+    return max(reversed(matches), key=lambda match: len(match.group()))
+
+
 def parse_frame_number(filename: str) -> int | None:
     """Extract the longest sequence of digits from the filename"""
-    import re
+    match = find_frame_number(filename)
+    return None if match is None else int(match.group())
 
-    matches = re.findall(r"\d+", filename)
-    if not matches:
+
+def split_frame_number(name: str) -> tuple[str, int, str] | None:
+    """
+    Split a file name into the text before the frame number, the frame number (see
+    `find_frame_number`) and the text after it, including the extension.
+
+    e.g. "shot12_0001.png" is frame 1 of "shot12_#.png", and "frame0001_v2.png" is frame 1
+    of "frame#_v2.png".
+    """
+    dot = name.rfind(".")
+    match = find_frame_number(name, dot if dot >= 0 else None)
+    if match is None:
         return None
-    return int(max(matches, key=len))
+    return name[: match.start()], int(match.group()), name[match.end() :]
 
 
-def load_directory(dir_path: str | Path) -> dict:
+def scan_sequences(dir_path: str | Path) -> dict[str, list[str]]:
     """
-    Load frames from a directory.
-    The numbers in the filenames will be sorted in natural order,
-    so that "frame2.png" comes before "frame10.png".
-    We accept an arbitrary text prefix and suffix, as long as there is a number in the filename.
+    Group the image files of a directory into frame sequences.
+
+    Files are grouped by the text around the frame number (see `split_frame_number`),
+    so "beauty_0001.exr" and "depth_0001.exr" end up in separate sequences named
+    "beauty_#.exr" and "depth_#.exr". A single sequence is returned under the "" name.
+    The numbers are sorted in natural order, so that "frame2.png" comes before "frame10.png".
+
+    We only use `os.scandir`, which provides file types without extra `stat` calls,
+    and return plain string paths, so scanning is fast even for directories
+    with hundreds of thousands of files.
     """
     dir_path = Path(dir_path)
-    paths = [
-        path
-        for path in dir_path.iterdir()
-        if path.is_file()
-        and path.suffix.lower() in (".png", ".jpg", ".jpeg", ".bmp", ".tiff", ".exr")
-    ]
-    if len(paths) == 0:
-        logging.warning(f"No image files found in directory {dir_path}.")
-        return {}
+    sequences: dict[tuple[str, str], dict[int, str]] = {}
+    duplicates: dict[tuple[str, str], int] = {}
+    unnumbered = []
+    with os.scandir(dir_path) as entries:
+        for entry in entries:
+            name = entry.name
+            dot = name.rfind(".")
+            if dot < 0 or name[dot:].lower() not in IMAGE_SUFFIXES:
+                continue
+            if not entry.is_file():
+                continue
+            parts = split_frame_number(name)
+            if parts is None:
+                unnumbered.append(entry.path)
+                continue
+            prefix, frame_number, suffix = parts
+            key = (prefix, suffix)
+            frames = sequences.setdefault(key, {})
+            if frame_number in frames:
+                # e.g. "frame1.png" and "frame01.png" - keep the first one in name order
+                duplicates[key] = duplicates.get(key, 0) + 1
+                frames[frame_number] = min(frames[frame_number], entry.path)
+            else:
+                frames[frame_number] = entry.path
 
-    paths_by_numbers = {
-        frame_number: path
-        for path in paths
-        if (frame_number := parse_frame_number(path.stem)) is not None
-    }
-    frame_numbers = sorted(paths_by_numbers)
-    if len(frame_numbers) == 0:
+    if len(sequences) == 0:
+        if len(unnumbered) == 0:
+            return {}
         logging.warning(
-            f"No files with frame numbers found in directory {dir_path}. Loading in arbitrary order."
+            f"No files with frame numbers found in directory {dir_path}. Loading in name order."
         )
-    else:
-        frame_max_diff = max(frame_numbers) - min(frame_numbers)
-        if frame_max_diff > len(frame_numbers):
+        return {"": sorted(unnumbered)}
+    if unnumbered:
+        logging.info(f"Skipping {len(unnumbered)} files without frame numbers")
+
+    result = {}
+    for (prefix, suffix), frames in sorted(sequences.items()):
+        sequence_name = f"{prefix}#{suffix}" if len(sequences) > 1 else ""
+        frame_numbers = sorted(frames)
+        missing = frame_numbers[-1] - frame_numbers[0] + 1 - len(frame_numbers)
+        if missing > 0:
+            logging.warning(
+                f"Sequence {prefix}#{suffix} is missing {missing} frames"
+                f" between {frame_numbers[0]} and {frame_numbers[-1]}."
+                " Check if the files are named correctly."
+            )
+        if (prefix, suffix) in duplicates:
             logging.warning(
-                f"There are gaps between frame numbers in directory {dir_path}. Check if the files are named correctly."
+                f"Sequence {prefix}#{suffix} has {duplicates[(prefix, suffix)]} files"
+                " with duplicated frame numbers. Using the first ones in name order."
             )
-        paths = [paths_by_numbers[n] for n in frame_numbers]
+        result[sequence_name] = [frames[n] for n in frame_numbers]
+    return result
 
-    images = np.stack(
-        [
-            next(iter(load_exr(path).values())) if path.suffix.lower() == ".exr" else load_image(path)
-            for path in paths
-        ]
+
+def load_directory(
+    dir_path: str | Path, precision: str = "native", compress: str | None = None
+) -> dict:
+    """
+    Load frame sequences from a directory (see `scan_sequences`).
+    Frames are decoded lazily, when they are displayed for the first time.
+    With `compress`, sequences are instead decoded on worker threads and compressed
+    as they are decoded (see `load_compressed_sequence`).
+    """
+    from paw_viewer.sources import ImageSequenceSource
+
+    sequences = scan_sequences(dir_path)
+    if len(sequences) == 0:
+        logging.warning(f"No image files found in directory {dir_path}.")
+        return {}
+    from paw_viewer.sources import TiffStackSource
+
+    sources = {}
+    for name, paths in sequences.items():
+        if (
+            len(paths) == 1
+            and Path(paths[0]).suffix.lower() in TIFF_SUFFIXES
+            and is_multipage_tiff(paths[0])
+        ):
+            # A single multi-page TIFF file is a whole video, e.g. a microscopy stack
+            sources[name] = TiffStackSource(paths[0], precision=precision)
+            continue
+        compressed = (
+            load_compressed_sequence(paths, compress, precision)
+            if compress is not None
+            else None
+        )
+        sources[name] = (
+            compressed
+            if compressed is not None
+            else ImageSequenceSource(paths, precision=precision)
+        )
+    return sources
+
+
+def load_compressed_sequence(paths: list[str], codec: str, precision: str = "native"):
+    """
+    Decode an image sequence into a `CompressedFrameStore`, compressing frames as they
+    are decoded. Returns None for frames the codec can't store (e.g. float frames with jpeg),
+    and for float frames with a reduced precision, which are kept decoded lazily.
+    """
+    from paw_viewer.sources import CompressedFrameStore
+
+    first_frame = auto_adjust_array(load_frame_file(paths[0]), add_alpha=False)[0]
+    if precision != "native" and np.issubdtype(first_frame.dtype, np.floating):
+        return None
+    try:
+        CompressedFrameStore.check_frames(first_frame.shape, first_frame.dtype, codec)
+    except ValueError as e:
+        logging.warning(f"Not compressing {paths[0]} and following frames: {e}")
+        return None
+    frames = CompressedFrameStore.from_frames(
+        decode_frame_files(paths), codec=codec, num_workers=COMPRESS_WORKERS
     )
-    return {"": images}
+    logging.info(
+        f"Compressed {len(frames)} frames to {frames.num_bytes / 1024**2:.1f}MiB"
+    )
+    return frames
 
 
-def auto_adjust_array(data: np.ndarray) -> np.ndarray:
+def auto_adjust_array(data: np.ndarray, add_alpha: bool = True) -> np.ndarray:
     """
     Automatically:
         - permute array to THWC format
-        - repeat RGB values for grayscale images
-        - pad with 0s for 2-channel images
-        - add alpha channel if there are less than 4 channels
+        - add alpha channel to RGB images (with `add_alpha`, see `add_alpha_channel`)
+
+    Single-channel images are kept as they are, to be shown through a colormap,
+    and 2-channel images are kept as flow fields. Memory-mapped RGB arrays are kept
+    without alpha (and uploaded as RGB textures), as adding it would copy the whole array.
+    Without alpha, the result is a view of `data`.
     """
     logging.debug(f"Auto-adjusting array with original shape {data.shape}")
     if data.ndim == 2:
@@ -163,50 +596,185 @@ def auto_adjust_array(data: np.ndarray) -> np.ndarray:
         )
         channel_axis = -1
     else:
-        channel_axis = 1 if data.shape[1] in (1, 3, 4) else -1
-
-    if data.shape[channel_axis] == 1:
-        data = data.repeat(3, axis=channel_axis)
-    elif data.shape[channel_axis] == 2:
-        # Pad to 3 channels with 0s
-        padding_shape = list(data.shape)
-        padding_shape[channel_axis] = 1
-        data = np.concatenate(
-            [
-                data,
-                np.zeros(
-                    padding_shape,
-                    dtype=data.dtype,
-                ),
-            ],
-            axis=channel_axis,
+        channel_axis = 1 if data.shape[1] in (1, 2, 3, 4) else -1
+
+    if channel_axis == 1:
+        # e.g. [T, 2, H, W] flow from PyTorch - a view, frames are made contiguous on upload
+        data = np.moveaxis(data, 1, -1)
+    if add_alpha and not isinstance(data, np.memmap):
+        data = add_alpha_channel(data)
+    return data
+
+
+def add_alpha_channel(frames: np.ndarray) -> np.ndarray:
+    """Add an opaque alpha channel to `[..., 3]` RGB frames. Other frames are returned as they are."""
+    if frames.shape[-1] != 3:
+        return frames
+    max_value = (
+        np.iinfo(frames.dtype).max if np.issubdtype(frames.dtype, np.integer) else 1.0
+    )
+    alpha = np.full((*frames.shape[:-1], 1), max_value, dtype=frames.dtype)
+    return np.concatenate([frames, alpha], axis=-1)
+
+
+def array_axes(shape: tuple[int, ...]) -> tuple[int | None, int, int, int | None]:
+    """
+    Get the time, row, column and channel axes of an array (None if it has no such axis),
+    following the same rules as `auto_adjust_array` and `is_channel_cube`.
+    """
+    if len(shape) == 2:
+        return None, 0, 1, None
+    if len(shape) == 3:
+        from paw_viewer.sources import is_channel_cube
+
+        is_frame = shape[-1] <= 4 or is_channel_cube(shape)
+        return (None, 0, 1, 2) if is_frame else (0, 1, 2, None)
+    largest_dims = sorted(shape[1:])[-2:]
+    if min(largest_dims) > 4 and shape[1] in (1, 2, 3, 4):
+        return 0, 2, 3, 1
+    return 0, 1, 2, 3
+
+
+def restrict_array(data: np.ndarray, region) -> np.ndarray:
+    """
+    Copy a `LoadRegion` out of an array in its original layout,
+    so only the region is read from memory-mapped files.
+    """
+    if data.ndim > 4:
+        logging.warning(
+            f"Loading whole array of shape {data.shape} - regions need up to 4 axes"
+        )
+        return data
+    time_axis, row_axis, column_axis, channel_axis = array_axes(data.shape)
+    index = [slice(None)] * data.ndim
+    index[row_axis], index[column_axis] = region.spatial_slices()
+    if time_axis is not None:
+        index[time_axis] = slice(region.start, region.end, region.stride)
+    data = np.ascontiguousarray(data[tuple(index)])
+    if region.scale == 1:
+        return data
+
+    frames = data if time_axis is not None else data[np.newaxis]
+    if channel_axis == 1:
+        frames = np.moveaxis(frames, 1, -1)
+    frames = np.stack([resize_frame(frame, region.scale) for frame in frames])
+    if channel_axis == 1:
+        frames = np.moveaxis(frames, -1, 1)
+    return np.ascontiguousarray(frames if time_axis is not None else frames[0])
+
+
+def find_source(sources: dict, name: str | None) -> tuple[str, np.ndarray]:
+    """
+    Get the name and the source called `name` from loaded sources.
+    None picks the first source, and a single source is returned whatever its name.
+    """
+    if name in sources:
+        return name, sources[name]
+    if name is None or len(sources) == 1:
+        return next(iter(sources.items()))
+    raise KeyError(f"Source {name!r} not found, available: {list(sources)}")
+
+
+def restrict_sources(images: dict, region) -> dict:
+    """
+    Keep only a `LoadRegion` of loaded sources (and only its source, if it names one of them).
+    Arrays are sliced, and lazy sources are wrapped in a `RegionSource`,
+    so only the frames of the region are ever decoded.
+    """
+    from paw_viewer.sources import RegionSource
+
+    if region.source is not None:
+        if region.source in images:
+            images = {region.source: images[region.source]}
+        elif len(images) > 1:
+            logging.warning(f"Source {region.source!r} not found, loading all sources")
+    return {
+        name: restrict_array(image, region)
+        if isinstance(image, np.ndarray)
+        else RegionSource(image, region)
+        for name, image in images.items()
+    }
+
+
+def crop_filename(
+    source_name: str, t: tuple[int, int], x: tuple[int, int], y: tuple[int, int]
+) -> str:
+    """Name of the `.npy` file of a crop, as saved with Ctrl+N and by `paw extract`."""
+    return f"crop_{source_name}_{t[0]}-{t[1]}_{x[0]}-{x[1]}_{y[0]}-{y[1]}.npy"
+
+
+PRECISIONS = ("native", "half", "uint8-tonemapped")
+
+
+def tone_map_to_uint8(
+    frames: np.ndarray, exposure: float = 1.0, gamma: float = 2.2
+) -> np.ndarray:
+    """Apply exposure and gamma to float images, like the fragment shader does."""
+    return (
+        (255 * np.pow(np.abs(frames * exposure), 1 / gamma))
+        .clip(0, 255)
+        .astype(np.uint8)
+    )
+
+
+def convert_precision(frames: np.ndarray, precision: str) -> np.ndarray:
+    """Convert float frames to the storage precision. Integer frames are kept as they are."""
+    if precision not in PRECISIONS:
+        raise ValueError(
+            f"Unsupported precision {precision}, expected one of {PRECISIONS}"
         )
+    if precision == "native" or not np.issubdtype(frames.dtype, np.floating):
+        return frames
+    if precision == "half":
+        return frames.astype(np.float16)
+    return tone_map_to_uint8(frames)
+
+
+def reduce_precision(
+    data: np.ndarray,
+    precision: str,
+    adjust: bool = True,
+    chunk_bytes: int = 64 * 1024**2,
+):
+    """
+    Convert a video array to the storage precision chunk by chunk (see `convert_precision`),
+    so there is no full-size temporary. With `adjust`, the array is auto-adjusted first
+    (without copying it), and alpha channels are added per chunk.
 
-    # We made sure we have at least 3 channels
-    # Now, ensure there is an alpha channel
-    max_value = 255 if np.issubdtype(data.dtype, np.integer) else 1.0
-    if data.shape[channel_axis] == 3:
-        # For now, discard alpha channel
-        padding_shape = list(data.shape)
-        padding_shape[channel_axis] = 1
-        data = np.concatenate(
-            [
-                data,
-                max_value
-                * np.ones(
-                    padding_shape,
-                    dtype=data.dtype,
-                ),
-            ],
-            axis=channel_axis,
+    Returns a `ReducedPrecisionSource`, which reads exact values lazily from `data`,
+    so pass a memory-mapped array to avoid keeping the native data in RAM.
+    """
+    from paw_viewer.sources import ReducedPrecisionSource
+
+    if precision == "native" or not np.issubdtype(data.dtype, np.floating):
+        return auto_adjust_array(data) if adjust else np.asarray(data)
+    video = auto_adjust_array(data, add_alpha=False) if adjust else np.asarray(data)
+    pad = add_alpha_channel if adjust else np.asarray
+    if len(video) == 1:
+        # A single image - there is nothing to split into chunks
+        native = pad(np.asarray(video))
+        return ReducedPrecisionSource(
+            convert_precision(native, precision), lambda t: native[t]
         )
 
-    return data
+    first_frame = pad(np.asarray(video[:1]))
+    frames = np.empty(
+        (len(video), *first_frame.shape[1:]),
+        dtype=convert_precision(first_frame[:, :1, :1], precision).dtype,
+    )
+    chunk_frames = max(1, chunk_bytes // max(1, first_frame.nbytes))
+    for start in range(0, len(video), chunk_frames):
+        chunk = pad(np.asarray(video[start : start + chunk_frames]))
+        frames[start : start + chunk_frames] = convert_precision(chunk, precision)
+
+    return ReducedPrecisionSource(
+        frames, lambda t: pad(np.asarray(video[t : t + 1]))[0]
+    )
 
 
 def load_memmap_npy(path: str | Path) -> np.ndarray:
     """This is a custom format for spoofing wrapper"""
-    meta_path = list(Path(path).parent.glob("*.json"))[0]
+    meta_path = next(iter(Path(path).parent.glob("*.json")))
     with open(meta_path, "r") as f:
         metadata = json.load(f)
 
@@ -220,42 +788,119 @@ def load_memmap_npy(path: str | Path) -> np.ndarray:
     return mem
 
 
-def auto_load_file(path: str | Path, default_fps: float = 30.0):
+def auto_load_file(
+    path: str | Path,
+    default_fps: float = 30.0,
+    precision: str = "native",
+    compress: str | None = None,
+    dedup: bool = True,
+    yuv_size: tuple[int, int] | None = None,
+    yuv_layout: str = "420p",
+    yuv_bit_depth: int = 8,
+    region=None,
+):
+    """
+    Load any supported file or directory. With a `LoadRegion`, only its frames and pixels
+    are read where the format allows it (memory maps, video seeking, reduced JPEG decoding),
+    and lazy sources only ever decode the frames of the region.
+    """
     logging.info(f"Auto-loading content from path: {path}")
     path = Path(path)
     fps = default_fps
+    # Videos and single images are restricted to the region while decoding
+    restricted = False
     if path.is_dir():
         logging.debug("Detected directory path")
-        images = load_directory(path)
+        images = load_directory(path, precision=precision, compress=compress)
     elif path.suffix.lower() in (".mp4", ".avi", ".mov", ".mkv"):
         logging.debug("Detected video file format")
-        image, fps = load_video(path)
+        from paw_viewer.probe import memory_budget, probe_video
+
+        info = probe_video(path)
+        if compress is None and region is None and info.nbytes > memory_budget():
+            logging.warning(
+                f"Decoded frames need about {info.nbytes / 1024**3:.1f}GiB of RAM,"
+                " consider loading with --compress jpeg"
+            )
+        image, fps = load_video(path, compress=compress, region=region)
         images = {"": image}
+        restricted = True
     elif path.suffix.lower() == ".exr":
         logging.debug("Detected EXR file format")
         images = load_exr(path)
-    elif path.suffix.lower() in (".png", ".jpg", ".jpeg", ".bmp", ".tiff"):
+    elif path.suffix.lower() in TIFF_SUFFIXES and is_multipage_tiff(path):
+        logging.debug("Detected multi-page TIFF file format")
+        from paw_viewer.sources import TiffStackSource
+
+        images = {"": TiffStackSource(path, precision=precision)}
+    elif path.suffix.lower() in (".png", ".jpg", ".jpeg", ".bmp", ".tif", ".tiff"):
         logging.debug("Detected image file format")
-        image = load_image(path)
+        image = load_image(path) if region is None else load_image_region(path, region)
         image = image[np.newaxis, ...]  # Add batch dimension for consistency
         images = {"": image}
+        restricted = True
+    elif path.suffix.lower() == ".y4m":
+        logging.debug("Detected Y4M file format")
+        from paw_viewer.yuv import load_y4m
+
+        source, fps = load_y4m(path)
+        images = {"": source}
+    elif path.suffix.lower() == ".yuv":
+        logging.debug("Detected raw YUV file format")
+        from paw_viewer.yuv import load_raw_yuv
+
+        images = {"": load_raw_yuv(path, yuv_size, yuv_layout, yuv_bit_depth)}
     elif path.suffix.lower() in (".npy", ".npz"):
         logging.debug("Detected NumPy file format")
         try:
-            image_or_dict = np.load(path)
+            from paw_viewer.probe import choose_strategy, probe_npy
+
+            # Reduced precision and regions are converted from a memory map without loading
+            # native data to RAM, and arrays which don't fit into RAM are only mapped
+            # (see `choose_strategy`)
+            mmap_mode = None
+            if (
+                precision != "native"
+                or region is not None
+                or (
+                    path.suffix.lower() == ".npy"
+                    and choose_strategy(probe_npy(path)) != "eager"
+                )
+            ):
+                mmap_mode = "r"
+            image_or_dict = np.load(path, mmap_mode=mmap_mode)
             if isinstance(image_or_dict, np.ndarray):
                 images = {"": image_or_dict}
             else:
                 images = image_or_dict
-        except Exception:
+        except (OSError, ValueError):
             # let's just blindly try to interpret that as memmap
-            logging.warning("Failed to load .npy file with numpy. Attempting to load as custom memmap.")
+            logging.warning(
+                "Failed to load .npy file with numpy. Attempting to load as custom memmap."
+            )
             images = {"": load_memmap_npy(path)}
     else:
         raise ValueError("Unsupported file format")
 
+    if region is not None and not restricted:
+        images = restrict_sources(images, region)
+
     logging.info("Auto-adjusting loaded arrays")
-    images = {name: auto_adjust_array(image) for name, image in images.items()}
+    from paw_viewer.sources import expand_channel_sources, wrap_complex_sources
+
+    # Lazily loaded sources (and channel views) already provide adjusted frames
+    images = expand_channel_sources(images)
+    images = {
+        name: reduce_precision(image, precision)
+        if isinstance(image, np.ndarray)
+        else image
+        for name, image in images.items()
+    }
+    images = wrap_complex_sources(images)
+    if dedup:
+        from paw_viewer.sources import deduplicate_sources
+
+        images = deduplicate_sources(images)
     return images, fps
 
 
@@ -275,4 +920,3 @@ def copy_array_to_clipboard(image: np.ndarray):
         width=image.shape[1],
         height=image.shape[0],
     )
-
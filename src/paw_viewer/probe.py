@@ -0,0 +1,399 @@
+"""
+Metadata of files and directories read from their headers alone, without decoding any pixels.
+
+Probing powers `paw --info` and picks a loading strategy (see `choose_strategy`)
+from an estimate of the memory needed, before anything is loaded.
+"""
+
+import logging
+import os
+import struct
+import zipfile
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import numpy as np
+
+from paw_viewer.io import (
+    TIFF_BITS_PER_SAMPLE,
+    TIFF_IMAGE_LENGTH,
+    TIFF_IMAGE_WIDTH,
+    TIFF_SAMPLE_FORMAT,
+    TIFF_SAMPLE_KINDS,
+    TIFF_SAMPLES_PER_PIXEL,
+    TIFF_SUFFIXES,
+    read_tiff_tags,
+    scan_sequences,
+    tiff_page_offsets,
+)
+from paw_viewer.sources import is_channel_cube
+
+VIDEO_SUFFIXES = (".mp4", ".avi", ".mov", ".mkv")
+
+# eager: everything is decoded to RAM up front
+# memmap: the file is mapped and the OS pages frames in when they are shown
+# lazy: frames are decoded on demand (and prefetched)
+# proxy: like memmap or lazy, but frames are so large that playback shows downscaled proxies
+STRATEGIES = ("eager", "memmap", "lazy", "proxy")
+
+# Channels of PNG color types (palettes are expanded to RGB)
+PNG_CHANNELS = {0: 1, 2: 3, 3: 3, 4: 4, 6: 4}
+
+# Pixel types of EXR channels
+EXR_DTYPES = {0: np.dtype(np.uint32), 1: np.dtype(np.float16), 2: np.dtype(np.float32)}
+
+
+@dataclass
+class SourceInfo:
+    name: str
+    num_frames: int
+    height: int
+    width: int
+    channels: int
+    dtype: np.dtype
+    channel_names: list[str] | None = None
+    # Size of a stored frame that is not an array of the frame shape, e.g. YUV planes
+    stored_frame_nbytes: int | None = None
+
+    @property
+    def frame_nbytes(self) -> int:
+        """Size of a frame as stored by the viewer, where RGB frames get an alpha channel."""
+        if self.stored_frame_nbytes is not None:
+            return self.stored_frame_nbytes
+        channels = 4 if self.channels == 3 else self.channels
+        return self.height * self.width * channels * np.dtype(self.dtype).itemsize
+
+    @property
+    def nbytes(self) -> int:
+        return self.num_frames * self.frame_nbytes
+
+
+@dataclass
+class FileInfo:
+    path: Path
+    format: str
+    sources: list[SourceInfo] = field(default_factory=list)
+    fps: float | None = None
+
+    @property
+    def nbytes(self) -> int:
+        return sum(source.nbytes for source in self.sources)
+
+    @property
+    def max_frame_nbytes(self) -> int:
+        return max((source.frame_nbytes for source in self.sources), default=0)
+
+
+def frame_geometry(shape: tuple[int, ...]) -> tuple[int, int, int, int]:
+    """
+    Get `(T, H, W, C)` of an array as the viewer shows it
+    (see `auto_adjust_array` and `is_channel_cube`).
+    Leading dimensions of higher-rank arrays are counted as frames.
+    """
+    if len(shape) == 2:
+        return 1, shape[0], shape[1], 1
+    if len(shape) == 3:
+        if shape[-1] <= 4 or is_channel_cube(shape):
+            return 1, *shape
+        return *shape, 1
+    T = int(np.prod(shape[:-3]))
+    if shape[-3] in (1, 2, 3, 4) and min(shape[-2:]) > 4:
+        # Channel-first, e.g. [T, 3, H, W]
+        return T, shape[-2], shape[-1], shape[-3]
+    return T, *shape[-3:]
+
+
+def read_npy_header(file) -> tuple[tuple[int, ...], np.dtype]:
+    version = np.lib.format.read_magic(file)
+    if version == (1, 0):
+        shape, _, dtype = np.lib.format.read_array_header_1_0(file)
+    else:
+        shape, _, dtype = np.lib.format.read_array_header_2_0(file)
+    return shape, dtype
+
+
+def array_source_info(name: str, shape: tuple[int, ...], dtype: np.dtype) -> SourceInfo:
+    T, H, W, C = frame_geometry(shape)
+    return SourceInfo(name, T, H, W, C, np.dtype(dtype))
+
+
+def probe_npy(path: Path) -> FileInfo:
+    with open(path, "rb") as f:
+        shape, dtype = read_npy_header(f)
+    return FileInfo(path, "npy", [array_source_info("", shape, dtype)])
+
+
+def probe_npz(path: Path) -> FileInfo:
+    """Only the header of each member is decompressed."""
+    info = FileInfo(path, "npz")
+    with zipfile.ZipFile(path) as archive:
+        for member in archive.namelist():
+            if not member.endswith(".npy"):
+                continue
+            with archive.open(member) as f:
+                shape, dtype = read_npy_header(f)
+            info.sources.append(array_source_info(member[: -len(".npy")], shape, dtype))
+    return info
+
+
+def probe_video(path: Path) -> FileInfo:
+    import cv2
+
+    cap = cv2.VideoCapture(str(path))
+    if not cap.isOpened():
+        raise ValueError(f"Failed to open video {path}")
+    num_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+    height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    cap.release()
+    return FileInfo(
+        path,
+        "video",
+        [SourceInfo("", num_frames, height, width, 3, np.dtype(np.uint8))],
+        fps,
+    )
+
+
+def read_exr_header(path: Path) -> dict:
+    """
+    Read the attributes of the (first part's) header of an EXR file, without any pixel data.
+    Only `channels` (a list of `(name, pixel_type)`), `dataWindow` and `multiView` are decoded.
+    """
+    attributes = {}
+    with open(path, "rb") as f:
+        magic, _ = struct.unpack("<II", f.read(8))
+        if magic != 20000630:
+            raise ValueError(f"{path} is not an EXR file")
+
+        def read_string() -> bytes:
+            chars = bytearray()
+            while (char := f.read(1)) not in (b"\0", b""):
+                chars += char
+            return bytes(chars)
+
+        while name := read_string():
+            type_name = read_string()
+            (size,) = struct.unpack("<i", f.read(4))
+            value = f.read(size)
+            if type_name == b"chlist":
+                channels = []
+                offset = 0
+                while value[offset] != 0:
+                    end = value.index(b"\0", offset)
+                    (pixel_type,) = struct.unpack_from("<i", value, end + 1)
+                    channels.append((value[offset:end].decode(), pixel_type))
+                    offset = end + 1 + 16
+                attributes["channels"] = channels
+            elif name == b"dataWindow":
+                attributes["dataWindow"] = struct.unpack("<4i", value)
+            elif name == b"multiView":
+                strings, offset = [], 0
+                while offset < len(value):
+                    (length,) = struct.unpack_from("<i", value, offset)
+                    strings.append(value[offset + 4 : offset + 4 + length].decode())
+                    offset += 4 + length
+                attributes["multiView"] = strings
+    return attributes
+
+
+def probe_exr(path: Path) -> FileInfo:
+    """Channels are grouped into sources by their view or layer prefix, like in `load_exr`."""
+    header = read_exr_header(path)
+    x_min, y_min, x_max, y_max = header["dataWindow"]
+    main_view_name = header.get("multiView", [""])[0]
+    groups: dict[str, list[tuple[str, int]]] = {}
+    for name, pixel_type in header["channels"]:
+        prefix, _, channel = name.rpartition(".")
+        groups.setdefault(prefix or main_view_name, []).append((channel, pixel_type))
+
+    info = FileInfo(path, "exr")
+    for prefix, channels in groups.items():
+        dtype = np.result_type(*(EXR_DTYPES[pixel_type] for _, pixel_type in channels))
+        info.sources.append(
+            SourceInfo(
+                prefix,
+                1,
+                y_max - y_min + 1,
+                x_max - x_min + 1,
+                len(channels),
+                dtype,
+                channel_names=[channel for channel, _ in channels],
+            )
+        )
+    return info
+
+
+def probe_image_header(path: Path) -> tuple[int, int, int, np.dtype, int]:
+    """
+    Get `(H, W, C, dtype, pages)` of an image file from its header.
+    Formats without a header parser here are decoded with OpenCV.
+    """
+    suffix = path.suffix.lower()
+    with open(path, "rb") as f:
+        head = f.read(32)
+        if head.startswith(b"\x89PNG\r\n\x1a\n"):
+            # IHDR is always the first chunk
+            width, height, bit_depth, color_type = struct.unpack(">IIBB", head[16:26])
+            dtype = np.dtype(np.uint16 if bit_depth == 16 else np.uint8)
+            return height, width, PNG_CHANNELS[color_type], dtype, 1
+        if head.startswith(b"\xff\xd8"):
+            f.seek(2)
+            while True:
+                marker, length = struct.unpack(">HH", f.read(4))
+                # Start of frame markers, except DHT, JPG and DAC
+                if 0xFFC0 <= marker <= 0xFFCF and marker not in (
+                    0xFFC4,
+                    0xFFC8,
+                    0xFFCC,
+                ):
+                    _, height, width, components = struct.unpack(">BHHB", f.read(6))
+                    return height, width, components, np.dtype(np.uint8), 1
+                f.seek(length - 2, os.SEEK_CUR)
+        if head.startswith(b"BM"):
+            width, height = struct.unpack("<ii", head[18:26])
+            (bits,) = struct.unpack("<H", head[28:30])
+            return abs(height), width, 4 if bits == 32 else 3, np.dtype(np.uint8), 1
+    if suffix in TIFF_SUFFIXES:
+        data = np.memmap(path, dtype=np.uint8, mode="r")
+        byte_order, bigtiff, offsets = tiff_page_offsets(data)
+        tags = read_tiff_tags(data, byte_order, bigtiff, offsets[0])
+        bits = tags.get(TIFF_BITS_PER_SAMPLE, [8])[0]
+        kind = TIFF_SAMPLE_KINDS.get(tags.get(TIFF_SAMPLE_FORMAT, [1])[0], "u")
+        dtype = np.dtype(f"{kind}{max(1, bits // 8)}")
+        channels = tags.get(TIFF_SAMPLES_PER_PIXEL, [1])[0]
+        return (
+            tags[TIFF_IMAGE_LENGTH][0],
+            tags[TIFF_IMAGE_WIDTH][0],
+            channels,
+            dtype,
+            len(offsets),
+        )
+
+    from paw_viewer.io import load_frame_file
+
+    logging.debug(f"No header parser for {path}, decoding it")
+    image = load_frame_file(path)
+    H, W = image.shape[:2]
+    return H, W, image.shape[2] if image.ndim == 3 else 1, image.dtype, 1
+
+
+def probe_image(path: Path) -> FileInfo:
+    if path.suffix.lower() == ".exr":
+        return probe_exr(path)
+    H, W, C, dtype, pages = probe_image_header(path)
+    return FileInfo(
+        path,
+        "tiff-stack" if pages > 1 else "image",
+        [SourceInfo("", pages, H, W, C, dtype)],
+    )
+
+
+def probe_directory(path: Path) -> FileInfo:
+    """
+    Probe the first file of each sequence, so every other file only costs a directory entry.
+    Like `load_directory`, only the first view of EXR files is used.
+    """
+    info = FileInfo(path, "directory")
+    for name, paths in scan_sequences(path).items():
+        source = probe_image(Path(paths[0])).sources[0]
+        source.name = name
+        if len(paths) > 1:
+            source.num_frames = len(paths)
+        info.sources.append(source)
+    return info
+
+
+def probe_yuv(
+    path: Path, yuv_size=None, yuv_layout="420p", yuv_bit_depth=8
+) -> FileInfo:
+    """The planes of YUV files are mapped as they are, so their size is the file size."""
+    from paw_viewer.yuv import load_raw_yuv, load_y4m
+
+    if path.suffix.lower() == ".y4m":
+        source, fps = load_y4m(path)
+    else:
+        source, fps = load_raw_yuv(path, yuv_size, yuv_layout, yuv_bit_depth), None
+    T, H, W, C = source.shape
+    info = SourceInfo(
+        "", T, H, W, C, source.dtype, stored_frame_nbytes=source.frame_bytes
+    )
+    return FileInfo(path, "yuv", [info], fps)
+
+
+def probe(path: str | Path, **yuv_options) -> FileInfo:
+    """Read the metadata of anything `auto_load_file` can load."""
+    path = Path(path)
+    suffix = path.suffix.lower()
+    if path.is_dir():
+        return probe_directory(path)
+    if suffix in VIDEO_SUFFIXES:
+        return probe_video(path)
+    if suffix == ".npy":
+        return probe_npy(path)
+    if suffix == ".npz":
+        return probe_npz(path)
+    if suffix in (".y4m", ".yuv"):
+        return probe_yuv(path, **yuv_options)
+    return probe_image(path)
+
+
+def memory_budget() -> int:
+    """Half of the physical memory, or 8 GiB if it's unknown."""
+    try:
+        return os.sysconf("SC_PHYS_PAGES") * os.sysconf("SC_PAGE_SIZE") // 2
+    except (AttributeError, ValueError, OSError):
+        return 8 * 1024**3
+
+
+def choose_strategy(
+    info: FileInfo,
+    budget: int | None = None,
+    proxy_min_bytes: int = 16 * 1024**2,
+) -> str:
+    """
+    Pick one of `STRATEGIES` for loading a probed file.
+
+    Directories and TIFF stacks are always lazy and YUV files are always mapped.
+    Arrays are decoded up front if they fit into `budget` (see `memory_budget`),
+    otherwise `.npy` files are mapped.
+    """
+    if budget is None:
+        budget = memory_budget()
+    if info.format in ("directory", "tiff-stack"):
+        strategy = "lazy"
+    elif info.format == "yuv" or (info.format == "npy" and info.nbytes > budget):
+        strategy = "memmap"
+    else:
+        strategy = "eager"
+    if strategy != "eager" and info.max_frame_nbytes >= proxy_min_bytes:
+        strategy = "proxy"
+    return strategy
+
+
+def format_bytes(num_bytes: float) -> str:
+    for unit in ("B", "KiB", "MiB", "GiB"):
+        if num_bytes < 1024 or unit == "GiB":
+            return f"{num_bytes:.1f}{unit}" if unit != "B" else f"{num_bytes:.0f}B"
+        num_bytes /= 1024
+
+
+def format_info(info: FileInfo, budget: int | None = None) -> str:
+    """Describe a probed file for `paw --info`."""
+    if budget is None:
+        budget = memory_budget()
+    fps = f", {info.fps:g}fps" if info.fps else ""
+    lines = [f"{info.path}: {info.format}{fps}"]
+    for source in info.sources:
+        channel_names = (
+            f" ({','.join(source.channel_names)})" if source.channel_names else ""
+        )
+        lines.append(
+            f"  {source.name or '<unnamed>'}: {source.num_frames} x {source.height}x{source.width}"
+            f"x{source.channels}{channel_names} {source.dtype}, {format_bytes(source.nbytes)}"
+        )
+    lines.append(
+        f"Estimated memory: {format_bytes(info.nbytes)} of {format_bytes(budget)} available"
+        f" - loading strategy: {choose_strategy(info, budget)}"
+    )
+    return "\n".join(lines)
@@ -0,0 +1,52 @@
+import numpy as np
+import pyglet
+
+CHANNEL_NAMES = "RGBA"
+
+
+class PixelReadout:
+    """
+    Values and coordinates of the hovered pixel.
+
+    All lines are a single multi-line label, so hovering lays out the text once per update
+    instead of once per line. The label is anchored at the baseline of its first line,
+    so it can be the last element of a `ColumnLayout` and extend below it.
+    """
+
+    def __init__(
+        self,
+        batch: pyglet.graphics.Batch,
+        group: pyglet.graphics.Group = None,
+        padding: int = 4,
+        font_size: int = 14,
+        width: int = 400,
+    ):
+        self.padding = padding
+        self.label = pyglet.text.Label(
+            self.format(0, 0, []),
+            x=0,
+            y=0,
+            width=width,
+            multiline=True,
+            font_size=font_size,
+            font_name="Lucida Console",
+            batch=batch,
+            group=group,
+        )
+
+    @staticmethod
+    def format(x: int, y: int, values) -> str:
+        values = list(values)
+        values += [float("nan")] * (len(CHANNEL_NAMES) - len(values))
+        lines = [f" {c}: {value:g}" for c, value in zip(CHANNEL_NAMES, values)]
+        lines += [f"X: {int(x)}", f"Y: {int(y)}"]
+        return "\n".join(lines)
+
+    def update(self, x: int, y: int, values: np.ndarray):
+        text = self.format(x, y, values)
+        if self.label.text != text:
+            self.label.text = text
+
+    def update_geometry(self, x, y, **kwargs):
+        self.label.x = x + self.padding
+        self.label.y = y + self.padding
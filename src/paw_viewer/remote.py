@@ -0,0 +1,228 @@
+"""
+Viewer running in a child process, sharing frames with the caller through shared memory.
+
+Unlike `show_video_arrays`, `spawn` doesn't block the caller, so it can be used to watch
+the outputs of a training or simulation loop. Frames are written directly into shared memory
+buffers and the viewer only gets a short message telling it which textures to refresh.
+"""
+
+import logging
+import multiprocessing
+import queue
+from multiprocessing import shared_memory
+from pathlib import Path
+
+import numpy as np
+
+
+class ViewerHandle:
+    """
+    Controls a viewer started by `spawn`.
+
+    `arrays` maps source names to writable arrays backed by shared memory.
+    Writing into them followed by `update` is the zero-copy way of showing new frames.
+    All control methods only enqueue a message, so they never wait for the viewer.
+
+    The viewer process outlives the caller: if the caller exits without `close`,
+    the interpreter waits for the viewer window to be closed.
+    """
+
+    def __init__(
+        self,
+        process: multiprocessing.Process,
+        commands: multiprocessing.Queue,
+        buffers: list[shared_memory.SharedMemory],
+        arrays: dict[str, np.ndarray],
+    ):
+        self.process = process
+        self.commands = commands
+        self.buffers = buffers
+        self.arrays = arrays
+
+    def is_alive(self) -> bool:
+        return self.process.is_alive()
+
+    def _send(self, *command):
+        if self.is_alive():
+            self.commands.put(command)
+
+    def update(self, name: str, frame: np.ndarray | None = None, t: int | None = None):
+        """
+        Refresh frame `t` of source `name` (or all its frames if `t` is None).
+
+        If `frame` is given, it's copied into the shared buffer first.
+        """
+        if frame is not None:
+            if t is None:
+                self.arrays[name][:] = frame
+            else:
+                self.arrays[name][t] = frame
+        self._send("invalidate", name, t)
+
+    def set_frame_index(self, frame_index: int):
+        self._send("set_frame_index", frame_index)
+
+    def set_active_source(self, name: str):
+        self._send("set_active_source", name)
+
+    def set_exposure(self, exposure: float):
+        self._send("set_exposure", exposure)
+
+    def set_gamma(self, gamma: float):
+        self._send("set_gamma", gamma)
+
+    def set_fps(self, fps: float):
+        self._send("set_fps", fps)
+
+    def wait(self, timeout: float | None = None):
+        """Wait until the viewer window is closed."""
+        self.process.join(timeout)
+
+    def terminate(self):
+        """Kill the viewer process without waiting for its window to close."""
+        self.process.terminate()
+        self.process.join()
+
+    def close(self, timeout: float = 5):
+        """Close the viewer and release the shared memory."""
+        self._send("close")
+        self.process.join(timeout)
+        if self.process.is_alive():
+            logging.warning("Viewer process did not exit - terminating")
+            self.terminate()
+        self.arrays.clear()
+        for buffer in self.buffers:
+            buffer.close()
+            buffer.unlink()
+        self.buffers.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def spawn(
+    video_arrays: dict[str, np.ndarray] | np.ndarray,
+    fps: float = 30,
+    outputs_root: str | Path | None = None,
+) -> ViewerHandle:
+    """
+    Start the viewer in a child process and return a handle for controlling it.
+
+    Arrays are copied once into shared memory. Shapes and dtypes are fixed from then on,
+    so preallocate the number of frames you intend to show.
+    """
+    if isinstance(video_arrays, np.ndarray):
+        video_arrays = {"": video_arrays}
+
+    buffers = []
+    arrays = {}
+    specs = []
+    for name, array in video_arrays.items():
+        buffer = shared_memory.SharedMemory(create=True, size=max(1, array.nbytes))
+        shared_array = np.ndarray(array.shape, dtype=array.dtype, buffer=buffer.buf)
+        shared_array[:] = array
+        buffers.append(buffer)
+        arrays[name] = shared_array
+        specs.append((name, buffer.name, array.shape, array.dtype.str))
+
+    # OpenGL state doesn't survive a fork, so the child always starts fresh.
+    # The process is not a daemon, so the window stays open when the caller finishes first
+    context = multiprocessing.get_context("spawn")
+    commands = context.Queue()
+    process = context.Process(
+        target=_run_viewer,
+        args=(specs, fps, outputs_root, commands),
+        name="paw-viewer",
+    )
+    process.start()
+    logging.info(f"Started viewer process {process.pid}")
+    return ViewerHandle(process, commands, buffers, arrays)
+
+
+def _run_viewer(specs, fps, outputs_root, commands):
+    import gc
+
+    buffers = [
+        shared_memory.SharedMemory(name=buffer_name) for _, buffer_name, _, _ in specs
+    ]
+    try:
+        arrays = {
+            name: np.ndarray(shape, dtype=np.dtype(dtype), buffer=buffer.buf)
+            for (name, _, shape, dtype), buffer in zip(specs, buffers)
+        }
+        _show_shared_arrays(arrays, fps, outputs_root, commands)
+    finally:
+        # Views of the buffers are still referenced by cycles of the closed window
+        arrays = None
+        gc.collect()
+        for buffer in buffers:
+            try:
+                buffer.close()
+            except BufferError:
+                logging.debug(f"Shared memory {buffer.name} is still referenced")
+
+
+def _show_shared_arrays(arrays, fps, outputs_root, commands):
+    import pyglet
+
+    from paw_viewer.animation import Animation
+    from paw_viewer.viewer import ViewerWindow
+
+    names = list(arrays.keys())
+
+    animation = Animation(arrays, fps=fps)
+    window = ViewerWindow(animation=animation, outputs_root=outputs_root)
+
+    def poll_commands(dt):
+        # Invalidations are coalesced, so a fast producer costs at most one upload per frame
+        invalidated = set()
+        processed = False
+        while True:
+            try:
+                command, *args = commands.get_nowait()
+            except queue.Empty:
+                break
+            processed = True
+
+            if command == "invalidate":
+                name, t = args
+                invalidated.add((names.index(name), t))
+            elif command == "set_frame_index":
+                animation.frame_index = min(max(args[0], 0), animation.num_frames - 1)
+            elif command == "set_active_source":
+                animation.active_source = names.index(args[0])
+                window.frame_view.dispatch_event(
+                    "on_source_change", animation.active_source
+                )
+            elif command == "set_exposure":
+                window.exposure.value = args[0]
+                window.exposure.trigger_change()
+            elif command == "set_gamma":
+                window.gamma.value = args[0]
+                window.gamma.trigger_change()
+            elif command == "set_fps":
+                was_running = animation.running
+                animation.stop()
+                animation.fps = args[0]
+                if was_running:
+                    animation.start()
+            elif command == "close":
+                window.close()
+                return
+            else:
+                logging.warning(f"Unknown viewer command: {command}")
+
+        for source_index, t in invalidated:
+            if t is None or (source_index, None) not in invalidated:
+                animation.invalidate(source_index, t)
+        if processed:
+            window.request_redraw()
+
+    pyglet.clock.schedule_interval(poll_commands, 1 / 60)
+    # The window redraws itself when something changed, see `ViewerWindow.request_redraw`
+    pyglet.app.run(interval=None)
+    pyglet.clock.unschedule(poll_commands)
+    logging.info("Closed viewer window")
@@ -0,0 +1,452 @@
+"""
+Rendering the view of a frame on the CPU, e.g. review images on machines without a GPU or display.
+
+`render_frame` reproduces `fragment.glsl` with NumPy: nearest-neighbor sampling through the
+`FrameView.model` transform (zoom and pan), tone mapping with exposure and gamma, colormaps,
+flow and complex views, dimming outside of the crop selection and blending over the background
+grid. Only the sampled texels are processed, so the cost depends on the size of the view,
+not on the size of the frame. Comparison modes and overlays (labels, slider, arrows) are not
+rendered.
+"""
+
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, replace
+from pathlib import Path
+
+import numpy as np
+
+from paw_viewer.colormaps import LUT_SIZE, colormap_lut, hue_to_rgb
+from paw_viewer.io import auto_load_file, find_source
+from paw_viewer.selections import LoadRegion
+
+# Must match `glClearColor` in viewer.py
+CLEAR_COLOR = (0.05, 0.08, 0.06)
+# Must match background_fragment.glsl
+GRID_COLOR = (0.3, 0.6, 0.4)
+GRID_THICKNESS = 2.0
+GRID_SCALE = 32.0
+GRID_ALPHA = 0.2
+# Must match the crop dimming in fragment.glsl
+CROP_DIM_COLOR = (0.1, 0.1, 0.1)
+CROP_DIM = 0.9
+
+# Integer types sampled from normalized textures, see `DTYPE_TO_GL_FORMATS` in animation.py
+SNORM_DTYPES = (np.dtype(np.int8), np.dtype(np.int16))
+
+
+@dataclass
+class RenderSettings:
+    """
+    Everything that determines the view of a frame, named like the shader uniforms.
+
+    The image is drawn as a quad of `main_size` (the frame size by default) centered at
+    `translation` (the window center by default) and scaled by `scale`, like `FrameView.model`.
+    `crop_corners` are `(x1, y1, x2, y2)` in image coordinates of the main source
+    with the origin at the bottom-left corner, like `FrameView.crop_corners`.
+    A `gamma` of None uses the viewer's default (2.2 for float sources).
+    """
+
+    width: int
+    height: int
+    translation: tuple[float, float] | None = None
+    scale: float = 1.0
+    main_size: tuple[int, int] | None = None
+    crop_corners: tuple[float, float, float, float] | None = None
+    exposure: float = 1.0
+    gamma: float | None = None
+    colormap: str = "gray"
+    flow_view: str = "wheel"
+    complex_view: str = "magnitude"
+    value_range: tuple[float, float] = (0.0, 1.0)
+
+    @classmethod
+    def from_frame_view(cls, frame_view) -> "RenderSettings":
+        """Get the settings of the current view of the active source of a `FrameView`."""
+        animation = frame_view.animation
+        crop = frame_view.crop_corners
+        return cls(
+            width=frame_view.width,
+            height=frame_view.height,
+            translation=(frame_view.translation.x, frame_view.translation.y),
+            scale=frame_view.zoom_level.scale(),
+            main_size=(animation.main_size.x, animation.main_size.y),
+            crop_corners=(crop.c1.x, crop.c1.y, crop.c2.x, crop.c2.y) if crop else None,
+            exposure=animation.exposure,
+            gamma=animation.gamma,
+            colormap=animation.colormap,
+            flow_view=animation.flow_view,
+            complex_view=animation.complex_view,
+            value_range=tuple(frame_view.value_range(animation.active_source)),
+        )
+
+
+def normalize_samples(values: np.ndarray) -> np.ndarray:
+    """
+    Convert sampled values to float32 like texture sampling does: unsigned integers
+    to [0, 1], signed integers to [-1, 1] (clamping the minimum like signed normalized formats).
+    """
+    if values.dtype in SNORM_DTYPES:
+        return np.maximum(values / np.float32(np.iinfo(values.dtype).max), -1.0)
+    if np.issubdtype(values.dtype, np.integer):
+        return values / np.float32(np.iinfo(values.dtype).max)
+    return values.astype(np.float32)
+
+
+def sample_indices(
+    window_size: int,
+    translation: float,
+    scale: float,
+    model_size: float,
+    texture_size: int,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Get the texel indices sampled by pixel centers along one window axis (from the origin
+    of the window), and a mask of pixels inside the quad.
+    """
+    model = (np.arange(window_size) + 0.5 - translation) / scale
+    coords = (model + model_size / 2) / model_size
+    inside = (coords >= 0) & (coords < 1)
+    indices = np.clip(np.floor(coords * texture_size), 0, texture_size - 1)
+    return indices.astype(np.intp), inside
+
+
+def sample_lut(values: np.ndarray, name: str) -> np.ndarray:
+    """Linearly interpolate a colormap at [0, 1] coordinates, like the lookup texture."""
+    lut = colormap_lut(name).astype(np.float32) / 255
+    position = np.clip(np.nan_to_num(values), 0.0, 1.0) * (LUT_SIZE - 1)
+    low = np.floor(position).astype(np.intp)
+    high = np.minimum(low + 1, LUT_SIZE - 1)
+    weight = (position - low)[..., np.newaxis]
+    return lut[low] * (1 - weight) + lut[high] * weight
+
+
+def apply_colormap(
+    values: np.ndarray, range_: tuple[float, float], settings
+) -> np.ndarray:
+    """Like `apply_colormap` in fragment.glsl."""
+    low, high = range_
+    if settings.colormap == "diverging":
+        limit = max(abs(low), abs(high))
+        v = 0.5 + 0.5 * values * settings.exposure / limit
+    else:
+        v = (values - low) * settings.exposure / (high - low)
+    return sample_lut(v, settings.colormap)
+
+
+def with_alpha(rgb: np.ndarray) -> np.ndarray:
+    return np.concatenate([rgb, np.ones_like(rgb[..., :1])], axis=-1)
+
+
+def show_flow(flow: np.ndarray, settings) -> np.ndarray:
+    """Like `show_flow` in fragment.glsl."""
+    magnitude = np.hypot(flow[..., 0], flow[..., 1])
+    if settings.flow_view == "magnitude":
+        return apply_colormap(magnitude, (0.0, settings.value_range[1]), settings)
+    rgb = hue_to_rgb(np.arctan2(flow[..., 1], flow[..., 0]) / (2 * np.pi) + 0.5)
+    if settings.flow_view == "wheel":
+        saturation = magnitude * settings.exposure / settings.value_range[1]
+        saturation = np.clip(saturation, 0.0, 1.0)[..., np.newaxis]
+        rgb = 1 - saturation * (1 - rgb)
+    return with_alpha(rgb)
+
+
+def show_complex(z: np.ndarray, settings) -> np.ndarray:
+    """Like `show_complex` in fragment.glsl."""
+    limit = settings.value_range[1]
+    real, imaginary = z[..., 0], z[..., 1]
+    if settings.complex_view == "log-magnitude":
+        magnitude = np.log1p(np.hypot(real, imaginary))
+        return apply_colormap(magnitude, (0.0, np.log1p(limit)), settings)
+    if settings.complex_view == "phase":
+        return with_alpha(hue_to_rgb(np.arctan2(imaginary, real) / (2 * np.pi) + 0.5))
+    if settings.complex_view == "real":
+        return apply_colormap(real, (-limit, limit), settings)
+    if settings.complex_view == "imaginary":
+        return apply_colormap(imaginary, (-limit, limit), settings)
+    return apply_colormap(np.hypot(real, imaginary), (0.0, limit), settings)
+
+
+def display(values: np.ndarray, settings, is_complex: bool = False) -> np.ndarray:
+    """Convert normalized `[..., C]` samples to RGBA colors, like `display` in fragment.glsl."""
+    count = values.shape[-1]
+    if is_complex:
+        return show_complex(values, settings)
+    if count == 2:
+        return show_flow(values, settings)
+    if count == 1 and settings.colormap != "gray":
+        return apply_colormap(values[..., 0], settings.value_range, settings)
+
+    if count == 1:
+        values = np.repeat(values, 3, axis=-1)
+    if values.shape[-1] == 3:
+        values = with_alpha(values)
+    exposure = np.array([settings.exposure] * 3 + [1.0], np.float32)
+    gamma = np.array([1 / settings.gamma] * 3 + [1.0], np.float32)
+    return np.power(np.abs(values * exposure), gamma)
+
+
+def background(width: int, height: int) -> np.ndarray:
+    """Get the `[height, width, 3]` background grid with rows from the bottom of the window."""
+
+    def grid_intensity(coordinates):
+        line_position = np.mod(coordinates, GRID_SCALE)
+        return (
+            1 - np.minimum(line_position, GRID_SCALE - line_position) / GRID_THICKNESS
+        )
+
+    x_grid = grid_intensity(np.arange(width) + 0.5)
+    y_grid = grid_intensity(np.arange(height) + 0.5)
+    # Fragment outputs are clamped to [0, 1] before blending into the framebuffer
+    alpha = np.clip(np.maximum(y_grid[:, np.newaxis], x_grid) * GRID_ALPHA, 0.0, 1.0)
+    alpha = alpha[..., np.newaxis]
+    return np.array(GRID_COLOR) * alpha + np.array(CLEAR_COLOR) * (1 - alpha)
+
+
+def render_frame(
+    frame: np.ndarray, settings: RenderSettings, is_complex: bool = False
+) -> np.ndarray:
+    """
+    Render the view of a `[H, W, C]` frame to a `[height, width, 3]` uint8 RGB image
+    (rows from the top, like a screenshot of the view).
+    """
+    frame_height, frame_width = frame.shape[:2]
+    main_width, main_height = settings.main_size or (frame_width, frame_height)
+    tx, ty = settings.translation or (settings.width / 2, settings.height / 2)
+    if settings.gamma is None:
+        settings = replace(
+            settings, gamma=2.2 if np.issubdtype(frame.dtype, np.floating) else 1.0
+        )
+
+    columns, inside_x = sample_indices(
+        settings.width, tx, settings.scale, main_width, frame_width
+    )
+    rows, inside_y = sample_indices(
+        settings.height, ty, settings.scale, main_height, frame_height
+    )
+    # Texture rows are flipped in the shader, so the first row of the frame is at the top
+    rows = frame_height - 1 - rows
+
+    color = background(settings.width, settings.height)
+    ys, xs = np.flatnonzero(inside_y), np.flatnonzero(inside_x)
+    if ys.size and xs.size:
+        samples = normalize_samples(np.asarray(frame)[np.ix_(rows[ys], columns[xs])])
+        if samples.ndim == 2:
+            samples = samples[..., np.newaxis]
+        image = display(samples, settings, is_complex)
+
+        if settings.crop_corners is not None:
+            image = dim_outside_crop(
+                image, settings, xs, ys, (tx, ty), (main_width, main_height)
+            )
+
+        # Alpha blending over the background, with outputs clamped like in a UNORM framebuffer
+        image = np.clip(np.nan_to_num(image), 0.0, 1.0)
+        alpha = image[..., 3:]
+        region = np.ix_(ys, xs)
+        color[region] = image[..., :3] * alpha + color[region] * (1 - alpha)
+
+    rgb = (np.clip(color, 0.0, 1.0) * 255).round().astype(np.uint8)
+    return np.ascontiguousarray(rgb[::-1])
+
+
+def dim_outside_crop(
+    image: np.ndarray,
+    settings: RenderSettings,
+    xs: np.ndarray,
+    ys: np.ndarray,
+    translation: tuple[float, float],
+    main_size: tuple[int, int],
+) -> np.ndarray:
+    """Darken pixels outside of the crop selection, like the end of fragment.glsl."""
+    x1, y1, x2, y2 = settings.crop_corners
+    # Crop corners in window coordinates, see `set_common_uniforms`
+    wx1, wx2 = (np.array([x1, x2]) - main_size[0] / 2) * settings.scale + translation[0]
+    wy1, wy2 = (np.array([y1, y2]) - main_size[1] / 2) * settings.scale + translation[1]
+    left, right = min(wx1, wx2), max(wx1, wx2)
+    bottom, top = min(wy1, wy2), max(wy1, wy2)
+    if min(right - left, top - bottom) <= 0:
+        return image
+    px, py = xs + 0.5, ys + 0.5
+    outside = ((py < bottom) | (py > top))[:, np.newaxis] | ((px < left) | (px > right))
+    dimmed = image * (1 - CROP_DIM) + np.array([*CROP_DIM_COLOR, 1.0]) * CROP_DIM
+    return np.where(outside[..., np.newaxis], dimmed, image)
+
+
+def selection_to_crop_corners(
+    crop: dict, frame_height: int
+) -> tuple[int, int, int, int]:
+    """Convert a crop printed with Ctrl+X (rows from the top) to `crop_corners`."""
+    x1, x2 = crop["x"]
+    y1, y2 = crop["y"]
+    return x1, frame_height - y2, x2, frame_height - y1
+
+
+def center_translation(
+    center: tuple[float, float], frame_shape: tuple[int, int], settings: RenderSettings
+) -> tuple[float, float]:
+    """Get the `translation` which shows the pixel `center` (rows from the top) in the middle."""
+    height, width = frame_shape
+    x = center[0] + 0.5 - width / 2
+    y = height / 2 - center[1] - 0.5
+    return (
+        settings.width / 2 - x * settings.scale,
+        settings.height / 2 - y * settings.scale,
+    )
+
+
+def sample_value_range(
+    path: str | Path,
+    frames: range,
+    source_name: str | None,
+    num_samples: int = 16,
+    **load_options,
+) -> tuple[float, float]:
+    """
+    Reduce the range of normalized values (or magnitudes) from evenly spaced frames,
+    like `Animation.value_range`. Only the sampled frames are loaded.
+    """
+    low, high = np.inf, -np.inf
+    indices = np.linspace(0, len(frames) - 1, min(len(frames), num_samples)).round()
+    for i in np.unique(indices).astype(int):
+        t = frames[i]
+        sources, _ = auto_load_file(
+            path,
+            dedup=False,
+            region=LoadRegion(t, t + 1, source=source_name),
+            **load_options,
+        )
+        _, source = find_source(sources, source_name)
+        values = normalize_samples(np.asarray(source[0]))
+        if values.shape[-1] == 2:
+            values = np.hypot(values[..., 0], values[..., 1])
+        values = values[np.isfinite(values)]
+        if values.size > 0:
+            low = min(low, float(values.min()))
+            high = max(high, float(values.max()))
+    if not low < high:
+        low, high = (0.0, 1.0) if not np.isfinite(low) else (low - 0.5, low + 0.5)
+    return low, high
+
+
+def render_chunk(
+    path: str | Path,
+    region: LoadRegion,
+    settings: RenderSettings,
+    output_dir: str | Path,
+    **load_options,
+) -> list[Path]:
+    """Render the frames of a region of a file to `output_dir/frame_<t>.png`."""
+    import cv2
+
+    sources, _ = auto_load_file(path, dedup=False, region=region, **load_options)
+    _, source = find_source(sources, region.source)
+    is_complex = getattr(source, "is_complex", False)
+    saved = []
+    for i in range(len(source)):
+        t = region.start + i * region.stride
+        rgb = render_frame(np.asarray(source[i]), settings, is_complex)
+        output_path = Path(output_dir) / f"frame_{t:06d}.png"
+        cv2.imwrite(str(output_path), cv2.cvtColor(rgb, cv2.COLOR_RGB2BGR))
+        saved.append(output_path)
+    return saved
+
+
+def init_worker():
+    import cv2
+
+    # Frames are rendered in parallel by the pool already
+    cv2.setNumThreads(1)
+
+
+def render_file(
+    path: str | Path,
+    output_dir: str | Path,
+    start: int = 0,
+    end: int | None = None,
+    stride: int = 1,
+    source_name: str | None = None,
+    settings: RenderSettings | None = None,
+    selection: dict | None = None,
+    center: tuple[float, float] | None = None,
+    num_workers: int | None = None,
+    **load_options,
+) -> list[Path]:
+    """
+    Render frames [start, end) of a file with a process pool. Each worker loads only
+    its contiguous chunk of frames (see `LoadRegion`), so videos are decoded once in total.
+
+    `settings` may leave the size (0), gamma and value range unset, they are then
+    taken from the first frame like the viewer does. `selection` is a crop printed with Ctrl+X
+    and `center` is the pixel `(x, y)` (rows from the top) shown at the center of the view.
+    """
+    from paw_viewer.probe import probe
+
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    info = probe(path, **load_options)
+    source_info = next(
+        (s for s in info.sources if s.name == source_name), info.sources[0]
+    )
+    frames = range(source_info.num_frames)[start:end:stride]
+    if len(frames) == 0:
+        raise ValueError(f"No frames in [{start}, {end}) of {path}")
+
+    # The first frame determines the defaults of the view
+    first_region = LoadRegion(frames[0], frames[0] + 1, source=source_name)
+    first_sources, _ = auto_load_file(
+        path, dedup=False, region=first_region, **load_options
+    )
+    name, first = find_source(first_sources, source_name)
+    frame = np.asarray(first[0])
+    settings = settings or RenderSettings(0, 0)
+    if not settings.width or not settings.height:
+        settings = replace(settings, width=frame.shape[1], height=frame.shape[0])
+    if selection is not None:
+        settings = replace(
+            settings, crop_corners=selection_to_crop_corners(selection, frame.shape[0])
+        )
+    if center is not None:
+        settings = replace(
+            settings, translation=center_translation(center, frame.shape[:2], settings)
+        )
+    channels = frame.shape[-1] if frame.ndim == 3 else 1
+    if channels == 2 or (channels == 1 and settings.colormap != "gray"):
+        settings = replace(
+            settings, value_range=sample_value_range(path, frames, name, **load_options)
+        )
+
+    num_workers = min(num_workers or os.cpu_count() or 1, len(frames))
+    chunk_size = -(-len(frames) // num_workers)
+    chunks = [frames[i : i + chunk_size] for i in range(0, len(frames), chunk_size)]
+    saved = []
+    with ProcessPoolExecutor(
+        max_workers=num_workers, initializer=init_worker
+    ) as executor:
+        futures = [
+            executor.submit(
+                render_chunk,
+                path,
+                LoadRegion(chunk.start, chunk.stop, stride, source=name),
+                settings,
+                output_dir,
+                **load_options,
+            )
+            for chunk in chunks
+        ]
+        for future in futures:
+            saved.extend(future.result())
+    return saved
+
+
+def run_render(path: str | Path, output_dir: str | Path, **kwargs):
+    """Render frames of a file and print a summary."""
+    start_time = time.perf_counter()
+    saved = render_file(path, output_dir, **kwargs)
+    elapsed = time.perf_counter() - start_time
+    logging.info(f"Rendered {len(saved)} frames at {len(saved) / elapsed:.1f}fps")
+    print(
+        f"Saved {len(saved)} frames to {Path(output_dir).absolute()} in {elapsed:.1f}s"
+    )
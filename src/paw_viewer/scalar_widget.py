@@ -1,6 +1,6 @@
+import numpy as np
 import pyglet
 from pyglet.event import EventDispatcher
-import numpy as np
 
 from paw_viewer.style import ACCENT_COLOR, FG_COLOR
 
@@ -41,6 +41,7 @@ class ScalarWidget(EventDispatcher):
         )
 
         self.is_dragged = False
+        self.is_highlighted = False
         self.register_event_type("on_change")
 
     @staticmethod
@@ -71,7 +72,10 @@ class ScalarWidget(EventDispatcher):
         self.label.y = y + self.padding
 
     def update_label(self):
-        self.label.text = self.format_string.format(self.value)
+        # Setting the text lays out the label again, even if it didn't change
+        text = self.format_string.format(self.value)
+        if self.label.text != text:
+            self.label.text = text
 
     def on_mouse_release(self, x, y, buttons, modifiers):
         self.is_dragged = False
@@ -90,11 +94,10 @@ class ScalarWidget(EventDispatcher):
         return False
 
     def on_mouse_motion(self, x, y, dx, dy):
-        if self.is_dragged or self.is_in_boundary(x, y):
-            self.label.color = ACCENT_COLOR
-
-        else:
-            self.label.color = FG_COLOR
+        is_highlighted = self.is_dragged or self.is_in_boundary(x, y)
+        if is_highlighted != self.is_highlighted:
+            self.is_highlighted = is_highlighted
+            self.label.color = ACCENT_COLOR if is_highlighted else FG_COLOR
 
         if self.is_dragged:
             d = dx + dy
@@ -1,4 +1,5 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+
 from pyglet.math import Vec2
 
 
@@ -23,8 +24,8 @@ def change_coords_resolution(
 
 @dataclass
 class CropCorners:
-    c1: Vec2 = Vec2()
-    c2: Vec2 = Vec2()
+    c1: Vec2 = field(default_factory=Vec2)
+    c2: Vec2 = field(default_factory=Vec2)
 
     def crop_area(self):
         width = abs(self.c1.x - self.c2.x)
@@ -49,3 +50,41 @@ class TimeRange:
 
     def is_empty(self):
         return self.start >= self.end
+
+
+@dataclass
+class LoadRegion:
+    """
+    Part of a file to load, e.g. from the crop printed with Ctrl+X:
+    every `stride`-th frame in [start, end), pixels in [x1, x2) x [y1, y2) scaled by `scale`,
+    and only the `source` with that name (if the file has several).
+    """
+
+    start: int = 0
+    end: int | None = None
+    stride: int = 1
+    x: tuple[int, int] | None = None
+    y: tuple[int, int] | None = None
+    scale: float = 1.0
+    source: str | None = None
+
+    @classmethod
+    def from_crop(cls, crop: dict) -> "LoadRegion":
+        """Create a region from a crop dict with `source`, `t`, `x` and `y` keys."""
+        start, end = crop.get("t", (0, None))
+        return cls(
+            start=int(start),
+            end=int(end) if end is not None else None,
+            x=tuple(int(x) for x in crop["x"]) if "x" in crop else None,
+            y=tuple(int(y) for y in crop["y"]) if "y" in crop else None,
+            source=crop.get("source"),
+        )
+
+    def frame_indices(self, num_frames: int) -> range:
+        return range(num_frames)[self.start : self.end : self.stride]
+
+    def spatial_slices(self) -> tuple[slice, slice]:
+        """Slices of the rows and columns of a frame."""
+        rows = slice(*self.y) if self.y else slice(None)
+        columns = slice(*self.x) if self.x else slice(None)
+        return rows, columns
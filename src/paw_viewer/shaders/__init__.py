@@ -6,6 +6,11 @@ SLIDER_VERTEX_SHADER_PATH = Path(__file__).parent / "slider_vertex.glsl"
 SLIDER_FRAGMENT_SHADER_PATH = Path(__file__).parent / "slider_fragment.glsl"
 QUAD_INDICES = (0, 1, 2, 0, 2, 3)
 QUAD_CORNER_COORDS = (0.0, 0.0, 1.0, 0.0, 1.0, 1.0, 0.0, 1.0)
+QUAD_TRIANGLES_CORNER_COORDS = (
+    *(0.0, 0.0, 1.0, 0.0, 1.0, 1.0),
+    *(0.0, 0.0, 1.0, 1.0, 0.0, 1.0),
+)
+QUAD_TEX_COORDS = (0.0, 0.0, 0.0, 1.0, 0.0, 0.0, 1.0, 1.0, 0.0, 0.0, 1.0, 0.0)
 
 
 def load_shader(name: str) -> str:
@@ -39,3 +44,24 @@ def create_quad(x, y, width, height):
 
 def create_quad_from_texture(texture):
     return create_quad(0, 0, texture.width, texture.height)
+
+
+def create_quad_from_size(size):
+    return create_quad(0, 0, size.x, size.y)
+
+
+class UniformCache:
+    """
+    Writes uniforms of a shader program only when their values change,
+    so redrawing an unchanged view doesn't issue any uniform updates.
+    """
+
+    def __init__(self, program):
+        self.program = program
+        self.values = {}
+
+    def __setitem__(self, name: str, value):
+        if name in self.values and self.values[name] == value:
+            return
+        self.program[name] = value
+        self.values[name] = value
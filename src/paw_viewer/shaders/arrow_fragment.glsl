@@ -0,0 +1,9 @@
+#version 420 core
+out vec4 final_colors;
+
+uniform vec4 arrow_color;
+
+void main()
+{
+    final_colors = arrow_color;
+}
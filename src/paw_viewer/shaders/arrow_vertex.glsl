@@ -0,0 +1,43 @@
+#version 420 core
+in vec2 position;
+in float arrow_index;
+
+uniform WindowBlock
+{ // This UBO is defined on Window creation, and available
+    mat4 projection; // in all Shaders. You can modify these matrixes with the
+    mat4 view; // Window.view and Window.projection properties.
+} window;
+
+layout(binding = 0) uniform sampler2D flow_texture;
+
+uniform mat4 model;
+uniform vec2 image_size; // of the main source, in model coordinates
+uniform vec2 grid_origin; // center of the first arrow
+uniform vec2 grid_step;
+uniform int grid_columns;
+uniform int grid_count;
+uniform float arrow_scale; // from flow units to model coordinates
+uniform float value_scale;
+
+void main()
+{
+    int index = int(arrow_index);
+    if (index >= grid_count)
+    {
+        // Unused instances are moved outside of the clip volume
+        gl_Position = vec4(2., 2., 2., 1.);
+        return;
+    }
+    vec2 center = grid_origin + vec2(index % grid_columns, index / grid_columns) * grid_step;
+
+    // Flip Y here to avoid doing that when copying images to textures
+    vec2 uv = center / image_size + 0.5;
+    vec2 flow = textureLod(flow_texture, vec2(uv.x, 1. - uv.y), 0.).rg * value_scale;
+    // Flow Y points down the image
+    vec2 vector = vec2(flow.x, -flow.y) * arrow_scale;
+    vec2 normal = vec2(-vector.y, vector.x);
+
+    // `position` is the template arrow, pointing along X from -0.5 to 0.5
+    vec2 arrow_position = center + position.x * vector + position.y * normal;
+    gl_Position = window.projection * window.view * model * vec4(arrow_position, 0., 1.);
+}
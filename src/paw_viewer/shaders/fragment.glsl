@@ -2,22 +2,308 @@
 in vec3 texture_coords;
 in vec4 frag_crop_corners;
 in vec2 frag_position;
+in vec2 model_position;
 out vec4 final_colors;
 
-uniform sampler2D our_texture;
+layout(binding = 0) uniform sampler2D our_texture;
+layout(binding = 1) uniform sampler2D reference_texture;
 
 uniform float exposure;
 uniform float gamma;
 
+// Normalization of integer sources converted to floats, see `value_scale`
+uniform float value_scale;
+uniform float reference_value_scale;
+
+// Sources with less than 4 channels are uploaded as R, RG or RGB textures
+uniform int channel_count;
+uniform int reference_channel_count;
+
+// Single-channel sources may be shown through a row of the colormap texture, see `COLORMAPS`
+// Must match `LUT_SIZE` in colormaps.py
+const float LUT_SIZE = 256.;
+const int COLORMAP_GRAY = 0;
+
+layout(binding = 2) uniform sampler2D colormaps;
+uniform int colormap;
+uniform int colormap_count;
+uniform bool colormap_diverging;
+uniform vec2 value_range;
+uniform vec2 reference_value_range;
+
+// Two-channel sources are shown as flow fields, see `FLOW_VIEWS`
+const int FLOW_WHEEL = 0;
+const int FLOW_MAGNITUDE = 1;
+const int FLOW_ANGLE = 2;
+const float PI = 3.14159265359;
+
+uniform int flow_view;
+
+// Complex sources are uploaded as real and imaginary channels, see `COMPLEX_VIEWS`
+const int COMPLEX_MAGNITUDE = 0;
+const int COMPLEX_LOG_MAGNITUDE = 1;
+const int COMPLEX_PHASE = 2;
+const int COMPLEX_REAL = 3;
+const int COMPLEX_IMAGINARY = 4;
+
+uniform int complex_view;
+uniform bool is_complex;
+uniform bool reference_is_complex;
+
+uniform int yuv_layout;
+uniform int reference_yuv_layout;
+uniform vec2 yuv_coefficients;
+uniform vec2 reference_yuv_coefficients;
+
+// Comparison against the reference source, see `CompareMode`
+const int COMPARE_OFF = 0;
+const int COMPARE_ABS_DIFFERENCE = 1;
+const int COMPARE_SIGNED_DIFFERENCE = 2;
+const int COMPARE_WIPE = 3;
+const int COMPARE_FLICKER = 4;
+
+uniform int compare_mode;
+uniform float compare_gain;
+uniform float wipe_x; // in model coordinates
+uniform float time; // in seconds
+uniform float flicker_period; // in seconds
+
+// Frames of YUV sources are single-channel textures with all planes stacked, see `YUV_LAYOUTS`
+const int YUV_NONE = 0;
+const int YUV_420P = 1;
+const int YUV_422P = 2;
+const int YUV_444P = 3;
+const int YUV_NV12 = 4;
+
+float fetch_sample(sampler2D planes, int index, int width)
+{
+    return texelFetch(planes, ivec2(index % width, index / width), 0).r;
+}
+
+// Limited range YUV to RGB with the (Kr, Kb) luma coefficients of a matrix, see `YUV_MATRICES`
+vec4 sample_yuv(
+    sampler2D planes, vec2 uv, float scale, int plane_layout, vec2 coefficients
+)
+{
+    ivec2 size = textureSize(planes, 0);
+    int width = size.x;
+    int height = plane_layout == YUV_444P
+        ? size.y / 3
+        : plane_layout == YUV_422P ? size.y / 2 : size.y * 2 / 3;
+    ivec2 p = clamp(ivec2(uv * vec2(width, height)), ivec2(0), ivec2(width - 1, height - 1));
+
+    float y = fetch_sample(planes, p.y * width + p.x, width);
+    int chroma_start = width * height;
+    float u;
+    float v;
+    if (plane_layout == YUV_NV12)
+    {
+        // Interleaved UV samples
+        int index = chroma_start + (p.y / 2) * width + (p.x / 2) * 2;
+        u = fetch_sample(planes, index, width);
+        v = fetch_sample(planes, index + 1, width);
+    }
+    else
+    {
+        int chroma_width = plane_layout == YUV_444P ? width : width / 2;
+        int chroma_height = plane_layout == YUV_420P ? height / 2 : height;
+        int index = (p.y * chroma_height / height) * chroma_width + p.x * chroma_width / width;
+        u = fetch_sample(planes, chroma_start + index, width);
+        v = fetch_sample(planes, chroma_start + chroma_width * chroma_height + index, width);
+    }
+
+    vec3 yuv = (vec3(y, u, v) * scale - vec3(16., 128., 128.) / 255.)
+        * vec3(255. / 219., 255. / 224., 255. / 224.);
+    float kr = coefficients.x;
+    float kb = coefficients.y;
+    float r = yuv.x + 2. * (1. - kr) * yuv.z;
+    float b = yuv.x + 2. * (1. - kb) * yuv.y;
+    float g = (yuv.x - kr * r - kb * b) / (1. - kr - kb);
+    return vec4(clamp(vec3(r, g, b), 0., 1.), 1.);
+}
+
+vec4 sample_source(
+    sampler2D source, vec2 uv, float scale, int count, int plane_layout, vec2 coefficients
+)
+{
+    if (plane_layout != YUV_NONE)
+    {
+        return sample_yuv(source, uv, scale, plane_layout, coefficients);
+    }
+    vec4 color = texture(source, uv) * scale;
+    if (count == 1)
+    {
+        color.rgb = vec3(color.r);
+    }
+    if (count < 4)
+    {
+        color.a = 1.;
+    }
+    return color;
+}
+
+vec4 tone_map(vec4 color)
+{
+    vec4 exposure = vec4(vec3(exposure), 1.0);
+    vec4 gamma = vec4(vec3(1.0 / gamma), 1.0);
+    return pow(abs(color * exposure), gamma);
+}
+
+vec4 apply_colormap(float value, vec2 range)
+{
+    float v;
+    if (colormap_diverging)
+    {
+        // Zero stays in the middle, so the signs of the values are always visible
+        float limit = max(abs(range.x), abs(range.y));
+        v = 0.5 + 0.5 * value * exposure / limit;
+    }
+    else
+    {
+        v = (value - range.x) * exposure / (range.y - range.x);
+    }
+    // Sample texel centers, so the ends of the colormap are not blended with the border
+    float u = (clamp(v, 0., 1.) * (LUT_SIZE - 1.) + 0.5) / LUT_SIZE;
+    return texture(colormaps, vec2(u, (float(colormap) + 0.5) / float(colormap_count)));
+}
+
+// Fully saturated color for a hue in [0, 1]
+vec3 hue_to_rgb(float hue)
+{
+    return clamp(abs(mod(hue * 6. + vec3(0., 4., 2.), 6.) - 3.) - 1., 0., 1.);
+}
+
+// The range of flow sources is the range of their magnitude
+vec4 show_flow(vec2 flow, vec2 range)
+{
+    float magnitude = length(flow);
+    if (flow_view == FLOW_MAGNITUDE)
+    {
+        return apply_colormap(magnitude, vec2(0., range.y));
+    }
+    vec3 rgb = hue_to_rgb(atan(flow.y, flow.x) / (2. * PI) + 0.5);
+    if (flow_view == FLOW_WHEEL)
+    {
+        // Small vectors fade to white
+        float saturation = clamp(magnitude * exposure / range.y, 0., 1.);
+        rgb = 1. - saturation * (1. - rgb);
+    }
+    return vec4(rgb, 1.);
+}
+
+// The range of complex sources is the range of their magnitude
+vec4 show_complex(vec2 z, vec2 range)
+{
+    float limit = range.y;
+    if (complex_view == COMPLEX_LOG_MAGNITUDE)
+    {
+        return apply_colormap(log(1. + length(z)), vec2(0., log(1. + limit)));
+    }
+    if (complex_view == COMPLEX_PHASE)
+    {
+        return vec4(hue_to_rgb(atan(z.y, z.x) / (2. * PI) + 0.5), 1.);
+    }
+    if (complex_view == COMPLEX_REAL)
+    {
+        return apply_colormap(z.x, vec2(-limit, limit));
+    }
+    if (complex_view == COMPLEX_IMAGINARY)
+    {
+        return apply_colormap(z.y, vec2(-limit, limit));
+    }
+    return apply_colormap(length(z), vec2(0., limit));
+}
+
+vec4 display(vec4 color, int count, bool complex, vec2 range)
+{
+    if (complex)
+    {
+        return show_complex(color.rg, range);
+    }
+    if (count == 2)
+    {
+        return show_flow(color.rg, range);
+    }
+    if (count == 1 && colormap != COLORMAP_GRAY)
+    {
+        return apply_colormap(color.r, range);
+    }
+    return tone_map(color);
+}
+
+// Blue-white-red map for values in [-1, 1]
+vec3 diverging_colormap(float v)
+{
+    vec3 negative = vec3(0.23, 0.30, 0.75);
+    vec3 neutral = vec3(0.87, 0.87, 0.87);
+    vec3 positive = vec3(0.71, 0.02, 0.15);
+    v = clamp(v, -1., 1.);
+    return v < 0. ? mix(neutral, negative, -v) : mix(neutral, positive, v);
+}
+
+vec4 compare(vec4 color, vec4 reference)
+{
+    if (compare_mode == COMPARE_ABS_DIFFERENCE)
+    {
+        vec3 difference = abs(color.rgb - reference.rgb) * compare_gain;
+        vec3 gamma = vec3(1.0 / gamma);
+        return vec4(pow(difference * exposure, gamma), 1.);
+    }
+    if (compare_mode == COMPARE_SIGNED_DIFFERENCE)
+    {
+        vec3 difference = (color.rgb - reference.rgb) * exposure * compare_gain;
+        float mean_difference = (difference.r + difference.g + difference.b) / 3.;
+        return vec4(diverging_colormap(mean_difference), 1.);
+    }
+    if (compare_mode == COMPARE_WIPE)
+    {
+        float distance = model_position.x - wipe_x;
+        if (abs(distance) < fwidth(model_position.x))
+        {
+            return vec4(.2, .6, .3, 1.);
+        }
+        return distance < 0.
+            ? display(color, channel_count, is_complex, value_range)
+            : display(
+                reference, reference_channel_count, reference_is_complex, reference_value_range
+            );
+    }
+    if (compare_mode == COMPARE_FLICKER)
+    {
+        bool show_reference = mod(time, 2. * flicker_period) >= flicker_period;
+        return show_reference
+            ? display(
+                reference, reference_channel_count, reference_is_complex, reference_value_range
+            )
+            : display(color, channel_count, is_complex, value_range);
+    }
+    return display(color, channel_count, is_complex, value_range);
+}
+
 void main()
 {
     // Flip Y here to avoid doing that when copying images to textures
     vec2 uv = vec2(texture_coords.x, 1. - texture_coords.y);
-    final_colors = texture(our_texture, uv);
-    
-    vec4 exposure = vec4(vec3(exposure), 1.0);
-    vec4 gamma = vec4(vec3(1.0 / gamma), 1.0);
-    final_colors = pow(abs(final_colors * exposure), gamma);
+    final_colors = sample_source(
+        our_texture, uv, value_scale, channel_count, yuv_layout, yuv_coefficients
+    );
+
+    if (compare_mode == COMPARE_OFF)
+    {
+        final_colors = display(final_colors, channel_count, is_complex, value_range);
+    }
+    else
+    {
+        vec4 reference = sample_source(
+            reference_texture,
+            uv,
+            reference_value_scale,
+            reference_channel_count,
+            reference_yuv_layout,
+            reference_yuv_coefficients
+        );
+        final_colors = compare(final_colors, reference);
+    }
 
     vec2 bottom_left = min(frag_crop_corners.xy, frag_crop_corners.zw);
     vec2 top_right = max(frag_crop_corners.xy, frag_crop_corners.zw);
@@ -0,0 +1,253 @@
+#version 420 core
+in vec3 texture_coords;
+in vec4 frag_crop_corners;
+in vec2 frag_position;
+flat in int frag_tile_slot;
+out vec4 final_colors;
+
+// Must match `MAX_TILES` in frame_view.py
+const int MAX_TILES = 15;
+
+layout(binding = 0) uniform sampler2D tile_textures[MAX_TILES];
+
+uniform int tile_count;
+// Normalization of integer sources converted to floats, see `value_scale`
+uniform float tile_value_scales[MAX_TILES];
+// Sources with less than 4 channels are uploaded as R, RG or RGB textures
+uniform int tile_channel_counts[MAX_TILES];
+
+// Single-channel sources may be shown through a row of the colormap texture, see `COLORMAPS`
+// Must match `LUT_SIZE` in colormaps.py
+const float LUT_SIZE = 256.;
+const int COLORMAP_GRAY = 0;
+
+// Must match `TILED_COLORMAP_UNIT` in frame_view.py
+layout(binding = 15) uniform sampler2D colormaps;
+uniform int colormap;
+uniform int colormap_count;
+uniform bool colormap_diverging;
+uniform vec2 tile_value_ranges[MAX_TILES];
+
+// Two-channel sources are shown as flow fields, see `FLOW_VIEWS`
+const int FLOW_WHEEL = 0;
+const int FLOW_MAGNITUDE = 1;
+const int FLOW_ANGLE = 2;
+const float PI = 3.14159265359;
+
+uniform int flow_view;
+
+// Complex sources are uploaded as real and imaginary channels, see `COMPLEX_VIEWS`
+const int COMPLEX_MAGNITUDE = 0;
+const int COMPLEX_LOG_MAGNITUDE = 1;
+const int COMPLEX_PHASE = 2;
+const int COMPLEX_REAL = 3;
+const int COMPLEX_IMAGINARY = 4;
+
+uniform int complex_view;
+uniform int tile_is_complex[MAX_TILES];
+
+uniform int tile_yuv_layouts[MAX_TILES];
+uniform vec2 tile_yuv_coefficients[MAX_TILES];
+uniform float exposure;
+uniform float gamma;
+
+// Frames of YUV sources are single-channel textures with all planes stacked, see `YUV_LAYOUTS`
+const int YUV_NONE = 0;
+const int YUV_420P = 1;
+const int YUV_422P = 2;
+const int YUV_444P = 3;
+const int YUV_NV12 = 4;
+
+float fetch_sample(sampler2D planes, int index, int width)
+{
+    return texelFetch(planes, ivec2(index % width, index / width), 0).r;
+}
+
+// Limited range YUV to RGB with the (Kr, Kb) luma coefficients of a matrix, see `YUV_MATRICES`
+vec4 sample_yuv(
+    sampler2D planes, vec2 uv, float scale, int plane_layout, vec2 coefficients
+)
+{
+    ivec2 size = textureSize(planes, 0);
+    int width = size.x;
+    int height = plane_layout == YUV_444P
+        ? size.y / 3
+        : plane_layout == YUV_422P ? size.y / 2 : size.y * 2 / 3;
+    ivec2 p = clamp(ivec2(uv * vec2(width, height)), ivec2(0), ivec2(width - 1, height - 1));
+
+    float y = fetch_sample(planes, p.y * width + p.x, width);
+    int chroma_start = width * height;
+    float u;
+    float v;
+    if (plane_layout == YUV_NV12)
+    {
+        // Interleaved UV samples
+        int index = chroma_start + (p.y / 2) * width + (p.x / 2) * 2;
+        u = fetch_sample(planes, index, width);
+        v = fetch_sample(planes, index + 1, width);
+    }
+    else
+    {
+        int chroma_width = plane_layout == YUV_444P ? width : width / 2;
+        int chroma_height = plane_layout == YUV_420P ? height / 2 : height;
+        int index = (p.y * chroma_height / height) * chroma_width + p.x * chroma_width / width;
+        u = fetch_sample(planes, chroma_start + index, width);
+        v = fetch_sample(planes, chroma_start + chroma_width * chroma_height + index, width);
+    }
+
+    vec3 yuv = (vec3(y, u, v) * scale - vec3(16., 128., 128.) / 255.)
+        * vec3(255. / 219., 255. / 224., 255. / 224.);
+    float kr = coefficients.x;
+    float kb = coefficients.y;
+    float r = yuv.x + 2. * (1. - kr) * yuv.z;
+    float b = yuv.x + 2. * (1. - kb) * yuv.y;
+    float g = (yuv.x - kr * r - kb * b) / (1. - kr - kb);
+    return vec4(clamp(vec3(r, g, b), 0., 1.), 1.);
+}
+
+vec4 sample_tile(int slot, vec2 uv)
+{
+    // Sampler arrays may only be indexed with dynamically uniform expressions
+    for (int i = 0; i < MAX_TILES; ++i)
+    {
+        if (i == slot)
+        {
+            if (tile_yuv_layouts[i] != YUV_NONE)
+            {
+                return sample_yuv(
+                    tile_textures[i],
+                    uv,
+                    tile_value_scales[i],
+                    tile_yuv_layouts[i],
+                    tile_yuv_coefficients[i]
+                );
+            }
+            return textureLod(tile_textures[i], uv, 0.) * tile_value_scales[i];
+        }
+    }
+    return vec4(0.);
+}
+
+vec4 apply_colormap(float value, vec2 range)
+{
+    float v;
+    if (colormap_diverging)
+    {
+        float limit = max(abs(range.x), abs(range.y));
+        v = 0.5 + 0.5 * value * exposure / limit;
+    }
+    else
+    {
+        v = (value - range.x) * exposure / (range.y - range.x);
+    }
+    float u = (clamp(v, 0., 1.) * (LUT_SIZE - 1.) + 0.5) / LUT_SIZE;
+    return texture(colormaps, vec2(u, (float(colormap) + 0.5) / float(colormap_count)));
+}
+
+// Fully saturated color for a hue in [0, 1]
+vec3 hue_to_rgb(float hue)
+{
+    return clamp(abs(mod(hue * 6. + vec3(0., 4., 2.), 6.) - 3.) - 1., 0., 1.);
+}
+
+// The range of flow sources is the range of their magnitude
+vec4 show_flow(vec2 flow, vec2 range)
+{
+    float magnitude = length(flow);
+    if (flow_view == FLOW_MAGNITUDE)
+    {
+        return apply_colormap(magnitude, vec2(0., range.y));
+    }
+    vec3 rgb = hue_to_rgb(atan(flow.y, flow.x) / (2. * PI) + 0.5);
+    if (flow_view == FLOW_WHEEL)
+    {
+        // Small vectors fade to white
+        float saturation = clamp(magnitude * exposure / range.y, 0., 1.);
+        rgb = 1. - saturation * (1. - rgb);
+    }
+    return vec4(rgb, 1.);
+}
+
+// The range of complex sources is the range of their magnitude
+vec4 show_complex(vec2 z, vec2 range)
+{
+    float limit = range.y;
+    if (complex_view == COMPLEX_LOG_MAGNITUDE)
+    {
+        return apply_colormap(log(1. + length(z)), vec2(0., log(1. + limit)));
+    }
+    if (complex_view == COMPLEX_PHASE)
+    {
+        return vec4(hue_to_rgb(atan(z.y, z.x) / (2. * PI) + 0.5), 1.);
+    }
+    if (complex_view == COMPLEX_REAL)
+    {
+        return apply_colormap(z.x, vec2(-limit, limit));
+    }
+    if (complex_view == COMPLEX_IMAGINARY)
+    {
+        return apply_colormap(z.y, vec2(-limit, limit));
+    }
+    return apply_colormap(length(z), vec2(0., limit));
+}
+
+void main()
+{
+    if (frag_tile_slot >= tile_count)
+    {
+        discard;
+    }
+
+    // Flip Y here to avoid doing that when copying images to textures
+    vec2 uv = vec2(texture_coords.x, 1. - texture_coords.y);
+    final_colors = sample_tile(frag_tile_slot, uv);
+    int channel_count = tile_channel_counts[frag_tile_slot];
+    if (channel_count == 1)
+    {
+        final_colors.rgb = vec3(final_colors.r);
+    }
+    if (channel_count < 4)
+    {
+        final_colors.a = 1.;
+    }
+
+    if (tile_is_complex[frag_tile_slot] != 0)
+    {
+        final_colors = show_complex(final_colors.rg, tile_value_ranges[frag_tile_slot]);
+    }
+    else if (channel_count == 2)
+    {
+        final_colors = show_flow(final_colors.rg, tile_value_ranges[frag_tile_slot]);
+    }
+    else if (channel_count == 1 && colormap != COLORMAP_GRAY)
+    {
+        final_colors = apply_colormap(final_colors.r, tile_value_ranges[frag_tile_slot]);
+    }
+    else
+    {
+        vec4 exposure = vec4(vec3(exposure), 1.0);
+        vec4 gamma = vec4(vec3(1.0 / gamma), 1.0);
+        final_colors = pow(abs(final_colors * exposure), gamma);
+    }
+
+    vec2 bottom_left = min(frag_crop_corners.xy, frag_crop_corners.zw);
+    vec2 top_right = max(frag_crop_corners.xy, frag_crop_corners.zw);
+    float eps = 0.000000001;
+
+    vec2 size = abs(top_right - bottom_left);
+    if (min(size.x, size.y) > eps)
+    {
+        float dx1 = max(0., bottom_left.x - frag_position.x);
+        float dy1 = max(0., bottom_left.y - frag_position.y);
+        float dx2 = max(0., frag_position.x - top_right.x);
+        float dy2 = max(0., frag_position.y - top_right.y);
+
+        float min_d = max(dx1, dy1);
+        min_d = max(min_d, dx2);
+        min_d = max(min_d, dy2);
+        if (min_d > 0)
+        {
+            final_colors = mix(final_colors, vec4(.1, .1, .1, 1.), 0.9);
+        }
+    }
+}
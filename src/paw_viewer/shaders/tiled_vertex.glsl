@@ -0,0 +1,33 @@
+#version 420 core
+in vec2 position;
+in vec2 tile_center;
+in float tile_slot;
+out vec3 texture_coords;
+out vec4 frag_crop_corners;
+out vec2 frag_position;
+flat out int frag_tile_slot;
+
+uniform WindowBlock
+{ // This UBO is defined on Window creation, and available
+    mat4 projection; // in all Shaders. You can modify these matrixes with the
+    mat4 view; // Window.view and Window.projection properties.
+} window;
+
+uniform mat4 model;
+uniform vec2 tile_size;
+uniform vec4 crop_corners;
+
+void main()
+{
+    // Every tile is a unit quad stretched to the size of the main source
+    vec2 tile_position = tile_center + (position - 0.5) * tile_size;
+    gl_Position = window.projection * window.view * model * vec4(tile_position, 1, 1);
+    frag_position = gl_Position.xy;
+    texture_coords = vec3(position, 0.);
+    frag_tile_slot = int(tile_slot);
+
+    // Crop corners are relative to the tile center, so they are shared by all tiles
+    vec4 cc1 = window.projection * window.view * model * vec4(tile_center + crop_corners.xy, 0., 1.);
+    vec4 cc2 = window.projection * window.view * model * vec4(tile_center + crop_corners.zw, 0., 1.);
+    frag_crop_corners = vec4(cc1.xy, cc2.xy);
+}
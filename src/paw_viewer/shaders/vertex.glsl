@@ -4,6 +4,7 @@ in vec3 tex_coords;
 out vec3 texture_coords;
 out vec4 frag_crop_corners;
 out vec2 frag_position;
+out vec2 model_position;
 
 uniform WindowBlock
 { // This UBO is defined on Window creation, and available
@@ -18,6 +19,7 @@ void main()
 {
     gl_Position = window.projection * window.view * model * vec4(position, 1, 1);
     frag_position = gl_Position.xy;
+    model_position = position;
     texture_coords = tex_coords;
 
     // Transform crop corners
@@ -14,9 +14,9 @@ from pyglet.graphics.shader import Shader, ShaderProgram
 from pyglet.math import Vec2
 
 from paw_viewer import shaders
-from paw_viewer.selections import TimeRange
+from paw_viewer.selections import TimeRange, clip
 from paw_viewer.style import ACCENT_COLOR
-from paw_viewer.selections import clip
+from paw_viewer.thumbnails import Thumbnails
 
 _vertex_source = shaders.load_slider_vertex_shader()
 _fragment_source = shaders.load_slider_fragment_shader()
@@ -77,6 +77,7 @@ class Slider(EventDispatcher):
         steps: int,
         batch: pyglet.graphics.Batch,
         parent_group: pyglet.graphics.Group,
+        thumbnails: Thumbnails | None = None,
     ):
         self.x = x
         self.y = y
@@ -91,6 +92,9 @@ class Slider(EventDispatcher):
         self.group = RenderGroup(parent=parent_group)
         self.vertex_list = self.group.create_vertex_list(self.batch)
         self.slider_ubo = self.group.program.uniform_blocks["Slider"].create_ubo()
+        self.uniforms = shaders.UniformCache(self.group.program)
+        # The UBO is only written when the slider state changes, see `on_draw`
+        self.ubo_state = None
 
         self.step_label = pyglet.text.Label(
             f"{self.current_step + 1}/{self.total_steps}",
@@ -105,6 +109,14 @@ class Slider(EventDispatcher):
 
         self.time_selection: TimeRange | None = None
 
+        # Thumbnail preview of the hovered frame and an optional filmstrip above the slider
+        self.thumbnails = thumbnails
+        self.thumbnail_group = pyglet.graphics.Group(order=1, parent=parent_group)
+        self.hover_x: float | None = None
+        self.preview: pyglet.sprite.Sprite | None = None
+        self.show_filmstrip = False
+        self.filmstrip: list[pyglet.sprite.Sprite] = []
+
         self.register_event_type("on_change")
 
     def update_geometry(self):
@@ -112,7 +124,16 @@ class Slider(EventDispatcher):
         self.step_label.y = self.y + 2 * self.stroke - 4
 
     def update_step_label(self):
-        self.step_label.text = f"{self.current_step + 1}/{self.total_steps}"
+        text = f"{self.current_step + 1}/{self.total_steps}"
+        if self.step_label.text != text:
+            self.step_label.text = text
+
+    def update_total_steps(self, steps: int):
+        self.total_steps = steps
+        if self.time_selection is not None and self.time_selection.end > steps:
+            self.time_selection = None
+            self.time_selection_anchor = None
+        self.update_step_label()
 
     def update_step(self, step: int):
         self.current_step = step
@@ -136,7 +157,14 @@ class Slider(EventDispatcher):
             return False
 
     def on_mouse_motion(self, x, y, dx, dy):
-        self.step_label.visible = self.is_in_boundary(x + dx, y + dy)
+        is_visible = self.is_in_boundary(x + dx, y + dy)
+        if self.step_label.visible != is_visible:
+            self.step_label.visible = is_visible
+        self.hover_x = x if self.is_in_boundary(x, y) else None
+
+    def on_key_press(self, symbol, modifiers):
+        if pyglet.window.key.MOD_CTRL & modifiers and symbol == pyglet.window.key.F:
+            self.show_filmstrip = not self.show_filmstrip
 
     def is_in_boundary(self, x, y):
         box_width = self.length
@@ -185,10 +213,87 @@ class Slider(EventDispatcher):
         self.update_step_label()
         self.dispatch_event("on_change", self.current_step, self.time_selection)
 
+    @property
+    def needs_redraw(self) -> bool:
+        """Whether shown thumbnails are still being generated, so they appear without any input."""
+        if self.thumbnails is None or self.total_steps <= 1:
+            return False
+        is_shown = self.show_filmstrip or self.hover_x is not None
+        return is_shown and self.thumbnails.is_generating()
+
+    def update_thumbnails(self):
+        if self.thumbnails is None or self.total_steps <= 1:
+            return
+        self.thumbnails.upload_pending()
+
+        start_x = self.x + self.stroke
+        end_x = self.x + self.length - self.stroke
+        preview_y = self.y + 3 * self.stroke
+        atlas = self.thumbnails.atlas
+
+        if self.show_filmstrip:
+            count = max(1, int((end_x - start_x) // atlas.thumbnail_width))
+            if (
+                len(self.filmstrip) != count
+                or self.filmstrip[0].image.owner is not atlas.texture
+            ):
+                for sprite in self.filmstrip:
+                    sprite.delete()
+                self.filmstrip = [
+                    pyglet.sprite.Sprite(
+                        atlas.regions[0], batch=self.batch, group=self.thumbnail_group
+                    )
+                    for _ in range(count)
+                ]
+            spacing = (end_x - start_x) / count
+            for i, sprite in enumerate(self.filmstrip):
+                t = int((i + 0.5) / count * self.total_steps)
+                region = atlas.region_for_frame(t)
+                if sprite.visible != (region is not None):
+                    sprite.visible = region is not None
+                if region is not None and sprite.image is not region:
+                    sprite.image = region
+                position = (start_x + i * spacing, preview_y, 0)
+                if sprite.position != position:
+                    sprite.position = position
+            preview_y += atlas.thumbnail_height + self.stroke
+        else:
+            for sprite in self.filmstrip:
+                sprite.delete()
+            self.filmstrip = []
+
+        region = None
+        if self.hover_x is not None:
+            region = atlas.region_for_frame(
+                self.compute_step_from_position(self.hover_x)
+            )
+        if region is None:
+            if self.preview is not None and self.preview.visible:
+                self.preview.visible = False
+            return
+
+        if self.preview is None:
+            self.preview = pyglet.sprite.Sprite(
+                region, batch=self.batch, group=self.thumbnail_group
+            )
+        elif self.preview.image is not region:
+            self.preview.image = region
+        preview_x = clip(
+            self.hover_x - atlas.thumbnail_width / 2,
+            self.x,
+            self.x + self.length - atlas.thumbnail_width,
+        )
+        if self.preview.position != (preview_x, preview_y, 0):
+            self.preview.position = (preview_x, preview_y, 0)
+        if not self.preview.visible:
+            self.preview.visible = True
+
     def on_draw(self):
-        if self.total_steps <= 1:
+        if self.total_steps <= 1 and self.step_label.visible:
             self.step_label.visible = False
 
+        self.update_thumbnails()
+
         box_width = self.length
         box_height = 2 * self.stroke
         inner_slider_length = self.length - 2 * self.stroke
@@ -199,10 +304,20 @@ class Slider(EventDispatcher):
         total_steps = self.total_steps
         visible = start_x < end_x and total_steps > 1
 
-        self.group.program["translation"] = Vec2(self.x, self.y)
-        self.group.program["scale"] = (
-            Vec2(box_width, box_height) if visible else Vec2(0, 0)
+        self.uniforms["translation"] = Vec2(self.x, self.y)
+        self.uniforms["scale"] = Vec2(box_width, box_height) if visible else Vec2(0, 0)
+
+        ubo_state = (
+            self.x,
+            self.y,
+            self.length,
+            current_step,
+            total_steps,
+            self.time_selection,
         )
+        if ubo_state == self.ubo_state:
+            return
+        self.ubo_state = ubo_state
         with self.slider_ubo as slider:
             slider.start_x = float(start_x)
             slider.end_x = float(end_x)
@@ -0,0 +1,1092 @@
+"""
+Array-like frame sources that are not plain numpy arrays.
+
+Sources only need `shape`, `dtype`, `len` and numpy-style indexing with the time axis first,
+so the viewer can treat them the same way as `[T, H, W, C]` arrays.
+"""
+
+import bisect
+import functools
+import itertools
+import logging
+import math
+import threading
+import zlib
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+
+class RingBufferSource:
+    """
+    Growing source keeping only the most recent frames.
+
+    Frames can be appended from other threads while the viewer is running.
+    The latest `capacity` frames are kept in RAM. Optionally, up to `spill_capacity` older frames
+    are moved to a memory-mapped file at `spill_path` instead of being dropped.
+
+    Indices are relative to the oldest retained frame, which has the absolute index `offset`.
+    `version` increases with every append, so readers can cheaply check for changes.
+    """
+
+    def __init__(
+        self,
+        frame_shape: tuple[int, ...],
+        dtype=np.float32,
+        capacity: int = 256,
+        spill_path: str | Path | None = None,
+        spill_capacity: int = 0,
+    ):
+        self.frame_shape = tuple(frame_shape)
+        self.dtype = np.dtype(dtype)
+        self.capacity = capacity
+        self.frames = np.empty((capacity, *self.frame_shape), dtype=self.dtype)
+
+        self.spill_capacity = spill_capacity if spill_path is not None else 0
+        self.spill = None
+        if self.spill_capacity > 0:
+            self.spill = np.lib.format.open_memmap(
+                spill_path,
+                mode="w+",
+                dtype=self.dtype,
+                shape=(self.spill_capacity, *self.frame_shape),
+            )
+
+        self.lock = threading.Lock()
+        self.total_frames = 0
+        self.version = 0
+
+    @property
+    def offset(self) -> int:
+        return max(0, self.total_frames - self.capacity - self.spill_capacity)
+
+    @property
+    def shape(self) -> tuple[int, ...]:
+        return (self.total_frames - self.offset, *self.frame_shape)
+
+    @property
+    def ndim(self) -> int:
+        return 1 + len(self.frame_shape)
+
+    def __len__(self) -> int:
+        return self.shape[0]
+
+    def append(self, frame: np.ndarray) -> int:
+        """Append a frame and return its absolute index."""
+        frame = np.asarray(frame)
+        if frame.shape != self.frame_shape:
+            raise ValueError(
+                f"Expected frame of shape {self.frame_shape}, got {frame.shape}"
+            )
+
+        with self.lock:
+            index = self.total_frames
+            slot = index % self.capacity
+            evicted = index - self.capacity
+            if evicted >= 0 and self.spill is not None:
+                self.spill[evicted % self.spill_capacity] = self.frames[slot]
+            self.frames[slot] = frame
+            self.total_frames += 1
+            self.version += 1
+        return index
+
+    def _frame(self, t: int) -> np.ndarray:
+        num_frames = self.total_frames - self.offset
+        if t < 0:
+            t += num_frames
+        if not 0 <= t < num_frames:
+            raise IndexError(f"Frame {t} out of range for {num_frames} frames")
+        index = self.offset + t
+        if index >= self.total_frames - self.capacity:
+            return self.frames[index % self.capacity]
+        return self.spill[index % self.spill_capacity]
+
+    def __getitem__(self, key) -> np.ndarray:
+        if not isinstance(key, tuple):
+            key = (key,)
+        t, rest = key[0], key[1:]
+
+        # Frames are copied under the lock, so appends can't overwrite them while being read
+        with self.lock:
+            if isinstance(t, slice):
+                indices = range(*t.indices(self.total_frames - self.offset))
+                if len(indices) == 0:
+                    empty = np.empty((0, *self.frame_shape), self.dtype)
+                    return empty[(slice(None), *rest)]
+                data = np.stack([self._frame(i)[rest] for i in indices])
+            else:
+                data = np.array(self._frame(int(t))[rest])
+        return data
+
+
+class FrameListSource:
+    """
+    Growing source with frames kept in the order of their keys, e.g. frame numbers.
+
+    Frames can be inserted or replaced from other threads. Since inserting shifts the indices
+    of all later frames, `changed_from` tells readers which cached frames became stale.
+    At most `max_changes` changes are kept: the oldest ones are merged into their successor,
+    which can only make readers of old versions refresh more frames.
+    """
+
+    max_changes = 256
+
+    def __init__(self):
+        self.keys: list = []
+        self.frames: list[np.ndarray] = []
+        self.lock = threading.Lock()
+        self.version = 0
+        self.offset = 0
+        self.changes: list[tuple[int, int]] = []  # (version, first changed index)
+
+    @property
+    def frame_shape(self) -> tuple[int, ...]:
+        return self.frames[0].shape
+
+    @property
+    def dtype(self) -> np.dtype:
+        return self.frames[0].dtype
+
+    @property
+    def shape(self) -> tuple[int, ...]:
+        return (len(self.frames), *self.frame_shape)
+
+    @property
+    def ndim(self) -> int:
+        return 1 + len(self.frame_shape)
+
+    def __len__(self) -> int:
+        return len(self.frames)
+
+    def set(self, key, frame: np.ndarray) -> int:
+        """Insert a frame in the order of `key`, or replace the frame with the same key."""
+        with self.lock:
+            if self.frames and (
+                frame.shape != self.frame_shape or frame.dtype != self.dtype
+            ):
+                raise ValueError(
+                    f"Expected frame of shape {self.frame_shape} and dtype {self.dtype},"
+                    f" got {frame.shape} and {frame.dtype}"
+                )
+            index = bisect.bisect_left(self.keys, key)
+            if index < len(self.keys) and self.keys[index] == key:
+                self.frames[index] = frame
+            else:
+                self.keys.insert(index, key)
+                self.frames.insert(index, frame)
+            self.version += 1
+            self.changes.append((self.version, index))
+            if len(self.changes) > self.max_changes:
+                (_, first), (version, second) = self.changes[:2]
+                self.changes[:2] = [(version, min(first, second))]
+        return index
+
+    def changed_from(self, version: int | None) -> int | None:
+        """Get the first index that changed after `version`, or None if nothing changed."""
+        with self.lock:
+            indices = [i for v, i in self.changes if version is None or v > version]
+        return min(indices, default=None)
+
+    def __getitem__(self, key) -> np.ndarray:
+        if not isinstance(key, tuple):
+            key = (key,)
+        t, rest = key[0], key[1:]
+
+        with self.lock:
+            if isinstance(t, slice):
+                frames = self.frames[t]
+                if len(frames) == 0:
+                    empty = np.empty((0, *self.frame_shape), self.dtype)
+                    return empty[(slice(None), *rest)]
+                return np.stack([frame[rest] for frame in frames])
+            return self.frames[t][rest]
+
+
+class CachedFrameSource:
+    """
+    Base class for sources decoding frames on demand.
+
+    Decoded frames are kept in a small LRU cache, and the next `prefetch` frames
+    in the direction of playback are decoded in the background.
+    Reads for previews (`peek` and `read_proxy`) bypass the cache and prefetching,
+    so they don't evict the frames of playback or change its direction.
+    Subclasses implement `load(t)` and `__len__`.
+    """
+
+    def __init__(
+        self,
+        frame_shape: tuple[int, ...],
+        dtype,
+        max_cache_bytes: int = 1024**3,
+        prefetch: int = 4,
+        num_workers: int = 2,
+    ):
+        self.frame_shape = tuple(frame_shape)
+        self.dtype = np.dtype(dtype)
+        self.prefetch = prefetch
+        self.lock = threading.Lock()
+        self.cache: OrderedDict[int, np.ndarray] = OrderedDict()
+        self.pending: dict[int, Future] = {}
+        self.last_index = 0
+        self.executor = ThreadPoolExecutor(
+            max_workers=num_workers, thread_name_prefix="paw-decode"
+        )
+        frame_nbytes = int(np.prod(self.frame_shape)) * self.dtype.itemsize
+        self.max_cached_frames = max(
+            prefetch + 1, max_cache_bytes // max(1, frame_nbytes)
+        )
+
+    @property
+    def shape(self) -> tuple[int, ...]:
+        return (len(self), *self.frame_shape)
+
+    @property
+    def ndim(self) -> int:
+        return 1 + len(self.frame_shape)
+
+    def __len__(self) -> int:
+        raise NotImplementedError
+
+    def load(self, t: int) -> np.ndarray:
+        raise NotImplementedError
+
+    def frame(self, t: int) -> np.ndarray:
+        with self.lock:
+            frame = self.cache.get(t)
+            if frame is not None:
+                self.cache.move_to_end(t)
+            future = self.pending.get(t)
+
+        if frame is None:
+            frame = future.result() if future is not None else self.load(t)
+            self._store(t, frame)
+
+        self._prefetch(t)
+        return frame
+
+    def peek(self, t: int) -> np.ndarray:
+        """Get a frame without caching it or prefetching the next ones."""
+        with self.lock:
+            frame = self.cache.get(t)
+            future = self.pending.get(t)
+        if frame is not None:
+            return frame
+        return future.result() if future is not None else self.load(t)
+
+    def read_proxy(self, t: int, factor: int) -> np.ndarray:
+        """Get a frame downscaled by `factor`, see `Animation.proxy_frame`."""
+        return np.ascontiguousarray(self.peek(t)[::factor, ::factor])
+
+    def _store(self, t: int, frame: np.ndarray):
+        with self.lock:
+            self.cache[t] = frame
+            self.cache.move_to_end(t)
+            self.pending.pop(t, None)
+            while len(self.cache) > self.max_cached_frames:
+                self.cache.popitem(last=False)
+
+    def _load_and_store(self, t: int) -> np.ndarray:
+        frame = self.load(t)
+        self._store(t, frame)
+        return frame
+
+    def _prefetch(self, t: int):
+        step = -1 if t < self.last_index else 1
+        self.last_index = t
+        with self.lock:
+            for i in range(1, self.prefetch + 1):
+                index = (t + step * i) % len(self)
+                if index not in self.cache and index not in self.pending:
+                    self.pending[index] = self.executor.submit(
+                        self._load_and_store, index
+                    )
+
+    def __getitem__(self, key) -> np.ndarray:
+        if not isinstance(key, tuple):
+            key = (key,)
+        t, rest = key[0], key[1:]
+
+        if isinstance(t, slice):
+            indices = range(*t.indices(len(self)))
+            if len(indices) == 0:
+                empty = np.empty((0, *self.frame_shape), self.dtype)
+                return empty[(slice(None), *rest)]
+            return np.stack([self.frame(i)[rest] for i in indices])
+        return self.frame(int(t))[rest]
+
+
+class ImageSequenceSource(CachedFrameSource):
+    """Frames decoded lazily from a list of image files."""
+
+    def __init__(
+        self,
+        paths: list[str | Path],
+        max_cache_bytes: int = 1024**3,
+        prefetch: int = 4,
+        num_workers: int = 2,
+        precision: str = "native",
+    ):
+        self.paths = list(paths)
+        self.precision = precision
+        self.native_frame: tuple[int | None, np.ndarray | None] = (None, None)
+
+        first_frame = self.load(0)
+        super().__init__(
+            first_frame.shape, first_frame.dtype, max_cache_bytes, prefetch, num_workers
+        )
+        self.cache[0] = first_frame
+
+    def __len__(self) -> int:
+        return len(self.paths)
+
+    def load_native(self, t: int) -> np.ndarray:
+        from paw_viewer.io import auto_adjust_array, load_frame_file
+
+        return np.ascontiguousarray(
+            auto_adjust_array(load_frame_file(self.paths[t]))[0]
+        )
+
+    def load(self, t: int) -> np.ndarray:
+        from paw_viewer.io import convert_precision
+
+        return convert_precision(self.load_native(t), self.precision)
+
+    def native_pixel(self, t: int, y: int, x: int) -> np.ndarray:
+        """Read exact values of a pixel, decoding the file again for reduced precision."""
+        if self.precision == "native":
+            return self.frame(t)[y, x]
+        if self.native_frame[0] != t:
+            self.native_frame = (t, self.load_native(t))
+        return self.native_frame[1][y, x]
+
+    def read_proxy(self, t: int, factor: int) -> np.ndarray:
+        """Decode a reduced frame directly, if the frame is not cached and OpenCV supports it."""
+        from paw_viewer.io import (
+            auto_adjust_array,
+            convert_precision,
+            load_reduced_image,
+        )
+
+        with self.lock:
+            frame = self.cache.get(t)
+        if frame is None:
+            reduced = load_reduced_image(
+                self.paths[t], factor, grayscale=self.frame_shape[-1] == 1
+            )
+            if reduced is not None:
+                reduced = np.ascontiguousarray(auto_adjust_array(reduced)[0])
+                return convert_precision(reduced, self.precision)
+            frame = self.peek(t)
+        return np.ascontiguousarray(frame[::factor, ::factor])
+
+
+class TiffStackSource(CachedFrameSource):
+    """
+    Pages of a multi-page TIFF file (e.g. a microscopy stack) decoded on demand.
+
+    The offsets of all pages are indexed once from the memory-mapped file (see `tiff_page_offsets`).
+    Uncompressed pages are read directly at their offset, other pages are decoded with OpenCV.
+    The bit depth of the pages is preserved, unless a reduced `precision` is requested
+    for floating-point pages (see `convert_precision`).
+    """
+
+    def __init__(
+        self,
+        path: str | Path,
+        max_cache_bytes: int = 1024**3,
+        prefetch: int = 8,
+        num_workers: int = 2,
+        precision: str = "native",
+    ):
+        from paw_viewer.io import tiff_page_offsets
+
+        self.path = Path(path)
+        self.precision = precision
+        self.native_frame: tuple[int | None, np.ndarray | None] = (None, None)
+        self.data = np.memmap(self.path, dtype=np.uint8, mode="r")
+        self.byte_order, self.bigtiff, self.page_offsets = tiff_page_offsets(self.data)
+        logging.info(f"Indexed {len(self.page_offsets)} pages of {self.path}")
+
+        first_frame = self.load(0)
+        super().__init__(
+            first_frame.shape, first_frame.dtype, max_cache_bytes, prefetch, num_workers
+        )
+        self.cache[0] = first_frame
+
+    def __len__(self) -> int:
+        return len(self.page_offsets)
+
+    def read_page(self, t: int, step: int = 1) -> np.ndarray:
+        """
+        Read every `step`-th row and column of a page, at native precision.
+        Uncompressed pages are read in place, so only the sampled rows are touched.
+        """
+        from paw_viewer.io import (
+            auto_adjust_array,
+            load_tiff_page,
+            read_tiff_tags,
+            read_uncompressed_tiff_page,
+        )
+
+        tags = read_tiff_tags(
+            self.data, self.byte_order, self.bigtiff, self.page_offsets[t]
+        )
+        page = read_uncompressed_tiff_page(self.data, self.byte_order, tags, step)
+        if page is None:
+            page = load_tiff_page(self.path, t)[::step, ::step]
+        elif page.shape[-1] == 1:
+            page = page[..., 0]
+        return np.ascontiguousarray(auto_adjust_array(page)[0])
+
+    def load(self, t: int) -> np.ndarray:
+        from paw_viewer.io import convert_precision
+
+        return convert_precision(self.read_page(t), self.precision)
+
+    def native_pixel(self, t: int, y: int, x: int) -> np.ndarray:
+        """Read exact values of a pixel, reading the page again for reduced precision."""
+        if self.precision == "native":
+            return self.frame(t)[y, x]
+        if self.native_frame[0] != t:
+            self.native_frame = (t, self.read_page(t))
+        return self.native_frame[1][y, x]
+
+    def read_proxy(self, t: int, factor: int) -> np.ndarray:
+        from paw_viewer.io import convert_precision
+
+        with self.lock:
+            frame = self.cache.get(t)
+        if frame is not None:
+            return np.ascontiguousarray(frame[::factor, ::factor])
+        return convert_precision(self.read_page(t, factor), self.precision)
+
+
+class CompressedFrameStore(CachedFrameSource):
+    """
+    Frames kept compressed in RAM, e.g. for long videos that don't fit decoded.
+
+    With the default "zlib" codec, compression is lossless. Channels are stored as separate
+    planes, and with `keyframe_interval`, frames between keyframes are stored as differences
+    from the previous keyframe, which compress much better for static shots.
+    The "jpeg" codec (OpenCV, uint8 only) is lossy, but about an order of magnitude smaller.
+
+    RGB frames are stored without alpha and returned with an opaque alpha channel.
+    Single-channel frames are only supported by the "zlib" codec.
+    Frames are compressed on the worker threads (see `extend`), which decode them during playback.
+    """
+
+    def __init__(
+        self,
+        frame_shape: tuple[int, ...],
+        dtype=np.uint8,
+        codec: str = "zlib",
+        level: int = 1,
+        keyframe_interval: int = 0,
+        jpeg_quality: int = 95,
+        **cache_kwargs,
+    ):
+        self.check_frames(frame_shape, dtype, codec)
+        H, W, C = frame_shape
+        super().__init__((H, W, 4 if C == 3 else C), dtype, **cache_kwargs)
+        self.stored_shape = (H, W, C)
+        self.codec = codec
+        self.level = level
+        # Differences of floats are not exact, so only integer frames use keyframes
+        is_integer = np.issubdtype(self.dtype, np.integer)
+        self.keyframe_interval = (
+            keyframe_interval if codec == "zlib" and is_integer else 0
+        )
+        self.jpeg_quality = jpeg_quality
+        self.chunks: list[bytes] = []
+        self.num_bytes = 0
+        self.last_keyframe: np.ndarray | None = None
+
+    @staticmethod
+    def check_frames(frame_shape: tuple[int, ...], dtype, codec: str):
+        """Raise a ValueError if frames of this shape and dtype can't be stored with `codec`."""
+        if codec not in ("zlib", "jpeg"):
+            raise ValueError(f"Unsupported codec {codec}")
+        if len(frame_shape) != 3 or frame_shape[-1] not in (1, 3, 4):
+            raise ValueError(
+                f"Expected single-channel, RGB or RGBA frames, got shape {frame_shape}"
+            )
+        if codec == "jpeg" and (np.dtype(dtype) != np.uint8 or frame_shape[-1] == 1):
+            raise ValueError("The jpeg codec only supports uint8 RGB(A) frames")
+
+    @classmethod
+    def from_frames(cls, frames, **kwargs) -> "CompressedFrameStore":
+        """
+        Compress frames, e.g. a generator decoding a video, without holding all of them
+        decoded at once (see `extend`).
+        """
+        frames = iter(frames)
+        first_frame = np.asarray(next(frames))
+        store = cls(first_frame.shape, first_frame.dtype, **kwargs)
+        store.extend(itertools.chain([first_frame], frames))
+        return store
+
+    def __len__(self) -> int:
+        return len(self.chunks)
+
+    def is_keyframe(self, t: int) -> bool:
+        return self.keyframe_interval <= 0 or t % self.keyframe_interval == 0
+
+    def append(self, frame: np.ndarray):
+        self.add_chunk(self.compress(self.prepare(frame, len(self.chunks))))
+
+    def extend(self, frames, max_pending: int = 8):
+        """
+        Append frames, compressing them on the worker threads while the next ones are decoded.
+        At most `max_pending` decoded frames wait for compression at a time.
+        """
+        pending = deque()
+        for t, frame in enumerate(frames, len(self.chunks)):
+            data = self.prepare(frame, t)
+            pending.append(self.executor.submit(self.compress, data))
+            if len(pending) >= max_pending:
+                self.add_chunk(pending.popleft().result())
+        while pending:
+            self.add_chunk(pending.popleft().result())
+
+    def prepare(self, frame: np.ndarray, t: int) -> np.ndarray:
+        """Get the data to compress for frame `t`, i.e. the difference from its keyframe."""
+        frame = np.asarray(frame, dtype=self.dtype)
+        if frame.shape != self.stored_shape:
+            raise ValueError(
+                f"Expected frame of shape {self.stored_shape}, got {frame.shape}"
+            )
+        if self.codec == "jpeg":
+            return frame
+        if self.is_keyframe(t):
+            self.last_keyframe = frame
+            return frame
+        # Differences wrap around for integers, so they are still lossless
+        return frame - self.last_keyframe
+
+    def compress(self, data: np.ndarray) -> bytes:
+        if self.codec == "jpeg":
+            import cv2
+
+            ok, encoded = cv2.imencode(
+                ".jpg",
+                cv2.cvtColor(data[..., :3], cv2.COLOR_RGB2BGR),
+                [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality],
+            )
+            if not ok:
+                raise ValueError(f"Failed to encode a frame of shape {data.shape}")
+            return encoded.tobytes()
+        # Planar layout compresses noticeably better than interleaved channels
+        planes = np.ascontiguousarray(data.transpose(2, 0, 1))
+        return zlib.compress(planes, self.level)
+
+    def add_chunk(self, chunk: bytes):
+        self.chunks.append(chunk)
+        self.num_bytes += len(chunk)
+
+    def decode(self, t: int) -> np.ndarray:
+        """Decode a stored frame, without adding the alpha channel."""
+        chunk = self.chunks[t]
+        if self.codec == "jpeg":
+            import cv2
+
+            encoded = np.frombuffer(chunk, np.uint8)
+            return cv2.cvtColor(
+                cv2.imdecode(encoded, cv2.IMREAD_COLOR), cv2.COLOR_BGR2RGB
+            )
+
+        H, W, C = self.stored_shape
+        planes = np.frombuffer(zlib.decompress(chunk), self.dtype).reshape(C, H, W)
+        data = planes.transpose(1, 2, 0)
+        if self.is_keyframe(t):
+            return data
+        keyframe_index = t - t % self.keyframe_interval
+        with self.lock:
+            keyframe = self.cache.get(keyframe_index)
+        keyframe = (
+            keyframe[..., :C] if keyframe is not None else self.decode(keyframe_index)
+        )
+        return data + keyframe
+
+    def read_proxy(self, t: int, factor: int) -> np.ndarray:
+        """JPEG frames are decoded directly at a reduced size, if OpenCV supports the factor."""
+        import cv2
+
+        flags = {
+            2: cv2.IMREAD_REDUCED_COLOR_2,
+            4: cv2.IMREAD_REDUCED_COLOR_4,
+            8: cv2.IMREAD_REDUCED_COLOR_8,
+        }.get(factor)
+        with self.lock:
+            is_cached = t in self.cache
+        if self.codec != "jpeg" or flags is None or is_cached:
+            return super().read_proxy(t, factor)
+        encoded = np.frombuffer(self.chunks[t], np.uint8)
+        rgb = cv2.cvtColor(cv2.imdecode(encoded, flags), cv2.COLOR_BGR2RGB)
+        frame = np.empty((*rgb.shape[:2], 4), self.dtype)
+        frame[..., :3] = rgb
+        frame[..., 3] = 255
+        return frame
+
+    def load(self, t: int) -> np.ndarray:
+        data = self.decode(t)
+        frame = np.empty(self.frame_shape, self.dtype)
+        frame[..., : data.shape[-1]] = data
+        if data.shape[-1] == 3:
+            frame[..., 3] = (
+                np.iinfo(self.dtype).max
+                if np.issubdtype(self.dtype, np.integer)
+                else 1.0
+            )
+        return frame
+
+
+class ReducedPrecisionSource:
+    """
+    Frames stored at a reduced precision, e.g. float16 instead of float32.
+
+    Exact values are only needed for inspecting single pixels, so they are read lazily
+    with `read_native_frame(t)`, typically from a memory-mapped file.
+    """
+
+    def __init__(self, frames: np.ndarray, read_native_frame):
+        self.frames = frames
+        self.read_native_frame = read_native_frame
+        self.native_frame: tuple[int | None, np.ndarray | None] = (None, None)
+
+    @property
+    def shape(self) -> tuple[int, ...]:
+        return self.frames.shape
+
+    @property
+    def dtype(self) -> np.dtype:
+        return self.frames.dtype
+
+    @property
+    def ndim(self) -> int:
+        return self.frames.ndim
+
+    @property
+    def nbytes(self) -> int:
+        return self.frames.nbytes
+
+    def __len__(self) -> int:
+        return len(self.frames)
+
+    def __getitem__(self, key) -> np.ndarray:
+        return self.frames[key]
+
+    def native_pixel(self, t: int, y: int, x: int) -> np.ndarray:
+        if self.native_frame[0] != t:
+            self.native_frame = (t, self.read_native_frame(t))
+        return self.native_frame[1][y, x]
+
+
+# Frames are hashed in blocks of this many words, so the weights have a fixed size
+HASH_BLOCK_WORDS = 64 * 1024
+# Odd 64-bit multiplier mixing the hashes of consecutive blocks, so their order matters
+HASH_BLOCK_MIX = np.uint64(0x9E3779B97F4A7C15)
+
+
+@functools.cache
+def hash_weights() -> np.ndarray:
+    # Fixed odd multipliers, so hashes are comparable between sources
+    rng = np.random.default_rng(0)
+    weights = rng.integers(0, 2**63, size=HASH_BLOCK_WORDS, dtype=np.uint64)
+    return weights | np.uint64(1)
+
+
+def frame_hashes(frames: np.ndarray, chunk_bytes: int = 64 * 1024**2) -> np.ndarray:
+    """
+    Compute a 64-bit checksum of every frame with a vectorized multiply-add hash.
+
+    Each block of `HASH_BLOCK_WORDS` frame words is a dot product with fixed random weights,
+    accumulated in 64 bits (wrapping around), and the block hashes are chained.
+    This is not cryptographic - equal hashes must still be confirmed by comparing the data.
+    """
+    T = frames.shape[0]
+    frame_nbytes = frames[:1].nbytes
+    word_dtype = np.uint32 if frame_nbytes % 4 == 0 else np.uint8
+    num_words = frame_nbytes // np.dtype(word_dtype).itemsize
+    weights = hash_weights()
+
+    hashes = np.empty(T, dtype=np.uint64)
+    # Blocks are widened to 64 bits, which bounds the frames hashed at once
+    block_bytes = 8 * min(num_words, HASH_BLOCK_WORDS)
+    chunk_frames = max(1, chunk_bytes // max(1, block_bytes))
+    for start in range(0, T, chunk_frames):
+        chunk = np.ascontiguousarray(frames[start : start + chunk_frames])
+        # Flattened first, as the last axis alone may be narrower than a word (e.g. 1 channel)
+        words = chunk.reshape(len(chunk), -1).view(word_dtype)
+        chunk_hashes = np.zeros(len(chunk), dtype=np.uint64)
+        for block_start in range(0, num_words, HASH_BLOCK_WORDS):
+            block = words[:, block_start : block_start + HASH_BLOCK_WORDS]
+            block_hashes = np.einsum(
+                "ij,j->i", block.astype(np.uint64), weights[: block.shape[1]]
+            )
+            chunk_hashes = chunk_hashes * HASH_BLOCK_MIX + block_hashes
+        hashes[start : start + len(chunk)] = chunk_hashes
+    return hashes
+
+
+class DeduplicatedSource:
+    """
+    Frames stored once per unique content.
+
+    `index[t]` is the position of frame `t` in `unique_frames`, which may be shared
+    with other sources. Unique frames are either an array or a list of views
+    into the original arrays (see `deduplicate_sources`).
+    Frames with equal content also share a texture (see `frame_key`).
+    """
+
+    def __init__(self, unique_frames: np.ndarray | list[np.ndarray], index: np.ndarray):
+        self.unique_frames = unique_frames
+        self.index = index
+
+    @property
+    def shape(self) -> tuple[int, ...]:
+        return (len(self.index), *self.unique_frames[0].shape)
+
+    @property
+    def dtype(self) -> np.dtype:
+        return self.unique_frames[0].dtype
+
+    @property
+    def ndim(self) -> int:
+        return 1 + self.unique_frames[0].ndim
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def __getitem__(self, key) -> np.ndarray:
+        if not isinstance(key, tuple):
+            key = (key,)
+        t, rest = key[0], key[1:]
+        if isinstance(t, (int, np.integer)):
+            return self.unique_frames[self.index[t]][rest]
+        indices = self.index[t]
+        if len(indices) == 0:
+            return np.empty((0, *self.shape[1:]), dtype=self.dtype)[
+                (slice(None), *rest)
+            ]
+        frames = np.stack([self.unique_frames[u] for u in indices])
+        return frames[(slice(None), *rest)]
+
+    def frame_key(self, t: int) -> tuple:
+        return ("unique", id(self.unique_frames), int(self.index[t]))
+
+
+def deduplicate_sources(sources: dict, max_unique_ratio: float = 0.5) -> dict:
+    """
+    Store frames with identical content once, both within and across sources.
+
+    Only numpy arrays are deduplicated, and only if there are any duplicates.
+    Memory-mapped arrays are skipped, as their unique frames would be copied to RAM.
+    Sources with the same frame shape and dtype share their unique frames.
+
+    Unique frames are only copied into a compact array if at most `max_unique_ratio`
+    of the frames are unique, as the copy temporarily needs memory on top of the original
+    arrays. Otherwise they are kept as views, and only textures are shared.
+    """
+    groups: dict[tuple, list[str]] = {}
+    for name, source in sources.items():
+        if (
+            isinstance(source, np.ndarray)
+            and not isinstance(source, np.memmap)
+            and source.ndim == 4
+        ):
+            groups.setdefault((source.shape[1:], source.dtype), []).append(name)
+
+    sources = dict(sources)
+    for names in groups.values():
+        arrays = [sources[name] for name in names]
+        hashes = np.concatenate([frame_hashes(array) for array in arrays])
+        frames = [(array, t) for array in arrays for t in range(len(array))]
+
+        # Candidates with equal hashes are compared, so collisions can't merge different frames
+        unique: list[tuple[np.ndarray, int]] = []
+        unique_by_hash: dict[int, list[int]] = {}
+        index = np.empty(len(frames), dtype=np.intp)
+        for i, (h, (array, t)) in enumerate(zip(hashes.tolist(), frames)):
+            candidates = unique_by_hash.setdefault(h, [])
+            for u in candidates:
+                other_array, other_t = unique[u]
+                if np.array_equal(array[t], other_array[other_t]):
+                    index[i] = u
+                    break
+            else:
+                index[i] = len(unique)
+                candidates.append(len(unique))
+                unique.append((array, t))
+
+        if len(unique) == len(frames):
+            continue
+        logging.info(
+            f"Deduplicated {len(frames)} frames of {len(names)} sources"
+            f" to {len(unique)} unique frames"
+        )
+        unique_frames = [array[t] for array, t in unique]
+        if len(unique) <= max_unique_ratio * len(frames):
+            unique_frames = np.stack(unique_frames)
+        start = 0
+        for name, array in zip(names, arrays):
+            sources[name] = DeduplicatedSource(
+                unique_frames, index[start : start + len(array)]
+            )
+            start += len(array)
+    return sources
+
+
+class RegionSource(CachedFrameSource):
+    """
+    A `LoadRegion` of a lazy source (e.g. for `paw --crop`), cropped and scaled frame by frame.
+    Only the frames of the region are ever read from `source`: they are read without caching
+    or prefetching in `source` (see `CachedFrameSource.peek`), and prefetched here instead.
+    """
+
+    def __init__(self, source, region, **cache_kwargs):
+        self.source = source
+        self.region = region
+        self.indices = region.frame_indices(len(source))
+        if len(self.indices) == 0:
+            raise ValueError(
+                f"No frames in [{region.start}, {region.end}) of {len(source)} frames"
+            )
+        first_frame = self.load(0)
+        super().__init__(first_frame.shape, first_frame.dtype, **cache_kwargs)
+        self.cache[0] = first_frame
+
+    def __len__(self) -> int:
+        return len(self.indices)
+
+    def load(self, t: int) -> np.ndarray:
+        from paw_viewer.io import crop_frame
+
+        index = self.indices[t]
+        peek = getattr(self.source, "peek", None)
+        frame = peek(index) if peek is not None else self.source[index]
+        return np.ascontiguousarray(crop_frame(frame, self.region))
+
+
+class ChannelView:
+    """
+    Lazy view of a `[T, H, W, C]` or `[T, C, H, W]` array with any number of channels.
+
+    Only the selected channels (1 to 3) of displayed frames are copied and uploaded,
+    so e.g. a 64-channel activation tensor is never converted as a whole.
+    In `mosaic` mode, all channels of a frame are tiled into a single-channel grid instead.
+    """
+
+    def __init__(
+        self,
+        array: np.ndarray,
+        channel_axis: int = -1,
+        channels: tuple[int, ...] = (0,),
+        mosaic: bool = False,
+    ):
+        self.array = array
+        # Axis of a single frame, i.e. 0 for CHW and 2 for HWC
+        self.channel_axis = channel_axis % 3
+        self.channels = list(channels)
+        self.mosaic = mosaic
+
+    @property
+    def num_channels(self) -> int:
+        return self.array.shape[1 + self.channel_axis]
+
+    def mosaic_grid(self) -> tuple[int, int]:
+        columns = math.ceil(math.sqrt(self.num_channels))
+        return math.ceil(self.num_channels / columns), columns
+
+    @property
+    def shape(self) -> tuple[int, ...]:
+        H, W = (s for i, s in enumerate(self.array.shape[1:]) if i != self.channel_axis)
+        if self.mosaic:
+            rows, columns = self.mosaic_grid()
+            return (len(self.array), rows * H, columns * W, 1)
+        return (len(self.array), H, W, len(self.channels))
+
+    @property
+    def dtype(self) -> np.dtype:
+        return self.array.dtype
+
+    @property
+    def ndim(self) -> int:
+        return 4
+
+    def __len__(self) -> int:
+        return len(self.array)
+
+    def __getitem__(self, key) -> np.ndarray:
+        if not isinstance(key, tuple):
+            key = (key,)
+        t, index = key[0], key[1:]
+        if isinstance(t, slice):
+            return np.stack(
+                [self.frame(i, index) for i in range(*t.indices(len(self)))]
+            )
+        return self.frame(t, index)
+
+    def frame(self, t: int, index: tuple = ()) -> np.ndarray:
+        frame = np.moveaxis(self.array[t], self.channel_axis, -1)
+        if self.mosaic:
+            return self.tile_channels(frame)[index]
+        # Spatial indices are applied to the view first, so only the needed pixels are copied
+        frame = np.ascontiguousarray(frame[index[:2]][..., self.channels])
+        return frame[(Ellipsis, *index[2:])] if len(index) > 2 else frame
+
+    def tile_channels(self, frame: np.ndarray) -> np.ndarray:
+        H, W, C = frame.shape
+        rows, columns = self.mosaic_grid()
+        mosaic = np.zeros((rows * H, columns * W, 1), dtype=frame.dtype)
+        tiles = mosaic.reshape(rows, H, columns, W)
+        for c in range(C):
+            tiles[c // columns, :, c % columns, :] = frame[..., c]
+        return mosaic
+
+    def select(self, first: int | tuple[int, ...], count: int | None = None):
+        """
+        Select the channels to show - either a tuple of 1 to 3 channel indices,
+        or `count` consecutive channels starting at `first`, wrapping around.
+        """
+        if isinstance(first, tuple):
+            if not 1 <= len(first) <= 3:
+                raise ValueError(f"Expected 1 to 3 channels, got {len(first)}")
+            if not all(-self.num_channels <= c < self.num_channels for c in first):
+                raise ValueError(
+                    f"Channels {first} out of range of {self.num_channels}"
+                )
+            self.channels = [c % self.num_channels for c in first]
+            return
+        count = min(count or len(self.channels), 3, self.num_channels)
+        self.channels = [(first + i) % self.num_channels for i in range(count)]
+
+    def describe(self) -> str:
+        if self.mosaic:
+            return f"all {self.num_channels} channels"
+        channels = ",".join(str(c) for c in self.channels)
+        return f"channels {channels} of {self.num_channels}"
+
+
+class ComplexSource:
+    """
+    Complex frames exposed as two float channels, the real and the imaginary part.
+
+    Views like the magnitude or phase are computed in the shader (see `COMPLEX_VIEWS`),
+    so only the frames being displayed are converted.
+    """
+
+    is_complex = True
+
+    def __init__(self, array: np.ndarray):
+        # [T, H, W, 1] arrays (e.g. from `auto_adjust_array`) are stored as [T, H, W]
+        self.array = array[..., 0] if array.ndim == 4 else array
+
+    @property
+    def shape(self) -> tuple[int, ...]:
+        return (*self.array.shape, 2)
+
+    @property
+    def dtype(self) -> np.dtype:
+        return self.array.real.dtype
+
+    @property
+    def ndim(self) -> int:
+        return 4
+
+    def __len__(self) -> int:
+        return len(self.array)
+
+    def __getitem__(self, key) -> np.ndarray:
+        values = self.array[key]
+        return np.stack((values.real, values.imag), axis=-1)
+
+
+def wrap_complex_sources(sources: dict) -> dict:
+    """Replace complex arrays with `ComplexSource` sources."""
+    return {
+        name: ComplexSource(source)
+        if isinstance(source, np.ndarray) and np.iscomplexobj(source)
+        else source
+        for name, source in sources.items()
+    }
+
+
+def is_channel_cube(shape: tuple[int, ...]) -> bool:
+    """
+    Check if a 3D array is a single `[H, W, C]` frame with more than 4 channels
+    (e.g. a hyperspectral cube), rather than a `[T, H, W]` grayscale video.
+
+    Cubes are recognized by square frames (equal first two axes),
+    or by having fewer channels than both rows and columns.
+    """
+    if len(shape) != 3 or shape[2] <= 4:
+        return False
+    H, W, C = shape
+    return H == W != C or C < min(H, W)
+
+
+def needs_channel_view(array) -> bool:
+    """Check if an array has leading dimensions before time or more than 4 channels."""
+    if not isinstance(array, np.ndarray):
+        return False
+    return (
+        array.ndim > 4
+        or (array.ndim == 4 and min(array.shape[1], array.shape[3]) > 4)
+        or is_channel_cube(array.shape)
+    )
+
+
+def guess_channel_axis(frame_shape: tuple[int, int, int]) -> int:
+    """
+    Guess whether a frame is CHW (returns 0) or HWC (returns 2).
+
+    Square frames are recognized by their two equal spatial axes. Otherwise, channels are
+    assumed to be last, unless the first axis is the smallest one.
+    """
+    first, middle, last = frame_shape
+    if middle == last != first:
+        return 0
+    if first == middle != last:
+        return 2
+    return 0 if first < min(middle, last) else 2
+
+
+def channel_views(name: str, array: np.ndarray) -> dict[str, ChannelView]:
+    """
+    Split an array of shape `[..., T, H, W, C]` (or `[..., T, C, H, W]`) into
+    `ChannelView` sources, one per index of the leading dimensions. All of them are views.
+    A `[H, W, C]` channel cube is a single frame (see `is_channel_cube`).
+
+    See `guess_channel_axis` for how the channel axis is picked.
+    """
+    if array.ndim == 3:
+        return {name: ChannelView(array[np.newaxis], 2, (0,))}
+    frame_shape = array.shape[-3:]
+    channel_axis = guess_channel_axis(frame_shape)
+    num_channels = frame_shape[channel_axis]
+    channels = range(num_channels) if num_channels <= 3 else (0,)
+    if array.ndim == 4:
+        return {name: ChannelView(array, channel_axis, channels)}
+    return {
+        f"{name}[{','.join(str(i) for i in index)}]": ChannelView(
+            array[index], channel_axis, channels
+        )
+        for index in np.ndindex(array.shape[:-4])
+    }
+
+
+def expand_channel_sources(sources: dict) -> dict:
+    """Replace arrays that `auto_adjust_array` can't handle with `ChannelView` sources."""
+    expanded = {}
+    for name, source in sources.items():
+        if needs_channel_view(source):
+            views = channel_views(name, source)
+            logging.info(
+                f"Showing array {name!r} of shape {source.shape} as {len(views)} channel view(s)"
+            )
+            expanded.update(views)
+        else:
+            expanded[name] = source
+    return expanded
@@ -0,0 +1,210 @@
+import logging
+import math
+import queue
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pyglet
+from pyglet.gl import GL_LINEAR, GL_RGBA8
+
+from paw_viewer.animation import Animation
+
+
+def coarse_to_fine_order(n: int) -> list[int]:
+    """Order indices so that every prefix covers the whole range as evenly as possible."""
+    order = []
+    seen = set()
+    step = 1 << max(0, (n - 1).bit_length())
+    while step >= 1:
+        for i in range(0, n, step):
+            if i not in seen:
+                seen.add(i)
+                order.append(i)
+        step //= 2
+    return order
+
+
+def decimated_read(frame, height: int, width: int) -> np.ndarray:
+    """Read only the pixels needed for a nearest-neighbor downscaled frame."""
+    H, W = frame.shape[:2]
+    ys = np.linspace(0, H - 1, height).round().astype(np.intp)
+    xs = np.linspace(0, W - 1, width).round().astype(np.intp)
+    return np.asarray(frame[ys][:, xs])
+
+
+class ThumbnailAtlas:
+    """
+    Thumbnails of a single source packed into one texture.
+
+    The atlas stores up to `max_thumbnails` evenly spaced frames.
+    Thumbnails are generated on worker threads and uploaded on the main thread,
+    because OpenGL calls are only allowed from the thread that owns the context.
+    """
+
+    def __init__(
+        self,
+        animation: Animation,
+        source_index: int,
+        executor: ThreadPoolExecutor,
+        thumbnail_height: int = 72,
+        max_thumbnails: int = 256,
+        max_atlas_width: int = 4096,
+    ):
+        self.animation = animation
+        self.source_index = source_index
+        self.executor = executor
+
+        size = animation.source_size(source_index)
+        self.thumbnail_height = thumbnail_height
+        self.thumbnail_width = max(
+            1, min(4 * thumbnail_height, round(thumbnail_height * size.x / size.y))
+        )
+
+        num_frames = animation.num_frames
+        self.frame_step = math.ceil(num_frames / max_thumbnails)
+        self.num_thumbnails = math.ceil(num_frames / self.frame_step)
+        self.columns = max(
+            1, min(self.num_thumbnails, max_atlas_width // self.thumbnail_width)
+        )
+        self.rows = math.ceil(self.num_thumbnails / self.columns)
+
+        self.texture = pyglet.image.Texture.create(
+            width=self.columns * self.thumbnail_width,
+            height=self.rows * self.thumbnail_height,
+            min_filter=GL_LINEAR,
+            mag_filter=GL_LINEAR,
+            internalformat=GL_RGBA8,
+        )
+        self.regions = [
+            self.texture.get_region(
+                (slot % self.columns) * self.thumbnail_width,
+                (slot // self.columns) * self.thumbnail_height,
+                self.thumbnail_width,
+                self.thumbnail_height,
+            )
+            for slot in range(self.num_thumbnails)
+        ]
+        self.ready = np.zeros(self.num_thumbnails, dtype=bool)
+
+        self.pending: queue.SimpleQueue[tuple[int, np.ndarray]] = queue.SimpleQueue()
+        self.futures = {
+            slot: executor.submit(self._generate, slot)
+            for slot in coarse_to_fine_order(self.num_thumbnails)
+        }
+
+    def _generate(self, slot: int):
+        t = slot * self.frame_step
+        # Proxies are the cheapest data available. Lazy sources read them without caching
+        # or prefetching (see `CachedFrameSource.peek`), so playback frames are not evicted,
+        # but sources without a reduced decoder still decode each frame in full once.
+        frame = self.animation.proxy_frame(self.source_index, t)
+        thumbnail = decimated_read(frame, self.thumbnail_height, self.thumbnail_width)
+        thumbnail = self.animation.tone_map_to_uint8(thumbnail, self.source_index)
+        # Textures are stored bottom-up
+        self.pending.put((slot, np.ascontiguousarray(thumbnail[::-1])))
+
+    def upload_pending(self) -> bool:
+        """Upload generated thumbnails to the atlas. Returns True if anything changed."""
+        changed = False
+        while True:
+            try:
+                slot, thumbnail = self.pending.get_nowait()
+            except queue.Empty:
+                return changed
+            region = self.regions[slot]
+            image = pyglet.image.ImageData(
+                self.thumbnail_width, self.thumbnail_height, "RGBA", thumbnail.tobytes()
+            )
+            self.texture.blit_into(image, region.x, region.y, 0)
+            self.ready[slot] = True
+            changed = True
+
+    @property
+    def is_complete(self) -> bool:
+        return bool(self.ready.all())
+
+    def slot_for_frame(self, t: int) -> int:
+        return min(t // self.frame_step, self.num_thumbnails - 1)
+
+    def region_for_frame(self, t: int) -> pyglet.image.TextureRegion | None:
+        """Get the closest generated thumbnail for a given frame."""
+        slot = self.slot_for_frame(t)
+        if self.ready[slot]:
+            return self.regions[slot]
+        ready_slots = np.flatnonzero(self.ready)
+        if len(ready_slots) == 0:
+            return None
+        nearest = ready_slots[np.abs(ready_slots - slot).argmin()]
+        return self.regions[nearest]
+
+    def cancel(self):
+        for future in self.futures.values():
+            future.cancel()
+
+    def resume(self):
+        """Resubmit thumbnails that were cancelled before being generated."""
+        for slot, future in self.futures.items():
+            if future.cancelled():
+                self.futures[slot] = self.executor.submit(self._generate, slot)
+
+    def delete(self):
+        self.cancel()
+        self.texture.delete()
+
+
+class Thumbnails:
+    """Lazily creates thumbnail atlases for the active source of an animation."""
+
+    def __init__(self, animation: Animation, num_workers: int = 2, **atlas_kwargs):
+        self.animation = animation
+        self.atlas_kwargs = atlas_kwargs
+        self.executor = ThreadPoolExecutor(
+            max_workers=num_workers, thread_name_prefix="paw-thumbnails"
+        )
+        self.atlases: dict[int, ThumbnailAtlas] = {}
+        self.current_source: int | None = None
+
+    @property
+    def atlas(self) -> ThumbnailAtlas:
+        source_index = self.animation.active_source
+        if source_index != self.current_source:
+            # Thumbnails of other sources are no longer urgent
+            for atlas in self.atlases.values():
+                atlas.cancel()
+            if source_index in self.atlases:
+                self.atlases[source_index].resume()
+            else:
+                logging.debug(f"Generating thumbnails for source {source_index}")
+                self.atlases[source_index] = ThumbnailAtlas(
+                    self.animation, source_index, self.executor, **self.atlas_kwargs
+                )
+            self.current_source = source_index
+        return self.atlases[source_index]
+
+    def is_generating(self) -> bool:
+        """Whether thumbnails of the active source are still being generated (without starting it)."""
+        atlas = self.atlases.get(self.animation.active_source)
+        return atlas is not None and not atlas.is_complete
+
+    def reset(self, source_index: int):
+        """Regenerate thumbnails of a source after its content changed."""
+        atlas = self.atlases.pop(source_index, None)
+        if atlas is not None:
+            atlas.delete()
+        if source_index == self.current_source:
+            self.current_source = None
+
+    def upload_pending(self) -> bool:
+        changed = False
+        for atlas in self.atlases.values():
+            changed |= atlas.upload_pending()
+        return changed
+
+    def region_for_frame(self, t: int) -> pyglet.image.TextureRegion | None:
+        return self.atlas.region_for_frame(t)
+
+    def close(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        for atlas in self.atlases.values():
+            atlas.delete()
+        self.atlases.clear()
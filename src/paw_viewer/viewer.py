@@ -1,29 +1,70 @@
+import json
 import logging
 import os
+import time
 from pathlib import Path
 
 import numpy as np
 import pyglet
 
 from paw_viewer import io
-from paw_viewer.animation import Animation
+from paw_viewer.animation import Animation, CompareMode
+from paw_viewer.column import ColumnLayout
 from paw_viewer.frame_view import FrameView
 from paw_viewer.help_overlay import HelpOverlay
+from paw_viewer.readout import PixelReadout
 from paw_viewer.scalar_widget import ScalarWidget
-from paw_viewer.column import ColumnLayout
 from paw_viewer.selections import TimeRange
 from paw_viewer.slider import Slider
+from paw_viewer.sources import expand_channel_sources
+from paw_viewer.thumbnails import Thumbnails
+
+# Events which may change what is shown, so the window is redrawn after them
+REDRAW_EVENTS = frozenset(
+    (
+        "on_key_press",
+        "on_key_release",
+        "on_text",
+        "on_text_motion",
+        "on_text_motion_select",
+        "on_mouse_motion",
+        "on_mouse_press",
+        "on_mouse_release",
+        "on_mouse_drag",
+        "on_mouse_scroll",
+        "on_mouse_enter",
+        "on_mouse_leave",
+        "on_resize",
+        "on_expose",
+        "on_show",
+        "on_activate",
+        "on_deactivate",
+    )
+)
 
 
 class ViewerWindow(pyglet.window.Window):
+    """
+    The viewer window is only redrawn when something changed - after input events,
+    played back frames or new frames of live sources (see `request_redraw`),
+    so an idle window doesn't use any CPU or GPU time.
+    """
+
     def __init__(
         self,
         animation: Animation,
         caption="paw",
         resizable=True,
         outputs_root: str | Path | None = None,
+        max_redraw_rate: float = 60,
+        live_poll_interval: float = 1 / 30,
         **kwargs,
     ):
+        # Set before creating the window, which already dispatches events
+        self.min_redraw_interval = 1 / max_redraw_rate
+        self.last_draw_time = -np.inf
+        self.redraw_scheduled = False
+
         super().__init__(caption=caption, resizable=resizable, **kwargs)
 
         if outputs_root is None:
@@ -36,6 +77,7 @@ class ViewerWindow(pyglet.window.Window):
         pyglet.gl.glClearColor(0.05, 0.08, 0.06, 1)
 
         self.animation = animation
+        self.animation.push_handlers(on_frame_change=self.on_frame_change)
         self.key_state = pyglet.window.key.KeyStateHandler()
         self.push_handlers(self.key_state)
 
@@ -51,6 +93,24 @@ class ViewerWindow(pyglet.window.Window):
         def on_source_change(source):
             self.update_source_labels()
 
+        @self.frame_view.event
+        def on_view_mode_change():
+            logging.info(
+                f"Switching to {self.animation.colormap} colormap"
+                f", {self.animation.flow_view} flow view"
+                f" and {self.animation.complex_view} complex view"
+            )
+            if self.thumbnails is not None:
+                for i in range(len(self.animation.sources)):
+                    if self.animation.channel_count(i) <= 2:
+                        self.thumbnails.reset(i)
+
+        @self.frame_view.event
+        def on_channels_change(source):
+            if self.thumbnails is not None:
+                self.thumbnails.reset(source)
+            self.frame_view.request_hover_update()
+
         from paw_viewer.vignette import SideVignette
 
         self.side_vignette_margin = 0.2
@@ -62,6 +122,12 @@ class ViewerWindow(pyglet.window.Window):
         )
         self.push_handlers(self.side_vignette)
 
+        # Thumbnail atlases assume a fixed number of frames, so they are skipped for live sources
+        self.thumbnails = (
+            Thumbnails(self.animation)
+            if self.animation.num_frames > 1 and not self.animation.is_live
+            else None
+        )
         self.slider_margin = 200
         self.slider = Slider(
             x=self.slider_margin,
@@ -70,11 +136,15 @@ class ViewerWindow(pyglet.window.Window):
             steps=self.animation.num_frames,
             batch=self.batch,
             parent_group=self.overlay_group,
+            thumbnails=self.thumbnails,
         )
         self.push_handlers(self.slider)
 
-        @self.slider.event
-        def on_change(value, time_range):
+        @self.slider.event("on_change")
+        def on_slider_change(value, time_range):
+            if self.slider.is_dragged:
+                self.animation.scrub()
+                self.animation.follow_latest = False
             self.animation.frame_index = value
             self.animation.set_time_range(time_range)
 
@@ -111,8 +181,8 @@ class ViewerWindow(pyglet.window.Window):
         self.column.add_widget(self.exposure)
         self.push_handlers(self.exposure)
 
-        @self.exposure.event
-        def on_change(value):
+        @self.exposure.event("on_change")
+        def on_exposure_change(value):
             self.animation.exposure = value
 
         self.gamma = ScalarWidget(
@@ -129,57 +199,39 @@ class ViewerWindow(pyglet.window.Window):
         self.column.add_widget(self.gamma)
         self.push_handlers(self.gamma)
 
-        @self.gamma.event
-        def on_change(value):
+        @self.gamma.event("on_change")
+        def on_gamma_change(value):
             self.animation.gamma = value
 
-        self.channel_scalars = {}
-        for c in "RGBA":
-            channel_scalar = ScalarWidget.static_scalar(
-                value=float("nan"),
-                window=self,
-                batch=self.batch,
-                group=self.overlay_group,
-                padding=padding,
-                font_size=font_size - 1,
-                format_string=f" {c}: {{:g}}",
-            )
-            self.column.add_widget(channel_scalar)
-            self.channel_scalars[c] = channel_scalar
-
-        self.x_scalar = ScalarWidget.static_scalar(
-            value=0,
-            window=self,
-            batch=self.batch,
+        self.compare_gain = ScalarWidget(
+            self.animation.compare_gain,
+            0.01,
+            self,
+            self.batch,
             group=self.overlay_group,
+            min_value=0.0,
+            format_string="Diff gain: {:.2f}",
             padding=padding,
-            font_size=font_size - 1,
-            format_string="X: {:d}",
+            font_size=font_size,
         )
-        self.column.add_widget(self.x_scalar)
+        self.column.add_widget(self.compare_gain)
+        self.push_handlers(self.compare_gain)
 
-        self.y_scalar = ScalarWidget.static_scalar(
-            value=0,
-            window=self,
-            batch=self.batch,
+        @self.compare_gain.event("on_change")
+        def on_compare_gain_change(value):
+            self.animation.compare_gain = value
+
+        self.pixel_readout = PixelReadout(
+            self.batch,
             group=self.overlay_group,
             padding=padding,
-            font_size=font_size,
-            format_string="Y: {:d}",
+            font_size=font_size - 1,
         )
-        self.column.add_widget(self.y_scalar)
+        self.column.add_widget(self.pixel_readout)
 
         @self.frame_view.event
         def on_pixel_hover(x, y):
-            self.x_scalar.value = x
-            self.x_scalar.update_label()
-            self.y_scalar.value = y
-            self.y_scalar.update_label()
-
-            values = self.animation.frames[self.animation.frame_index][y, x]
-            for scalar, value in zip(self.channel_scalars.values(), values):
-                scalar.value = value
-                scalar.update_label()
+            self.pixel_readout.update(x, y, self.animation.pixel_value(y, x))
 
         # Set up source switcher
         if len(self.animation.names) > 1:
@@ -210,10 +262,64 @@ class ViewerWindow(pyglet.window.Window):
         )
         self.push_handlers(self.help_overlay)
 
+        # Live sources are checked for new frames without redrawing until they change
+        self.live_poll_interval = live_poll_interval
+        if self.animation.is_live:
+            pyglet.clock.schedule_interval(self.poll_sources, self.live_poll_interval)
+
         self.invalid = False
+        self.request_redraw()
+
+    def dispatch_event(self, event_type, *args):
+        result = super().dispatch_event(event_type, *args)
+        if event_type in REDRAW_EVENTS:
+            self.request_redraw()
+        return result
+
+    def request_redraw(self):
+        """Redraw the window soon, at most `max_redraw_rate` times per second."""
+        if self.redraw_scheduled:
+            return
+        self.redraw_scheduled = True
+        delay = self.last_draw_time + self.min_redraw_interval - time.perf_counter()
+        pyglet.clock.schedule_once(self._redraw, max(delay, 0.0))
+
+    @property
+    def needs_continuous_redraw(self) -> bool:
+        """Whether the shown image keeps changing without input or new frames."""
+        return (
+            self.frame_view.needs_continuous_redraw
+            or self.animation.is_scrubbing
+            or self.slider.needs_redraw
+        )
+
+    def _redraw(self, dt):
+        self.redraw_scheduled = False
+        self.last_draw_time = time.perf_counter()
+        # Pushed handlers (e.g. the slider) draw before `on_draw`, so they must see fresh state
+        self.switch_to()
+        self.update_state()
+        self.draw(dt)
+        if self.needs_continuous_redraw:
+            self.request_redraw()
+
+    def on_frame_change(self, t):
+        self.request_redraw()
+
+    def poll_sources(self, dt):
+        if self.animation.sources_changed():
+            self.request_redraw()
 
     def update_source_labels(self) -> None:
         for i, label in enumerate(self.source_labels):
+            name = self.animation.names[i]
+            if (
+                self.animation.compare_mode != CompareMode.OFF
+                and i == self.animation.reference_source
+            ):
+                label.text = f"{i + 1:>4}. {name} [ref]"
+            else:
+                label.text = f"{i + 1:>4}. {name}"
             index = i - self.animation.active_source
             label.y = self.height // 2 - index * 20
             if i == self.animation.active_source:
@@ -247,11 +353,46 @@ class ViewerWindow(pyglet.window.Window):
 
         return super().on_resize(width, height)
 
-    def on_draw(self):
+    def on_close(self):
+        pyglet.clock.unschedule(self._redraw)
+        pyglet.clock.unschedule(self.poll_sources)
+        self.animation.remove_handlers(on_frame_change=self.on_frame_change)
+        if self.thumbnails is not None:
+            self.thumbnails.close()
+        return super().on_close()
+
+    def update_state(self):
+        """Apply held keys, new frames and the current frame to widgets before drawing them."""
         self.frame_view.handle_keys(self.key_state)
+        self.frame_view.update_hover()
         self.side_vignette.handle_keys(self.key_state)
+        if self.animation.refresh_sources():
+            self.slider.update_total_steps(self.animation.num_frames)
         self.slider.update_step(self.animation.frame_index)
-        self.label.text = f"Zoom: {int(self.frame_view.zoom_level.scale() * 100)}%"
+        status = f"Zoom: {int(self.frame_view.zoom_level.scale() * 100)}%"
+        if self.animation.compare_mode != CompareMode.OFF:
+            status += (
+                f"  Compare: {self.animation.compare_mode.label()}"
+                f" vs {self.animation.reference_source_name() or '<unnamed>'}"
+            )
+        if self.animation.is_complex(self.animation.active_source):
+            _, high = self.animation.value_range(self.animation.active_source)
+            status += f"  Complex: {self.animation.complex_view} (max |z| {high:.3g})"
+        elif self.animation.channel_count(self.animation.active_source) == 2:
+            _, high = self.animation.value_range(self.animation.active_source)
+            status += f"  Flow: {self.animation.flow_view} (max {high:.3g})"
+        elif self.animation.uses_colormap(self.animation.active_source):
+            low, high = self.animation.value_range(self.animation.active_source)
+            status += f"  Colormap: {self.animation.colormap} [{low:.3g}, {high:.3g}]"
+        channel_view = self.animation.channel_view()
+        if channel_view is not None:
+            status += f"  Showing {channel_view.describe()}"
+        if self.animation.yuv_layout(self.animation.active_source):
+            status += f"  {self.animation.frames.describe()}"
+        if self.label.text != status:
+            self.label.text = status
+
+    def on_draw(self):
         self.clear()
         self.view_batch.draw()
         self.batch.draw()
@@ -262,17 +403,24 @@ class ViewerWindow(pyglet.window.Window):
                 coords = self.frame_view.crop_image_coordinates()
                 if coords is not None and coords.crop_area() > 0:
                     t = self.get_time_selection()
+                    # Frames of the source rather than of the timeline, as read by
+                    # `--crop` and `paw extract` and saved with Ctrl+N
+                    frame_range = self.animation.source_frame_range(
+                        self.animation.active_source, t.start, t.end
+                    )
                     coords_dict = {
                         "source": self.animation.active_source_name(),
                         "t": [
-                            t.start,
-                            t.end,
+                            frame_range.start,
+                            frame_range.stop,
                         ],
                         "x": [coords.c1.x, coords.c2.x],
                         "y": [coords.c1.y, coords.c2.y],
                     }
-                    print(f"Crop: {coords_dict}")
-                    self.set_clipboard_text(str(coords_dict))
+                    # Valid JSON, so it can be passed back with `paw --crop`
+                    coords_json = json.dumps(coords_dict)
+                    print(f"Crop: {coords_json}")
+                    self.set_clipboard_text(coords_json)
                 else:
                     print("Nothing to crop - no selection")
             if symbol == pyglet.window.key.C:
@@ -287,15 +435,20 @@ class ViewerWindow(pyglet.window.Window):
                 coords = self.frame_view.crop_image_coordinates()
                 if coords is not None and coords.crop_area() > 0:
                     t = self.get_time_selection()
+                    frame_range = self.animation.source_frame_range(
+                        self.animation.active_source, t.start, t.end
+                    )
                     data = self.animation.frames[
-                        t.start : t.end,
+                        frame_range,
                         coords.c1.y : coords.c2.y,
                         coords.c1.x : coords.c2.x,
                     ]
                     source_name = self.animation.active_source_name()
-                    output_path = (
-                        self.outputs_root
-                        / f"crop_{source_name}_{t.start}-{t.end}_{coords.c1.x}-{coords.c2.x}_{coords.c1.y}-{coords.c2.y}.npy"
+                    output_path = self.outputs_root / io.crop_filename(
+                        source_name,
+                        (frame_range.start, frame_range.stop),
+                        (coords.c1.x, coords.c2.x),
+                        (coords.c1.y, coords.c2.y),
                     )
                     np.save(
                         output_path,
@@ -308,6 +461,8 @@ class ViewerWindow(pyglet.window.Window):
                 self.close()
 
         if pyglet.window.key.MOD_SHIFT & modifiers:
+            # The cursor may have moved since the last frame
+            self.frame_view.update_hover()
             if symbol == pyglet.window.key.Z:
                 yx = self.frame_view.hovered_pixel
 
@@ -327,11 +482,17 @@ class ViewerWindow(pyglet.window.Window):
                 y = int(yx.y)
                 x = int(yx.x)
 
-                values = self.animation.frames[self.animation.frame_index][y, x]
+                values = self.animation.pixel_value(y, x)
                 values_str = ", ".join(f"{v:g}" for v in values)
                 print(f"RGBA: {values_str}")
                 self.set_clipboard_text(values_str)
 
+        if symbol == pyglet.window.key.L:
+            self.animation.follow_latest = not self.animation.follow_latest
+            logging.info(
+                f"Toggling following the latest frame (to {self.animation.follow_latest})"
+            )
+
         if symbol == pyglet.window.key.B:
             if modifiers & pyglet.window.key.MOD_SHIFT:
                 self.animation.back_and_forth = not self.animation.back_and_forth
@@ -354,21 +515,36 @@ def show_video_arrays(
     video_arrays: dict[str, np.ndarray],
     fps: float = 30,
     outputs_root: str | Path | None = None,
+    precision: str = "native",
+    source_fps: dict[str, float] | None = None,
 ):
+    video_arrays = expand_channel_sources(video_arrays)
+    if precision != "native":
+        video_arrays = {
+            name: io.reduce_precision(array, precision, adjust=False)
+            if isinstance(array, np.ndarray)
+            else array
+            for name, array in video_arrays.items()
+        }
     animation = Animation(
         video_arrays,
         fps=fps,
+        source_fps=source_fps,
     )
     logging.info("Starting viewer window")
     logging.info(f"Outputs root directory: {outputs_root}")
     logging.debug("Creating viewer window object")
     viewer_window = ViewerWindow(animation=animation, outputs_root=outputs_root)
 
-    logging.debug("Starting pyglet app")
-    pyglet.app.run()
+    logging.debug(
+        f"Starting pyglet app with a {viewer_window.width}x{viewer_window.height} window"
+    )
+    # The window redraws itself when something changed, see `ViewerWindow.request_redraw`
+    pyglet.app.run(interval=None)
     pyglet.app.exit()
     logging.info("Closed viewer window")
 
+
 def show_video_array(
     video_array, fps: float = 30, outputs_root: str | Path | None = None
 ):
@@ -80,6 +80,7 @@ class SideVignette(EventDispatcher):
 
         self.group = RenderGroup(parent=parent_group)
         self.vertex_list = self.group.create_vertex_list(self.batch)
+        self.uniforms = shaders.UniformCache(self.group.program)
 
         self.is_hovered = False
         self.is_shift_held = False
@@ -114,5 +115,5 @@ class SideVignette(EventDispatcher):
         box_height = self.height
 
         visible = self.is_hovered or self.is_shift_held
-        self.group.program["alpha"] = 1.0 if visible else 0.0
-        self.group.program["scale"] = Vec2(box_width, box_height)
+        self.uniforms["alpha"] = 1.0 if visible else 0.0
+        self.uniforms["scale"] = Vec2(box_width, box_height)
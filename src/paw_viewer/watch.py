@@ -0,0 +1,210 @@
+"""
+Watching a directory for new or modified frames.
+
+On Linux, changes are detected with inotify (through `ctypes`, so there are no extra dependencies).
+Elsewhere, the directory is periodically rescanned and only files with a changed
+modification time or size are decoded again.
+"""
+
+import ctypes
+import ctypes.util
+import logging
+import os
+import select
+import struct
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+from paw_viewer.io import (
+    IMAGE_SUFFIXES,
+    auto_adjust_array,
+    convert_precision,
+    load_frame_file,
+    split_frame_number,
+)
+from paw_viewer.sources import FrameListSource
+
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CLOEXEC = 0o2000000
+INOTIFY_EVENT = struct.Struct("iIII")
+
+# Errors of partially written or removed files, which are decoded again once they change.
+# OpenEXR raises RuntimeError for truncated files.
+DECODE_ERRORS = (OSError, ValueError, RuntimeError)
+
+
+def open_inotify(dir_path: Path) -> int | None:
+    """Get an inotify file descriptor watching `dir_path`, or None if inotify is not available."""
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        fd = libc.inotify_init1(IN_CLOEXEC)
+        if fd < 0:
+            return None
+        wd = libc.inotify_add_watch(
+            fd, os.fsencode(dir_path), IN_CLOSE_WRITE | IN_MOVED_TO
+        )
+        if wd < 0:
+            os.close(fd)
+            return None
+    except (OSError, AttributeError):
+        return None
+    return fd
+
+
+class DirectoryWatcher:
+    """
+    Decodes frames written into a directory and splices them into a `FrameListSource`
+    per sequence.
+
+    Files are grouped into sequences and ordered like in `scan_sequences`.
+    The viewer can't add sources while running, so sequences that appear after the
+    initial scan (or after the first one, in an initially empty directory) are ignored.
+    Decoding runs on a worker pool, so a burst of new files doesn't delay detecting the next ones.
+    """
+
+    def __init__(
+        self,
+        dir_path: str | Path,
+        num_workers: int = 4,
+        poll_interval: float = 1.0,
+        precision: str = "native",
+    ):
+        self.dir_path = Path(dir_path)
+        self.precision = precision
+        self.sources: dict[tuple[str, str], FrameListSource] = {}
+        self.started = False
+        self.poll_interval = poll_interval
+        self.executor = ThreadPoolExecutor(
+            max_workers=num_workers, thread_name_prefix="paw-watch"
+        )
+        self.stats: dict[str, tuple[int, int]] = {}  # name -> (mtime_ns, size)
+        self.stop_event = threading.Event()
+        self.first_frame = threading.Event()
+        self.thread: threading.Thread | None = None
+
+    def start(self):
+        inotify_fd = open_inotify(self.dir_path)
+        # The initial scan also catches files written between opening inotify and now
+        futures = self.scan()
+        if inotify_fd is not None:
+            logging.info(f"Watching {self.dir_path} with inotify")
+            target, args = self._watch_inotify, (inotify_fd,)
+        else:
+            logging.info(f"Polling {self.dir_path} every {self.poll_interval}s")
+            target, args = self._watch_polling, ()
+        self.thread = threading.Thread(target=target, args=args, name="paw-watch")
+        self.thread.start()
+        for future in futures:
+            future.result()
+        self.started = True
+
+    def stop(self):
+        """Stop watching, waiting for the watcher thread and the running decodes to finish."""
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join()
+        self.executor.shutdown(wait=True, cancel_futures=True)
+
+    def wait_for_first_frame(self):
+        if not self.first_frame.is_set():
+            logging.warning(f"Waiting for frames in {self.dir_path}")
+        self.first_frame.wait()
+
+    def named_sources(self) -> dict[str, FrameListSource]:
+        """Sources with at least one frame, named like in `scan_sequences`."""
+        sources = {
+            key: source for key, source in sorted(self.sources.items()) if source.frames
+        }
+        if len(sources) == 1:
+            return {"": next(iter(sources.values()))}
+        return {
+            f"{prefix}#{suffix}": source for (prefix, suffix), source in sources.items()
+        }
+
+    def scan(self) -> list:
+        """Submit all new or modified files for decoding."""
+        futures = []
+        with os.scandir(self.dir_path) as entries:
+            for entry in entries:
+                if not entry.is_file():
+                    continue
+                stat = entry.stat()
+                if self.stats.get(entry.name) != (stat.st_mtime_ns, stat.st_size):
+                    self.stats[entry.name] = (stat.st_mtime_ns, stat.st_size)
+                    future = self.submit(entry.name)
+                    if future is not None:
+                        futures.append(future)
+        return futures
+
+    def submit(self, name: str):
+        """Submit a file for decoding, if it's a frame of a watched sequence."""
+        if Path(name).suffix.lower() not in IMAGE_SUFFIXES:
+            return None
+        parts = split_frame_number(name)
+        if parts is None:
+            return None
+        prefix, frame_number, suffix = parts
+        source = self.sources.get((prefix, suffix))
+        if source is None:
+            if self.started and self.sources:
+                logging.warning(
+                    f"Ignoring {name}: new sequences aren't shown while watching"
+                )
+                return None
+            source = self.sources[(prefix, suffix)] = FrameListSource()
+        return self.executor.submit(self.decode, name, source, frame_number)
+
+    def decode(self, name: str, source: FrameListSource, frame_number: int):
+        try:
+            frame = auto_adjust_array(load_frame_file(self.dir_path / name))[0]
+            frame = convert_precision(frame, self.precision)
+            source.set(frame_number, np.ascontiguousarray(frame))
+        except DECODE_ERRORS as e:
+            # Most likely a partially written file - it will be decoded again once modified
+            logging.warning(f"Failed to load {name}: {e}")
+            return
+        logging.debug(f"Loaded frame {name}")
+        self.first_frame.set()
+
+    def _watch_inotify(self, fd: int):
+        try:
+            while not self.stop_event.is_set():
+                readable, _, _ = select.select([fd], [], [], 0.5)
+                if not readable:
+                    continue
+                buffer = os.read(fd, 64 * 1024)
+                offset = 0
+                while offset < len(buffer):
+                    _, _, _, name_length = INOTIFY_EVENT.unpack_from(buffer, offset)
+                    offset += INOTIFY_EVENT.size
+                    name = os.fsdecode(
+                        buffer[offset : offset + name_length].rstrip(b"\0")
+                    )
+                    offset += name_length
+                    self.submit(name)
+        finally:
+            os.close(fd)
+
+    def _watch_polling(self):
+        while not self.stop_event.wait(self.poll_interval):
+            self.scan()
+
+
+def watch_directory(dir_path: str | Path, **kwargs) -> DirectoryWatcher:
+    """Start watching a directory and wait until at least one frame is loaded."""
+    watcher = DirectoryWatcher(dir_path, **kwargs)
+    watcher.start()
+    try:
+        watcher.wait_for_first_frame()
+    except BaseException:
+        # e.g. Ctrl+C while waiting - the watcher thread would keep the process alive
+        watcher.stop()
+        raise
+    return watcher
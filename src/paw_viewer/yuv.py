@@ -0,0 +1,261 @@
+"""
+Raw YUV video, e.g. codec input and output dumps, from `.y4m` files or headerless `.yuv` files.
+
+Files are memory-mapped, so opening them is instant regardless of their size.
+The planes of a frame are uploaded as they are stored - stacked in a single-channel texture -
+and converted to RGB in the shader (see `sample_yuv` in fragment.glsl),
+so playback doesn't do any color conversion on the CPU.
+"""
+
+import logging
+import re
+from pathlib import Path
+
+import numpy as np
+
+# The index of a layout is passed to the shaders, 0 means that a source is not YUV
+YUV_LAYOUTS = (None, "420p", "422p", "444p", "nv12")
+
+# (Kr, Kb) luma coefficients of the conversion matrices
+YUV_MATRICES = {"bt601": (0.299, 0.114), "bt709": (0.2126, 0.0722)}
+
+# Chroma subsampling (horizontal, vertical) of each layout
+CHROMA_SUBSAMPLING = {"420p": (2, 2), "422p": (2, 1), "444p": (1, 1), "nv12": (2, 2)}
+
+Y4M_COLORSPACES = {
+    "420": ("420p", 8),
+    "420jpeg": ("420p", 8),
+    "420paldv": ("420p", 8),
+    "420mpeg2": ("420p", 8),
+    "422": ("422p", 8),
+    "444": ("444p", 8),
+    "420p10": ("420p", 10),
+    "422p10": ("422p", 10),
+    "444p10": ("444p", 10),
+}
+
+
+def plane_rows(layout: str, width: int, height: int) -> int:
+    """Number of `width`-wide rows of the texture holding all planes of a frame."""
+    sx, sy = CHROMA_SUBSAMPLING[layout]
+    return height + 2 * height // (sx * sy)
+
+
+def yuv_to_rgb(
+    y: np.ndarray, u: np.ndarray, v: np.ndarray, matrix: str = "bt709"
+) -> np.ndarray:
+    """
+    Convert limited range YUV planes normalized to [0, 1] to float32 RGB,
+    like `sample_yuv` in fragment.glsl. Chroma planes must already be upsampled.
+    """
+    kr, kb = YUV_MATRICES[matrix]
+    kg = 1.0 - kr - kb
+    y = (y - 16 / 255) * (255 / 219)
+    u = (u - 128 / 255) * (255 / 224)
+    v = (v - 128 / 255) * (255 / 224)
+    r = y + 2 * (1 - kr) * v
+    b = y + 2 * (1 - kb) * u
+    g = (y - kr * r - kb * b) / kg
+    return np.clip(np.stack((r, g, b), axis=-1), 0.0, 1.0).astype(np.float32)
+
+
+class YUVSource:
+    """
+    Frames of a memory-mapped YUV file with the given geometry.
+
+    `texture_frame(t)` is a view of the planes of frame `t`, which the viewer uploads as they are.
+    Indexing converts frames to RGB on the CPU, which is only needed for pixel readouts,
+    thumbnails and copies. 10-bit samples are stored in the low bits of little-endian uint16 words
+    and are scaled to the full uint16 range when converted.
+    """
+
+    def __init__(
+        self,
+        path: str | Path,
+        width: int,
+        height: int,
+        layout: str = "420p",
+        bit_depth: int = 8,
+        header_bytes: int = 0,
+        frame_header_bytes: int = 0,
+        matrix: str | None = None,
+    ):
+        if layout not in CHROMA_SUBSAMPLING:
+            raise ValueError(f"Unsupported YUV layout {layout!r}")
+        if bit_depth not in (8, 10):
+            raise ValueError(f"Unsupported YUV bit depth {bit_depth}")
+        sx, sy = CHROMA_SUBSAMPLING[layout]
+        if width % sx or height % sy:
+            raise ValueError(
+                f"Size {width}x{height} doesn't match the {layout} subsampling"
+            )
+        self.width = width
+        self.height = height
+        self.layout = layout
+        self.bit_depth = bit_depth
+        # HD content is typically BT.709, SD content BT.601
+        self.matrix = matrix or ("bt709" if height >= 720 else "bt601")
+
+        self.sample_dtype = np.dtype(np.uint8 if bit_depth == 8 else "<u2")
+        self.rows = plane_rows(layout, width, height)
+        self.frame_bytes = self.rows * width * self.sample_dtype.itemsize
+        self.frame_stride = frame_header_bytes + self.frame_bytes
+        self.data = np.memmap(path, dtype=np.uint8, mode="r")
+        self.offset_bytes = header_bytes + frame_header_bytes
+        self.num_frames = max(0, (len(self.data) - header_bytes) // self.frame_stride)
+        if self.num_frames == 0:
+            raise ValueError(
+                f"{path} doesn't contain a whole {width}x{height} {layout} frame"
+            )
+        if (len(self.data) - header_bytes) % self.frame_stride:
+            logging.warning(f"Ignoring a truncated frame at the end of {path}")
+
+    @property
+    def yuv_layout(self) -> int:
+        return YUV_LAYOUTS.index(self.layout)
+
+    @property
+    def max_sample(self) -> int:
+        """
+        Sample value normalized to 1. 10-bit samples are normalized like 8-bit ones shifted
+        by 2 bits, so the limited range [64, 940] matches [16, 235] of 8-bit video.
+        """
+        return 255 * 2 ** (self.bit_depth - 8)
+
+    @property
+    def value_scale(self) -> float:
+        """Scale of the sampled uint16 texture values, see `max_sample`."""
+        return 65535 / self.max_sample if self.bit_depth == 10 else 1.0
+
+    @property
+    def shape(self) -> tuple[int, ...]:
+        return (self.num_frames, self.height, self.width, 3)
+
+    @property
+    def dtype(self) -> np.dtype:
+        return np.dtype(np.uint8 if self.bit_depth == 8 else np.uint16)
+
+    @property
+    def ndim(self) -> int:
+        return 4
+
+    def __len__(self) -> int:
+        return self.num_frames
+
+    def texture_frame(self, t: int) -> np.ndarray:
+        """Get a `[rows, W, 1]` view of all planes of frame `t`, see `plane_rows`."""
+        start = self.offset_bytes + t * self.frame_stride
+        samples = self.data[start : start + self.frame_bytes].view(self.sample_dtype)
+        return samples.reshape(self.rows, self.width, 1)
+
+    def planes(self, t: int) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Get views of the Y, U and V planes of frame `t`."""
+        samples = self.texture_frame(t)[..., 0]
+        y = samples[: self.height]
+        chroma = samples[self.height :]
+        if self.layout == "nv12":
+            uv = chroma.reshape(self.height // 2, self.width // 2, 2)
+            return y, uv[..., 0], uv[..., 1]
+        sx, sy = CHROMA_SUBSAMPLING[self.layout]
+        chroma = chroma.reshape(2, self.height // sy, self.width // sx)
+        return y, chroma[0], chroma[1]
+
+    def convert(self, t: int, step: int = 1) -> np.ndarray:
+        """Convert frame `t` to RGB, keeping every `step`-th row and column."""
+        y, u, v = self.planes(t)
+        sx, sy = CHROMA_SUBSAMPLING[self.layout]
+        rows = np.arange(0, self.height, step)
+        columns = np.arange(0, self.width, step)
+        # Nearest chroma samples, like `texelFetch` in the shader
+        u = u[rows[:, np.newaxis] // sy, columns // sx]
+        v = v[rows[:, np.newaxis] // sy, columns // sx]
+        y = y[::step, ::step]
+        max_sample = self.max_sample
+        rgb = yuv_to_rgb(y / max_sample, u / max_sample, v / max_sample, self.matrix)
+        max_output = np.iinfo(self.dtype).max
+        return (rgb * max_output).round().astype(self.dtype)
+
+    def __getitem__(self, key) -> np.ndarray:
+        if isinstance(key, tuple):
+            t, *index = key
+            return self[t][tuple(index)]
+        if isinstance(key, slice):
+            return np.stack([self.convert(t) for t in range(*key.indices(len(self)))])
+        return self.convert(int(key))
+
+    def read_proxy(self, t: int, factor: int) -> np.ndarray:
+        return self.convert(t, factor)
+
+    def native_pixel(self, t: int, y: int, x: int) -> np.ndarray:
+        """Convert a single pixel, so hovering doesn't convert whole frames."""
+        y_plane, u, v = self.planes(t)
+        sx, sy = CHROMA_SUBSAMPLING[self.layout]
+        samples = np.array([y_plane[y, x], u[y // sy, x // sx], v[y // sy, x // sx]])
+        rgb = yuv_to_rgb(*samples / self.max_sample, self.matrix)
+        return (rgb * np.iinfo(self.dtype).max).round().astype(self.dtype)
+
+    def describe(self) -> str:
+        return f"YUV {self.layout} {self.bit_depth}-bit {self.matrix.upper()}"
+
+
+def parse_y4m_header(header: bytes) -> dict[str, str]:
+    """Parse the parameters of a `YUV4MPEG2` header line, e.g. `W1920 H1080 F30000:1001 C420`."""
+    tokens = header.decode("ascii").split()
+    if not tokens or tokens[0] != "YUV4MPEG2":
+        raise ValueError("Not a YUV4MPEG2 file")
+    return {token[0]: token[1:] for token in tokens[1:]}
+
+
+def load_y4m(path: str | Path, matrix: str | None = None) -> tuple[YUVSource, float]:
+    """Memory-map a `.y4m` file, returning the source and its frame rate."""
+    with open(path, "rb") as f:
+        header = f.readline(4096)
+        frame_header = f.readline(4096)
+    if not header.endswith(b"\n") or not frame_header.startswith(b"FRAME"):
+        raise ValueError(f"{path} is not a valid Y4M file")
+    params = parse_y4m_header(header)
+    colorspace = params.get("C", "420")
+    if colorspace not in Y4M_COLORSPACES:
+        raise ValueError(f"Unsupported Y4M colorspace {colorspace!r}")
+    layout, bit_depth = Y4M_COLORSPACES[colorspace]
+    numerator, _, denominator = params.get("F", "30:1").partition(":")
+    fps = int(numerator) / int(denominator or 1)
+    # Frame headers may have parameters too, but in practice they are the same for all frames
+    source = YUVSource(
+        path,
+        int(params["W"]),
+        int(params["H"]),
+        layout,
+        bit_depth,
+        header_bytes=len(header),
+        frame_header_bytes=len(frame_header),
+        matrix=matrix,
+    )
+    return source, fps
+
+
+def parse_yuv_size(text: str) -> tuple[int, int] | None:
+    """Find a `WIDTHxHEIGHT` size, e.g. in a file name like `foreman_352x288.yuv`."""
+    match = re.search(r"(\d+)x(\d+)", text)
+    return (int(match.group(1)), int(match.group(2))) if match else None
+
+
+def load_raw_yuv(
+    path: str | Path,
+    size: tuple[int, int] | None = None,
+    layout: str = "420p",
+    bit_depth: int = 8,
+    matrix: str | None = None,
+) -> YUVSource:
+    """
+    Memory-map a headerless `.yuv` file. If `size` is not given,
+    it's parsed from the file name.
+    """
+    if size is None:
+        size = parse_yuv_size(Path(path).stem)
+        if size is None:
+            raise ValueError(
+                f"Unknown size of {path} - pass it with --yuv-size or name the file like *_WxH.yuv"
+            )
+    width, height = size
+    return YUVSource(path, width, height, layout, bit_depth, matrix=matrix)
@@ -0,0 +1,8 @@
+import os
+import sys
+
+import pyglet
+
+# Without a display (e.g. on CI), OpenGL tests render offscreen through EGL
+if sys.platform.startswith("linux") and not os.environ.get("DISPLAY"):
+    pyglet.options["headless"] = True
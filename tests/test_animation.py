@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+
+try:
+    from paw_viewer.animation import Animation
+except Exception as e:  # noqa: BLE001 - no display or OpenGL driver
+    pytest.skip(f"OpenGL is not available: {e}", allow_module_level=True)
+
+
+def frames(T: int) -> np.ndarray:
+    return np.zeros((T, 4, 4, 4), dtype=np.uint8)
+
+
+def test_single_images_are_broadcast():
+    animation = Animation({"video": frames(20), "image": frames(1)})
+    assert animation.num_frames == 20
+    assert [animation.source_frame(1, t) for t in (0, 7, 19)] == [0, 0, 0]
+    assert animation.source_frame_range(1, 5, 10) == slice(0, 1)
+
+
+def test_shorter_sources_hold_their_last_frame():
+    animation = Animation({"short": frames(5), "long": frames(8)})
+    assert animation.num_frames == 8
+    assert animation.timeline_owner() == 1
+    assert animation.source_frame(0, 3) == 3
+    assert animation.source_frame(0, 7) == 4
+    assert animation.source_frame_range(0, 6, 8) == slice(4, 5)
+
+
+def test_sources_are_mapped_by_fps():
+    animation = Animation(
+        {"video": frames(20), "slow": frames(10), "fast": frames(40)},
+        fps=30,
+        source_fps={"slow": 15, "fast": 60},
+    )
+    assert animation.timeline_lengths() == [20, 20, 20]
+    assert [animation.source_frame(1, t) for t in range(5)] == [0, 0, 1, 1, 2]
+    assert animation.source_frame(1, 19) == 9
+    assert animation.source_frame(2, 7) == 14
+    assert animation.source_frame_range(1, 10, 20) == slice(5, 10)
+    assert animation.source_frame_range(1, 0, 3) == slice(0, 2)
+    # Faster sources show every frame during the range
+    assert animation.source_frame_range(2, 10, 12) == slice(20, 24)
+
+
+def test_timeline_follows_the_longest_source_in_time():
+    animation = Animation(
+        {"video": frames(10), "slow": frames(10)}, fps=30, source_fps={"slow": 10}
+    )
+    assert animation.num_frames == 30
+    assert animation.timeline_owner() == 1
+    assert animation.source_frame(0, 25) == 9
@@ -0,0 +1,83 @@
+import numpy as np
+
+from paw_viewer.extract import (
+    Crop,
+    covering_region,
+    extract_file,
+    group_crops,
+    output_subdirs,
+)
+
+
+def crop(t, x=(0, 4), y=(0, 4), source=""):
+    return Crop(file="clip.npy", source=source, t=t, x=x, y=y)
+
+
+def test_group_crops_merges_overlapping_and_adjacent_ranges():
+    crops = [
+        crop((20, 30)),
+        crop((0, 10)),
+        crop((10, 12)),
+        crop((5, 8)),
+        crop((31, 40)),
+    ]
+    groups = group_crops(crops)
+    assert [[c.t for c in group] for group in groups] == [
+        [(0, 10), (5, 8), (10, 12)],
+        [(20, 30)],
+        [(31, 40)],
+    ]
+
+
+def test_covering_region():
+    region = covering_region(
+        [crop((2, 5), x=(10, 20), y=(0, 8)), crop((4, 9), x=(4, 12), y=(6, 16))]
+    )
+    assert (region.start, region.end) == (2, 9)
+    assert region.x == (4, 20)
+    assert region.y == (0, 16)
+    assert region.source == ""
+    assert covering_region([crop((0, 1)), crop((0, 1), source="b")]).source is None
+
+
+def test_output_subdirs_keep_colliding_stems_apart(tmp_path):
+    paths = [
+        str(tmp_path / "a" / "clip.mp4"),
+        str(tmp_path / "b" / "clip.mp4"),
+        str(tmp_path / "b" / "clip.npy"),
+        str(tmp_path / "other.mp4"),
+    ]
+    subdirs = output_subdirs(paths)
+    assert subdirs[paths[3]].as_posix() == "other"
+    assert [subdirs[path].as_posix() for path in paths[:3]] == [
+        "a/clip_mp4",
+        "b/clip_mp4",
+        "b/clip_npy",
+    ]
+
+
+def test_extract_file(tmp_path):
+    video = np.random.default_rng(0).integers(0, 255, (12, 16, 16, 4), dtype=np.uint8)
+    path = tmp_path / "clip.npy"
+    np.save(path, video)
+    crops = [
+        crop((2, 5), x=(0, 8), y=(4, 12)),
+        crop((4, 6), x=(6, 16), y=(0, 4)),
+        crop((10, 11)),
+        crop((20, 30)),
+    ]
+
+    saved, errors = extract_file(path, crops, tmp_path / "out")
+
+    assert len(saved) == 3
+    assert len(errors) == 1
+    assert "crop__20-30" in errors[0]
+    np.testing.assert_array_equal(
+        np.load(tmp_path / "out" / crops[0].filename()), video[2:5, 4:12, 0:8]
+    )
+    np.testing.assert_array_equal(
+        np.load(tmp_path / "out" / crops[1].filename()), video[4:6, 0:4, 6:16]
+    )
+    np.testing.assert_array_equal(
+        np.load(tmp_path / "out" / crops[2].filename()), video[10:11, 0:4, 0:4]
+    )
@@ -0,0 +1,144 @@
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from paw_viewer.io import (
+    auto_load_file,
+    find_source,
+    load_directory,
+    parse_frame_number,
+    reduce_precision,
+    scan_sequences,
+    split_frame_number,
+)
+
+
+def touch(dir_path: Path, *names: str):
+    for name in names:
+        (dir_path / name).touch()
+
+
+def names(paths: list[str]) -> list[str]:
+    return [Path(path).name for path in paths]
+
+
+def test_split_frame_number():
+    assert split_frame_number("frame0001.png") == ("frame", 1, ".png")
+    assert split_frame_number("shot12_0001.png") == ("shot12_", 1, ".png")
+    assert split_frame_number("frame0001_v2.png") == ("frame", 1, "_v2.png")
+    assert split_frame_number("render.0042.exr") == ("render.", 42, ".exr")
+    assert split_frame_number("12_34.png") == ("12_", 34, ".png")
+    assert split_frame_number("frame.png") is None
+
+
+def test_parse_frame_number_matches_split():
+    for name in ["shot12_0001.png", "frame0001_v2.png", "12_34.png"]:
+        assert parse_frame_number(Path(name).stem) == split_frame_number(name)[1]
+
+
+def test_scan_sequences_natural_order(tmp_path):
+    touch(tmp_path, "frame10.png", "frame2.png", "frame1.png", "notes.txt")
+    assert names(scan_sequences(tmp_path)[""]) == [
+        "frame1.png",
+        "frame2.png",
+        "frame10.png",
+    ]
+
+
+def test_scan_sequences_number_in_prefix(tmp_path):
+    touch(tmp_path, "shot12_0002.png", "shot12_0001.png", "shot12_0010.png")
+    sequences = scan_sequences(tmp_path)
+    assert list(sequences) == [""]
+    assert names(sequences[""]) == [
+        "shot12_0001.png",
+        "shot12_0002.png",
+        "shot12_0010.png",
+    ]
+
+
+def test_scan_sequences_number_in_suffix(tmp_path):
+    touch(tmp_path, "frame0002_v2.png", "frame0001_v2.png", "frame0003_v2.png")
+    sequences = scan_sequences(tmp_path)
+    assert list(sequences) == [""]
+    assert names(sequences[""]) == [
+        "frame0001_v2.png",
+        "frame0002_v2.png",
+        "frame0003_v2.png",
+    ]
+
+
+def test_scan_sequences_separate_sequences(tmp_path):
+    touch(
+        tmp_path,
+        "beauty_0001.exr",
+        "depth_0001.exr",
+        "beauty_0002.exr",
+        "depth_0002.exr",
+    )
+    sequences = scan_sequences(tmp_path)
+    assert list(sequences) == ["beauty_#.exr", "depth_#.exr"]
+    assert names(sequences["beauty_#.exr"]) == ["beauty_0001.exr", "beauty_0002.exr"]
+    assert names(sequences["depth_#.exr"]) == ["depth_0001.exr", "depth_0002.exr"]
+
+
+def test_find_source():
+    sources = {"a": 1, "b": 2}
+    assert find_source(sources, "b") == ("b", 2)
+    assert find_source(sources, None) == ("a", 1)
+    assert find_source({"": 3}, "a") == ("", 3)
+    with pytest.raises(KeyError):
+        find_source(sources, "c")
+
+
+def test_memmapped_rgb_npy_stays_mapped(tmp_path, monkeypatch):
+    import paw_viewer.probe
+
+    # Pretend the file doesn't fit into RAM, so it's memory-mapped
+    monkeypatch.setattr(paw_viewer.probe, "memory_budget", lambda: 1024)
+    path = tmp_path / "rgb.npy"
+    frames = np.random.default_rng(0).integers(0, 255, (3, 64, 64, 3), dtype=np.uint8)
+    np.save(path, frames)
+
+    sources, _ = auto_load_file(path)
+    source = sources[""]
+    assert source.shape == (3, 64, 64, 3)
+    # A view of the file, not a copy in RAM
+    assert isinstance(source, np.memmap)
+    assert Path(source.filename) == path.resolve()
+    np.testing.assert_array_equal(source, frames)
+
+
+def test_reduce_precision_chunks_grayscale_video():
+    video = np.random.default_rng(0).random((5, 8, 6), dtype=np.float32)
+    source = reduce_precision(video, "half", chunk_bytes=video[0].nbytes)
+
+    assert source.shape == (5, 8, 6, 1)
+    assert source.dtype == np.float16
+    np.testing.assert_array_equal(source[3], video[3, ..., None].astype(np.float16))
+    np.testing.assert_array_equal(source.native_pixel(3, 2, 1), video[3, 2, 1, None])
+
+
+def test_reduce_precision_adds_alpha_per_chunk():
+    video = np.random.default_rng(0).random((4, 3, 8, 6), dtype=np.float32)
+    source = reduce_precision(video, "half", chunk_bytes=video[0].nbytes)
+
+    assert source.shape == (4, 8, 6, 4)
+    np.testing.assert_array_equal(source[1][..., 3], 1)
+    np.testing.assert_array_equal(
+        source[1][..., :3], np.moveaxis(video[1], 0, -1).astype(np.float16)
+    )
+
+
+def test_load_directory_compresses_sequences(tmp_path):
+    import cv2
+
+    frames = np.random.default_rng(0).integers(0, 255, (5, 8, 6, 3), dtype=np.uint8)
+    for t, frame in enumerate(frames):
+        cv2.imwrite(str(tmp_path / f"frame{t:04d}.png"), frame[..., ::-1])
+
+    source = load_directory(tmp_path, compress="zlib")[""]
+
+    assert type(source).__name__ == "CompressedFrameStore"
+    assert source.shape == (5, 8, 6, 4)
+    np.testing.assert_array_equal(source[3][..., :3], frames[3])
@@ -0,0 +1,79 @@
+import cv2
+import numpy as np
+import pytest
+
+from paw_viewer.probe import choose_strategy, frame_geometry, probe, probe_npy
+
+
+@pytest.mark.parametrize(
+    ("shape", "geometry"),
+    [
+        ((64, 48), (1, 64, 48, 1)),
+        ((64, 48, 3), (1, 64, 48, 3)),
+        ((10, 64, 48), (10, 64, 48, 1)),
+        ((10, 64, 48, 4), (10, 64, 48, 4)),
+        ((10, 3, 64, 48), (10, 64, 48, 3)),
+        ((2, 5, 64, 48, 3), (10, 64, 48, 3)),
+    ],
+)
+def test_frame_geometry(shape, geometry):
+    assert frame_geometry(shape) == geometry
+
+
+def test_probe_npy_reads_only_the_header(tmp_path):
+    path = tmp_path / "video.npy"
+    np.lib.format.open_memmap(path, mode="w+", dtype=np.float16, shape=(100, 3, 32, 64))
+    info = probe_npy(path)
+    assert info.format == "npy"
+    (source,) = info.sources
+    assert (source.num_frames, source.height, source.width, source.channels) == (
+        100,
+        32,
+        64,
+        3,
+    )
+    assert source.dtype == np.float16
+    # RGB frames are stored with an alpha channel
+    assert info.nbytes == 100 * 32 * 64 * 4 * 2
+
+
+def test_probe_npz_and_directories(tmp_path):
+    np.savez(
+        tmp_path / "arrays.npz",
+        depth=np.zeros((5, 8, 8), np.float32),
+        rgb=np.zeros((5, 8, 8, 3), np.uint8),
+    )
+    info = probe(tmp_path / "arrays.npz")
+    assert [(s.name, s.channels) for s in info.sources] == [("depth", 1), ("rgb", 3)]
+
+    sequence = tmp_path / "sequence"
+    sequence.mkdir()
+    for t in range(4):
+        cv2.imwrite(
+            str(sequence / f"frame{t:04d}.png"), np.zeros((6, 10, 3), np.uint16)
+        )
+    info = probe(sequence)
+    assert info.format == "directory"
+    (source,) = info.sources
+    assert (source.num_frames, source.height, source.width, source.channels) == (
+        4,
+        6,
+        10,
+        3,
+    )
+    assert source.dtype == np.uint16
+
+
+def test_choose_strategy(tmp_path):
+    path = tmp_path / "video.npy"
+    np.lib.format.open_memmap(path, mode="w+", dtype=np.uint8, shape=(10, 64, 64, 4))
+    info = probe(path)
+    assert choose_strategy(info, budget=info.nbytes) == "eager"
+    assert choose_strategy(info, budget=info.nbytes - 1) == "memmap"
+    # Mapped frames this large are shown through proxies
+    assert choose_strategy(info, budget=1, proxy_min_bytes=64 * 64 * 4) == "proxy"
+
+    info.format = "directory"
+    assert choose_strategy(info, budget=info.nbytes) == "lazy"
+    info.format = "npz"
+    assert choose_strategy(info, budget=1) == "eager"
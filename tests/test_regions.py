@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+
+from paw_viewer.io import auto_load_file, restrict_array, restrict_sources
+from paw_viewer.selections import LoadRegion
+from paw_viewer.sources import CompressedFrameStore
+
+
+def test_load_region_from_crop():
+    region = LoadRegion.from_crop(
+        {"source": "depth", "t": [10, 20], "x": [4, 8], "y": [0, 2]}
+    )
+    assert (region.start, region.end, region.source) == (10, 20, "depth")
+    assert region.spatial_slices() == (slice(0, 2), slice(4, 8))
+    assert LoadRegion.from_crop({"x": [0, 1], "y": [0, 1]}).end is None
+    assert LoadRegion(start=2, end=9, stride=3).frame_indices(8) == range(2, 8, 3)
+    assert LoadRegion().spatial_slices() == (slice(None), slice(None))
+
+
+@pytest.mark.parametrize(
+    ("shape", "expected"),
+    [
+        ((10, 16, 12, 3), lambda a: a[2:8:2, 4:10, 1:5]),
+        ((10, 3, 16, 12), lambda a: a[2:8:2, :, 4:10, 1:5]),
+        ((16, 12, 3), lambda a: a[4:10, 1:5]),
+        ((10, 16, 12), lambda a: a[2:8:2, 4:10, 1:5]),
+        ((16, 12), lambda a: a[4:10, 1:5]),
+    ],
+)
+def test_restrict_array_keeps_the_layout(shape, expected):
+    data = np.arange(np.prod(shape), dtype=np.int32).reshape(shape)
+    region = LoadRegion(start=2, end=8, stride=2, x=(1, 5), y=(4, 10))
+    restricted = restrict_array(data, region)
+    np.testing.assert_array_equal(restricted, expected(data))
+    assert restricted.flags.c_contiguous
+
+
+def test_restrict_array_scales_frames():
+    data = np.zeros((4, 3, 16, 12), dtype=np.uint8)
+    restricted = restrict_array(data, LoadRegion(scale=0.5))
+    assert restricted.shape == (4, 3, 8, 6)
+
+
+def test_restrict_sources_reads_only_region_frames():
+    frames = np.random.default_rng(0).integers(0, 255, (10, 8, 8, 3), dtype=np.uint8)
+    store = CompressedFrameStore.from_frames(frames)
+    sources = restrict_sources(
+        {"video": store, "other": frames},
+        LoadRegion(start=4, end=7, x=(2, 6), y=(0, 4), source="video"),
+    )
+    assert list(sources) == ["video"]
+    source = sources["video"]
+    assert source.shape == (3, 4, 4, 4)
+    np.testing.assert_array_equal(source[1][..., :3], frames[5, 0:4, 2:6])
+    # Frames are cached and prefetched by the region, not by the store
+    assert len(store.cache) == 0
+    assert len(store.pending) == 0
+
+
+def test_auto_load_file_maps_npy_regions(tmp_path):
+    path = tmp_path / "video.npy"
+    video = np.random.default_rng(0).random((6, 8, 10), dtype=np.float32)
+    np.save(path, video)
+    sources, _ = auto_load_file(
+        path, dedup=False, region=LoadRegion(start=1, end=4, x=(2, 7), y=(3, 8))
+    )
+    np.testing.assert_array_equal(sources[""][..., 0], video[1:4, 3:8, 2:7])
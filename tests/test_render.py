@@ -0,0 +1,92 @@
+import numpy as np
+
+from paw_viewer.colormaps import colormap_lut
+from paw_viewer.render import (
+    RenderSettings,
+    dim_outside_crop,
+    render_frame,
+    sample_indices,
+    selection_to_crop_corners,
+)
+
+# Red, green / blue, white
+FRAME = np.array(
+    [[[255, 0, 0], [0, 255, 0]], [[0, 0, 255], [255, 255, 255]]], dtype=np.uint8
+)
+
+
+def test_sample_indices_identity():
+    indices, inside = sample_indices(4, 2.0, 1.0, 4.0, 4)
+    np.testing.assert_array_equal(indices, [0, 1, 2, 3])
+    assert inside.all()
+
+
+def test_sample_indices_zoom():
+    indices, inside = sample_indices(4, 2.0, 2.0, 4.0, 4)
+    np.testing.assert_array_equal(indices, [1, 1, 2, 2])
+    assert inside.all()
+
+
+def test_sample_indices_pan():
+    indices, inside = sample_indices(4, 0.0, 1.0, 4.0, 4)
+    np.testing.assert_array_equal(indices, [2, 3, 3, 3])
+    np.testing.assert_array_equal(inside, [True, True, False, False])
+
+
+def test_render_frame_identity():
+    np.testing.assert_array_equal(render_frame(FRAME, RenderSettings(2, 2)), FRAME)
+
+
+def test_render_frame_zoom():
+    image = render_frame(FRAME, RenderSettings(4, 4, scale=2.0))
+    np.testing.assert_array_equal(image, FRAME.repeat(2, axis=0).repeat(2, axis=1))
+
+
+def test_render_frame_pan():
+    # Moved right by one pixel, the left column shows the background grid
+    image = render_frame(FRAME, RenderSettings(2, 2, translation=(2.0, 1.0)))
+    np.testing.assert_array_equal(image[:, 1], FRAME[:, 0])
+    np.testing.assert_array_equal(image[:, 0], [[22, 40, 28], [22, 40, 28]])
+
+
+def test_render_frame_gamma():
+    frame = np.array([[[0.5]]], dtype=np.float32)
+    np.testing.assert_array_equal(
+        render_frame(frame, RenderSettings(1, 1)), [[[186] * 3]]
+    )
+
+
+def test_render_frame_colormap():
+    frame = np.array([[[0.0], [1.0]]], dtype=np.float32)
+    image = render_frame(frame, RenderSettings(2, 1, colormap="viridis"))
+    lut = colormap_lut("viridis")
+    np.testing.assert_array_equal(image, [[lut[0, :3], lut[-1, :3]]])
+    np.testing.assert_array_equal(image, [[[68, 1, 84], [253, 231, 37]]])
+
+
+def test_render_frame_flow_wheel():
+    # Saturated hues for unit vectors, white for zero motion
+    frame = np.array([[[1.0, 0.0], [0.0, 0.0], [0.0, 1.0], [-1.0, 0.0]]], np.float32)
+    image = render_frame(frame, RenderSettings(4, 1))
+    expected = [[[0, 255, 255], [255, 255, 255], [128, 0, 255], [255, 0, 0]]]
+    np.testing.assert_array_equal(image, expected)
+
+
+def test_render_frame_crop_dimming():
+    frame = np.full((2, 2, 3), 255, dtype=np.uint8)
+    image = render_frame(frame, RenderSettings(2, 2, crop_corners=(0, 0, 1, 2)))
+    np.testing.assert_array_equal(image[:, 0], [[255] * 3] * 2)
+    np.testing.assert_array_equal(image[:, 1], [[48] * 3] * 2)
+
+
+def test_dim_outside_crop_empty_selection():
+    image = np.ones((2, 2, 4), dtype=np.float32)
+    settings = RenderSettings(2, 2, crop_corners=(1, 0, 1, 2))
+    xs = ys = np.arange(2)
+    result = dim_outside_crop(image, settings, xs, ys, (1.0, 1.0), (2, 2))
+    np.testing.assert_array_equal(result, image)
+
+
+def test_selection_to_crop_corners():
+    crop = {"x": [1, 3], "y": [0, 2]}
+    assert selection_to_crop_corners(crop, frame_height=4) == (1, 2, 3, 4)
@@ -0,0 +1,181 @@
+import cv2
+import numpy as np
+import pytest
+
+from paw_viewer.sources import (
+    CompressedFrameStore,
+    DeduplicatedSource,
+    FrameListSource,
+    RingBufferSource,
+    TiffStackSource,
+    deduplicate_sources,
+    frame_hashes,
+)
+
+
+def random_frames(shape, dtype=np.uint8, seed=0):
+    return np.random.default_rng(seed).integers(0, 255, shape).astype(dtype)
+
+
+def test_read_proxy_bypasses_cache():
+    frames = random_frames((8, 32, 32, 3))
+    store = CompressedFrameStore.from_frames(frames, prefetch=4)
+    proxy = store.read_proxy(5, 4)
+    assert proxy.shape == (8, 8, 4)
+    np.testing.assert_array_equal(proxy[..., :3], frames[5, ::4, ::4])
+    assert len(store.cache) == 0
+    assert len(store.pending) == 0
+    assert store.last_index == 0
+
+
+def test_jpeg_read_proxy_decodes_reduced():
+    frames = np.full((2, 64, 64, 3), 128, dtype=np.uint8)
+    store = CompressedFrameStore.from_frames(frames, codec="jpeg")
+    proxy = store.read_proxy(1, 4)
+    assert proxy.shape == (16, 16, 4)
+    assert np.abs(proxy[..., :3].astype(int) - 128).max() <= 2
+    assert len(store.cache) == 0
+
+
+def test_tiff_read_proxy_reads_strided_pages(tmp_path):
+    pages = random_frames((3, 40, 24))
+    path = tmp_path / "stack.tif"
+    cv2.imwritemulti(str(path), list(pages), [cv2.IMWRITE_TIFF_COMPRESSION, 1])
+    source = TiffStackSource(path, prefetch=2)
+    source.cache.clear()
+    proxy = source.read_proxy(2, 4)
+    np.testing.assert_array_equal(proxy[..., 0], pages[2, ::4, ::4])
+    assert len(source.cache) == 0
+    assert len(source.pending) == 0
+
+
+def test_tiff_stack_reduced_precision(tmp_path):
+    pages = np.random.default_rng(0).random((3, 16, 8), dtype=np.float32)
+    path = tmp_path / "stack.tif"
+    cv2.imwritemulti(str(path), list(pages), [cv2.IMWRITE_TIFF_COMPRESSION, 1])
+    source = TiffStackSource(path, prefetch=2, precision="half")
+    assert source.dtype == np.float16
+    np.testing.assert_array_equal(source[1][..., 0], pages[1].astype(np.float16))
+    np.testing.assert_array_equal(source.native_pixel(1, 5, 3), pages[1, 5, 3, None])
+    assert source.read_proxy(2, 2).dtype == np.float16
+
+
+def test_frame_list_changes_are_bounded():
+    source = FrameListSource()
+    source.max_changes = 4
+    frame = np.zeros((2, 2, 4), dtype=np.uint8)
+    for key in [10, 5, 20, 30, 40, 50]:
+        source.set(key, frame)
+    # The changes of versions 1 to 3 are merged into a single one
+    assert len(source.changes) == 4
+    assert source.changed_from(None) == 0
+    assert source.changed_from(0) == 0
+    assert source.changed_from(3) == 3
+    assert source.changed_from(5) == 5
+    assert source.changed_from(6) is None
+
+
+def test_compressed_store_round_trip_with_keyframes():
+    frames = random_frames((10, 16, 12, 3), dtype=np.uint16)
+    frames[1:] = frames[0]
+    frames[5, 2:4] = 7
+    store = CompressedFrameStore.from_frames(frames, keyframe_interval=4)
+    assert store.shape == (10, 16, 12, 4)
+    for t in [9, 0, 5, 6, 3]:
+        np.testing.assert_array_equal(store[t][..., :3], frames[t])
+        np.testing.assert_array_equal(store[t][..., 3], np.iinfo(np.uint16).max)
+    # Frames equal to their keyframe compress to almost nothing
+    assert len(store.chunks[1]) < len(store.chunks[0]) // 10
+
+    gray = random_frames((3, 8, 8, 1))
+    np.testing.assert_array_equal(CompressedFrameStore.from_frames(gray)[2], gray[2])
+
+
+def test_compressed_store_extend_holds_few_decoded_frames():
+    frames = random_frames((20, 8, 8, 4))
+    store = CompressedFrameStore(frames.shape[1:], num_workers=2)
+
+    def decode():
+        for t, frame in enumerate(frames):
+            # Frames are compressed while the next ones are decoded
+            assert t - len(store.chunks) <= 4
+            yield frame
+
+    store.extend(decode(), max_pending=4)
+    assert len(store) == 20
+    np.testing.assert_array_equal(store[13], frames[13])
+
+
+def test_ring_buffer_evicts_oldest_frames():
+    source = RingBufferSource((2, 2, 1), dtype=np.uint8, capacity=3)
+    for i in range(5):
+        assert source.append(np.full((2, 2, 1), i, np.uint8)) == i
+    assert source.offset == 2
+    assert source.shape == (3, 2, 2, 1)
+    assert source.version == 5
+    assert [int(frame[0, 0, 0]) for frame in source[:]] == [2, 3, 4]
+    assert source[-1][0, 0, 0] == 4
+    with pytest.raises(IndexError):
+        source[3]
+
+
+def test_ring_buffer_spills_evicted_frames(tmp_path):
+    source = RingBufferSource(
+        (2, 2, 1),
+        dtype=np.uint8,
+        capacity=2,
+        spill_path=tmp_path / "spill.npy",
+        spill_capacity=3,
+    )
+    for i in range(7):
+        source.append(np.full((2, 2, 1), i, np.uint8))
+    # 2 frames in RAM and 3 spilled ones are kept
+    assert source.offset == 2
+    assert [int(frame[0, 0, 0]) for frame in source[:]] == [2, 3, 4, 5, 6]
+    assert source[1, 0, 0, 0] == 3
+    with pytest.raises(ValueError):
+        source.append(np.zeros((3, 2, 1), np.uint8))
+
+
+def test_frame_hashes_distinguish_frames():
+    # Frames of two blocks of 64K words
+    frames = random_frames((4, 512, 1024, 1))
+    frames[2] = frames[0]
+    hashes = frame_hashes(frames, chunk_bytes=1)
+    assert hashes[0] == hashes[2]
+    assert len(set(hashes.tolist())) == 3
+    np.testing.assert_array_equal(frame_hashes(frames), hashes)
+    # The order of the blocks matters
+    swapped = np.concatenate([frames[:, 256:], frames[:, :256]], axis=1)
+    assert not np.any(frame_hashes(swapped) == hashes)
+    # Frames narrower than a word are hashed byte by byte
+    odd = random_frames((3, 3, 3, 1))
+    odd[1] = odd[0]
+    odd_hashes = frame_hashes(odd)
+    assert odd_hashes[0] == odd_hashes[1] != odd_hashes[2]
+
+
+def test_deduplicate_sources_shares_frames_across_sources():
+    a = random_frames((6, 4, 4, 4))
+    a[3:] = a[:3]
+    b = np.concatenate([a[:2], random_frames((1, 4, 4, 4), seed=1)])
+    unique = random_frames((2, 8, 8, 4), seed=2)
+    sources = deduplicate_sources({"a": a, "b": b, "unique": unique})
+
+    assert sources["unique"] is unique
+    assert isinstance(sources["a"], DeduplicatedSource)
+    assert sources["a"].unique_frames is sources["b"].unique_frames
+    assert len(sources["a"].unique_frames) == 4
+    np.testing.assert_array_equal(sources["a"][0:6], a)
+    np.testing.assert_array_equal(sources["b"][:], b)
+    assert sources["a"].frame_key(4) == sources["b"].frame_key(1)
+    assert sources["a"].frame_key(0) != sources["a"].frame_key(1)
+
+
+def test_deduplicate_sources_keeps_views_of_mostly_unique_frames():
+    a = random_frames((4, 4, 4, 4))
+    a[3] = a[0]
+    source = deduplicate_sources({"a": a})["a"]
+    assert isinstance(source.unique_frames, list)
+    assert np.shares_memory(source.unique_frames[0], a)
+    np.testing.assert_array_equal(source[3], a[0])
@@ -0,0 +1,135 @@
+import struct
+
+import numpy as np
+import pytest
+
+from paw_viewer.io import (
+    is_multipage_tiff,
+    read_tiff_tags,
+    read_uncompressed_tiff_page,
+    tiff_page_offsets,
+)
+from paw_viewer.sources import TiffStackSource
+
+
+def write_tiff(path, pages: np.ndarray, byte_order="<", bigtiff=False, compression=1):
+    """Write `[T, H, W, C]` pages as a single strip each, with all tags stored after the pages."""
+    T, H, W, C = pages.shape
+    offset_format, count_format, entry_format = (
+        ("Q", "Q", "HHQ") if bigtiff else ("I", "H", "HHI")
+    )
+    inline_size = 8 if bigtiff else 4
+    header_size = 16 if bigtiff else 8
+    data = pages.astype(pages.dtype.newbyteorder(byte_order)).tobytes()
+    page_bytes = len(data) // T
+    sample_format = {"u": 1, "i": 2, "f": 3}[pages.dtype.kind]
+
+    out = bytearray(header_size + len(data))
+    out[:2] = b"II" if byte_order == "<" else b"MM"
+    if bigtiff:
+        struct.pack_into(byte_order + "HHH", out, 2, 43, 8, 0)
+    else:
+        struct.pack_into(byte_order + "H", out, 2, 42)
+    out[header_size:] = data
+
+    previous = 8 if bigtiff else 4
+    for t in range(T):
+        tags = [
+            (256, 4, [W]),
+            (257, 4, [H]),
+            (258, 3, [pages.itemsize * 8] * C),
+            (259, 3, [compression]),
+            (262, 3, [2 if C == 3 else 1]),
+            (273, 4, [header_size + t * page_bytes]),
+            (277, 3, [C]),
+            (279, 4, [page_bytes]),
+            (339, 3, [sample_format]),
+        ]
+        ifd_offset = len(out)
+        struct.pack_into(byte_order + offset_format, out, previous, ifd_offset)
+        entry_size = struct.calcsize(byte_order + entry_format) + inline_size
+        ifd_size = struct.calcsize(count_format) + len(tags) * entry_size
+        out += bytes(ifd_size + inline_size)
+        struct.pack_into(byte_order + count_format, out, ifd_offset, len(tags))
+        for i, (tag, field_type, values) in enumerate(tags):
+            entry = ifd_offset + struct.calcsize(count_format) + i * entry_size
+            struct.pack_into(
+                byte_order + entry_format, out, entry, tag, field_type, len(values)
+            )
+            value_bytes = struct.pack(
+                f"{byte_order}{len(values)}{'H' if field_type == 3 else 'I'}", *values
+            )
+            if len(value_bytes) > inline_size:
+                struct.pack_into(
+                    byte_order + offset_format,
+                    out,
+                    entry + entry_size - inline_size,
+                    len(out),
+                )
+                out += value_bytes
+            else:
+                out[
+                    entry + entry_size - inline_size : entry
+                    + entry_size
+                    - inline_size
+                    + len(value_bytes)
+                ] = value_bytes
+        previous = ifd_offset + ifd_size
+    path.write_bytes(bytes(out))
+
+
+def pages_of(shape, dtype):
+    return np.random.default_rng(0).integers(0, 200, shape).astype(dtype)
+
+
+@pytest.mark.parametrize(
+    ("byte_order", "bigtiff", "dtype"),
+    [("<", False, np.uint8), (">", False, np.uint16), ("<", True, np.float32)],
+)
+def test_read_uncompressed_pages(tmp_path, byte_order, bigtiff, dtype):
+    pages = pages_of((3, 6, 5, 3), dtype)
+    path = tmp_path / "stack.tif"
+    write_tiff(path, pages, byte_order, bigtiff)
+    buffer = np.memmap(path, dtype=np.uint8, mode="r")
+
+    found_order, found_bigtiff, offsets = tiff_page_offsets(buffer)
+    assert (found_order, found_bigtiff, len(offsets)) == (byte_order, bigtiff, 3)
+    assert len(tiff_page_offsets(buffer, max_pages=2)[2]) == 2
+    assert is_multipage_tiff(path)
+
+    tags = read_tiff_tags(buffer, byte_order, bigtiff, offsets[2])
+    assert tags[258] == [pages.itemsize * 8] * 3
+    page = read_uncompressed_tiff_page(buffer, byte_order, tags)
+    assert page.dtype == dtype
+    np.testing.assert_array_equal(page, pages[2])
+    np.testing.assert_array_equal(
+        read_uncompressed_tiff_page(buffer, byte_order, tags, step=2),
+        pages[2, ::2, ::2],
+    )
+
+
+def test_compressed_pages_are_not_read_directly(tmp_path):
+    path = tmp_path / "stack.tif"
+    write_tiff(path, pages_of((2, 4, 4, 1), np.uint8), compression=5)
+    buffer = np.memmap(path, dtype=np.uint8, mode="r")
+    byte_order, bigtiff, offsets = tiff_page_offsets(buffer)
+    tags = read_tiff_tags(buffer, byte_order, bigtiff, offsets[0])
+    assert read_uncompressed_tiff_page(buffer, byte_order, tags) is None
+
+
+def test_tiff_page_offsets_rejects_other_files(tmp_path):
+    with pytest.raises(ValueError):
+        tiff_page_offsets(b"\x89PNG\r\n\x1a\n")
+    path = tmp_path / "single.tif"
+    write_tiff(path, pages_of((1, 4, 4, 1), np.uint8))
+    assert not is_multipage_tiff(path)
+
+
+def test_tiff_stack_source_keeps_bit_depth(tmp_path):
+    pages = pages_of((4, 6, 5, 1), np.uint16) * 300
+    path = tmp_path / "stack.tif"
+    write_tiff(path, pages, ">")
+    source = TiffStackSource(path, prefetch=1)
+    assert source.shape == (4, 6, 5, 1)
+    assert source.dtype == np.uint16
+    np.testing.assert_array_equal(source[3], pages[3])
@@ -0,0 +1,91 @@
+import time
+
+import numpy as np
+import pytest
+
+try:
+    import pyglet
+
+    from paw_viewer.animation import Animation
+    from paw_viewer.readout import PixelReadout
+    from paw_viewer.viewer import ViewerWindow
+except Exception as e:  # noqa: BLE001 - no display or OpenGL driver
+    pytest.skip(f"OpenGL is not available: {e}", allow_module_level=True)
+
+
+def run_loop(window, duration: float):
+    """Dispatch queued events and run scheduled functions like the event loop, for `duration` seconds."""
+    end = time.perf_counter() + duration
+    while time.perf_counter() < end:
+        window.dispatch_pending_events()
+        pyglet.clock.tick()
+        time.sleep(0.002)
+
+
+@pytest.fixture
+def window():
+    frames = np.random.default_rng(0).integers(0, 255, (4, 32, 32, 3), dtype=np.uint8)
+    try:
+        window = ViewerWindow(
+            Animation({"video": frames}), width=64, height=64, visible=False
+        )
+    except Exception as e:  # noqa: BLE001
+        pytest.skip(f"Can't create a window: {e}")
+    # Events are handled right away, as headless windows drop queued events
+    window._enable_event_queue = False
+    # Headless windows don't get a resize event when they are created
+    window.dispatch_event("on_resize", 64, 64)
+    window.draws = 0
+    draw = window.draw
+
+    def counting_draw(dt):
+        window.draws += 1
+        draw(dt)
+
+    window.draw = counting_draw
+    # Draw the first frame of the window
+    run_loop(window, 0.1)
+    yield window
+    window.close()
+
+
+def test_idle_window_does_not_redraw(window):
+    draws = window.draws
+    run_loop(window, 0.3)
+    assert window.draws == draws
+
+
+def test_mouse_motions_cause_a_single_redraw(window):
+    draws = window.draws
+    for i in range(50):
+        window.dispatch_event("on_mouse_motion", 20 + i % 20, 30, 1, 0)
+    run_loop(window, 0.1)
+    assert window.draws == draws + 1
+
+
+def test_mouse_motions_read_a_single_pixel_value(window):
+    reads = []
+    pixel_value = window.animation.pixel_value
+
+    def counting_pixel_value(y, x, t=None):
+        reads.append((y, x))
+        return pixel_value(y, x, t)
+
+    window.animation.pixel_value = counting_pixel_value
+    for i in range(50):
+        window.dispatch_event("on_mouse_motion", 20 + i % 20, 30, 1, 0)
+    run_loop(window, 0.1)
+    assert len(reads) == 1
+
+
+def test_pixel_readout_text():
+    assert PixelReadout.format(3, 7, [255, 128, 0]) == (
+        " R: 255\n G: 128\n B: 0\n A: nan\nX: 3\nY: 7"
+    )
+    assert PixelReadout.format(0, 1, np.array([0.5])).splitlines()[:2] == [
+        " R: 0.5",
+        " G: nan",
+    ]
+    readout = PixelReadout(pyglet.graphics.Batch())
+    readout.update(1, 2, np.array([0.25, 1.0, 0.0, 1.0]))
+    assert readout.label.text == " R: 0.25\n G: 1\n B: 0\n A: 1\nX: 1\nY: 2"
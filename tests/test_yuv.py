@@ -0,0 +1,100 @@
+import numpy as np
+import pytest
+
+from paw_viewer.yuv import load_raw_yuv, load_y4m, plane_rows, yuv_to_rgb
+
+W, H = 4, 2
+
+
+def write_frames(path, frames):
+    with open(path, "wb") as f:
+        f.writelines(
+            np.concatenate([y.ravel(), u.ravel(), v.ravel()]).astype(np.uint8)
+            for y, u, v in frames
+        )
+
+
+def gray_planes(value: int, layout: str = "420p", chroma: int = 128):
+    sx, sy = {"420p": (2, 2), "422p": (2, 1), "444p": (1, 1)}[layout]
+    y = np.full((H, W), value)
+    u = np.full((H // sy, W // sx), chroma)
+    return y, u, u.copy()
+
+
+def test_yuv_to_rgb_limited_range():
+    rgb = yuv_to_rgb(
+        np.array([16, 235]) / 255, np.full(2, 128 / 255), np.full(2, 128 / 255)
+    )
+    np.testing.assert_allclose(rgb, [[0, 0, 0], [1, 1, 1]], atol=1e-6)
+    # Red in BT.601
+    red = yuv_to_rgb(*np.array([81, 90, 240]) / 255, matrix="bt601")
+    np.testing.assert_allclose(red, [1, 0, 0], atol=0.01)
+
+
+def test_420p_planes_and_convert(tmp_path):
+    path = tmp_path / f"clip_{W}x{H}.yuv"
+    y = np.array([[16, 235, 81, 81], [235, 16, 81, 81]])
+    u = np.array([[128, 90]])
+    v = np.array([[128, 240]])
+    write_frames(path, [gray_planes(16), (y, u, v)])
+
+    source = load_raw_yuv(path)
+    assert source.shape == (2, H, W, 3)
+    assert source.texture_frame(1).shape == (plane_rows("420p", W, H), W, 1)
+    planes = source.planes(1)
+    np.testing.assert_array_equal(planes[0], y)
+    np.testing.assert_array_equal(planes[1], u)
+    np.testing.assert_array_equal(planes[2], v)
+
+    np.testing.assert_array_equal(source[0], 0)
+    rgb = source[1]
+    # Chroma is shared by 2x2 pixels
+    np.testing.assert_array_equal(
+        rgb[:, :2], [[[0] * 3, [255] * 3], [[255] * 3, [0] * 3]]
+    )
+    # Red in BT.601, which is used for SD sizes
+    assert np.abs(rgb[:, 2:].astype(int) - [255, 0, 0]).max() <= 3
+    np.testing.assert_array_equal(source.native_pixel(1, 1, 2), rgb[1, 2])
+    np.testing.assert_array_equal(source.convert(1, step=2), rgb[::2, ::2])
+
+
+def test_nv12_interleaves_chroma(tmp_path):
+    path = tmp_path / "clip.yuv"
+    y = np.full((H, W), 81)
+    uv = np.array([[90, 240, 128, 128]])
+    with open(path, "wb") as f:
+        f.write(np.concatenate([y.ravel(), uv.ravel()]).astype(np.uint8))
+
+    source = load_raw_yuv(path, (W, H), "nv12", matrix="bt601")
+    _, u, v = source.planes(0)
+    np.testing.assert_array_equal(u, [[90, 128]])
+    np.testing.assert_array_equal(v, [[240, 128]])
+    assert source[0][0, 0, 0] > 250
+    assert source[0][0, 0, 1] < 5
+
+
+def test_10_bit_samples_fill_uint16(tmp_path):
+    path = tmp_path / "clip.y4m"
+    with open(path, "wb") as f:
+        f.write(b"YUV4MPEG2 W4 H2 F25:1 C422p10\n")
+        for value in (64, 940):
+            f.write(b"FRAME\n")
+            y, u, v = gray_planes(value, "422p", chroma=512)
+            f.write(np.concatenate([y.ravel(), u.ravel(), v.ravel()]).astype("<u2"))
+
+    source, fps = load_y4m(path)
+    assert fps == 25
+    assert (source.layout, source.bit_depth) == ("422p", 10)
+    assert source.dtype == np.uint16
+    assert source.value_scale == pytest.approx(65535 / 1020)
+    np.testing.assert_array_equal(source[0], 0)
+    np.testing.assert_array_equal(source[1], 65535)
+
+
+def test_size_must_match_subsampling(tmp_path):
+    path = tmp_path / "clip.yuv"
+    path.write_bytes(bytes(64))
+    with pytest.raises(ValueError):
+        load_raw_yuv(path, (3, 2))
+    with pytest.raises(ValueError):
+        load_raw_yuv(path)